@@ -2,6 +2,9 @@
 ASGI config for PsysMsql project.
 
 It exposes the ASGI callable as a module-level variable named ``application``.
+Serving through ASGI (e.g. ``uvicorn PsysMsql.asgi:application``) is required
+for the dashboard live feed (``dashboard/stream/``, Server-Sent Events), and
+it routes the read-heavy views to their async variants (``SERVE_ASYNC_VIEWS``).
 
 For more information on this file, see
 https://docs.djangoproject.com/en/5.2/howto/deployment/asgi/
@@ -12,5 +15,6 @@ import os
 from django.core.asgi import get_asgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'PsysMsql.settings')
+os.environ.setdefault('PSYS_ASYNC_VIEWS', '1')
 
 application = get_asgi_application()
@@ -45,6 +45,9 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    "psysmysql.middleware.RequestIdMiddleware",
+    "psysmysql.middleware.QueryCountMiddleware",
+    "psysmysql.middleware.ReplicaRoutingMiddleware",
     "corsheaders.middleware.CorsMiddleware",
     "django.middleware.security.SecurityMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
@@ -78,18 +81,61 @@ WSGI_APPLICATION = "PsysMsql.wsgi.application"
 # Database
 # https://docs.djangoproject.com/en/5.2/ref/settings/#databases
 
+# Conexiones a MySQL
+# - PSYS_DB_CONN_MAX_AGE: segundos que se reutiliza la conexión de cada hilo
+#   entre peticiones (0 = una conexión por petición, vacío = sin límite).
+# - PSYS_DB_HEALTH_CHECKS: hace ping a la conexión reutilizada al empezar
+#   cada petición y reconecta si el servidor la cerró (wait_timeout).
+# - PSYS_DB_POOL=1: pool de conexiones por proceso (workers de Celery, o
+#   ASGI, donde las conexiones persistentes por hilo no se reutilizan).
+DB_POOL = os.environ.get("PSYS_DB_POOL", "0") == "1"
+DB_CONN_MAX_AGE = os.environ.get("PSYS_DB_CONN_MAX_AGE", "60")
+DB_CONN_MAX_AGE = int(DB_CONN_MAX_AGE) if DB_CONN_MAX_AGE else None
+
 DATABASES = {
     "default": {
-        "ENGINE": "django.db.backends.mysql",
+        "ENGINE": (
+            "psysmysql.backends.mysql_pool" if DB_POOL else "django.db.backends.mysql"
+        ),
         "NAME": "Psys",
         "USER": "root",
         "PASSWORD": os.environ.get("PASSWORD_BD"),
         "HOST": "localhost",
         "PORT": "3306",
         "OPTIONS": {"charset": "utf8mb4"},
+        # Con pool, Django devuelve la conexión al terminar cada petición/tarea
+        "CONN_MAX_AGE": 0 if DB_POOL else DB_CONN_MAX_AGE,
+        "CONN_HEALTH_CHECKS": os.environ.get("PSYS_DB_HEALTH_CHECKS", "1") == "1",
+        "POOL": {
+            "pool_size": int(os.environ.get("PSYS_DB_POOL_SIZE", "5")),
+            "max_overflow": int(os.environ.get("PSYS_DB_POOL_MAX_OVERFLOW", "10")),
+            "timeout": 30,
+            # Menor que wait_timeout de MySQL (8 h por defecto)
+            "recycle": 3600,
+            "pre_ping": True,
+        },
     }
 }
 
+# Variantes async de las vistas de lectura: solo cuando el proceso sirve ASGI
+# (PsysMsql/asgi.py define PSYS_ASYNC_VIEWS=1). Bajo WSGI quedan síncronas.
+SERVE_ASYNC_VIEWS = os.environ.get("PSYS_ASYNC_VIEWS") == "1"
+
+# Réplica de lectura (PSYS_DB_REPLICA_HOST): reportes y GET de la API.
+# En desarrollo puede ser otra base local; en los tests es un espejo de
+# ``default`` (TEST MIRROR), así que comparte los datos de cada test.
+DATABASE_REPLICA_ALIAS = None
+if os.environ.get("PSYS_DB_REPLICA_HOST"):
+    DATABASE_REPLICA_ALIAS = "replica"
+    DATABASES["replica"] = {
+        **DATABASES["default"],
+        "HOST": os.environ["PSYS_DB_REPLICA_HOST"],
+        "PORT": os.environ.get("PSYS_DB_REPLICA_PORT", DATABASES["default"]["PORT"]),
+        "TEST": {"MIRROR": "default"},
+    }
+
+DATABASE_ROUTERS = ["psysmysql.db_router.ReplicaRouter"]
+
 # Cache configuration
 CACHES = {
     "default": {
@@ -132,6 +178,10 @@ TIME_ZONE = "America/Bogota"
 
 USE_I18N = True
 
+# Región de los teléfonos escritos sin código de país (formularios y búsqueda
+# de clientes en caja); los teléfonos se guardan en E.164
+PHONENUMBER_DEFAULT_REGION = os.environ.get("PSYS_PHONE_REGION", "CO")
+
 
 # Static files (CSS, JavaScript, Images)
 # https://docs.djangoproject.com/en/5.2/howto/static-files/
@@ -140,6 +190,12 @@ STATIC_URL = "static/"
 STATIFFILE_DIRS = [BASE_DIR / "assets"]
 
 STATIC_ROOT = BASE_DIR / "staticfiles"
+
+# Destino de manage.py export_sales_parquet
+SALES_EXPORT_DIR = Path(
+    os.environ.get("PSYS_SALES_EXPORT_DIR", BASE_DIR / "exports" / "sales")
+)
+
 # Default primary key field type
 # https://docs.djangoproject.com/en/5.2/ref/settings/#default-auto-field
 
@@ -157,7 +213,63 @@ LOGIN_REDIRECT_URL = "main"
 LOGIN_URL = "accounts/login"
 LOGOUT_URL = "logout"
 
+# Fracción de records DEBUG/INFO que se conservan por logger (los WARNING y
+# ERROR nunca se descartan)
+LOG_SAMPLING_RATES = (
+    {}
+    if DEBUG
+    else {
+        "psysmysql.sells": 0.1,
+        "psysmysql.products": 0.1,
+        "psysmysql.database": 0.05,
+    }
+)
+
+# Logging no bloqueante: los hilos de request solo encolan los records y un
+# QueueListener en segundo plano escribe el archivo con rotación diaria.
+LOGGING = {
+    "version": 1,
+    "disable_existing_loggers": False,
+    "filters": {
+        "request_id": {"()": "psysmysql.logging_config.RequestIdFilter"},
+        "sampling": {
+            "()": "psysmysql.logging_config.SamplingFilter",
+            "rates": LOG_SAMPLING_RATES,
+        },
+    },
+    "handlers": {
+        "async": {
+            "()": "psysmysql.logging_config.QueueListenerHandler",
+            "filename": BASE_DIR / "logs" / "psysmysql.log",
+            "rotation": "time",  # "time" (when) o "size" (max_bytes)
+            "when": "midnight",
+            "backup_count": 14,
+            "console": DEBUG,
+            "json_format": os.environ.get("PSYS_LOG_JSON", "0" if DEBUG else "1") == "1",
+            "filters": ["request_id", "sampling"],
+        },
+    },
+    "root": {
+        "handlers": ["async"],
+        "level": "INFO",
+    },
+    "loggers": {
+        "psysmysql": {
+            "level": os.environ.get("PSYS_LOG_LEVEL", "INFO"),
+        },
+    },
+}
+
+# Feed en vivo del dashboard (SSE): pub/sub de Redis, base 2
+LIVE_FEED_REDIS_URL = "redis://localhost:6379/2"
+
+# Métricas de rendimiento (/metrics/): staff o el token Bearer del scraper de
+# Prometheus (``authorization: {credentials: ...}`` en el scrape_config)
+METRICS_TOKEN = os.environ.get("PSYS_METRICS_TOKEN")
+
 # Configuración de Celery
+from celery.schedules import crontab
+
 CELERY_BROKER_URL = "redis://localhost:6379/0"  # URL de tu broker Redis
 CELERY_RESULT_BACKEND = (
     "redis://localhost:6379/0"  # Donde se guardan los resultados de las tareas
@@ -167,6 +279,18 @@ CELERY_TASK_SERIALIZER = "json"
 CELERY_RESULT_SERIALIZER = "json"
 CELERY_TIMEZONE = "America/Bogota"  # O la zona horaria de tu proyecto
 CELERY_TASK_TRACK_STARTED = True  # Opcional: Para saber cuando una tarea ha comenzado
+CELERY_WORKER_HIJACK_ROOT_LOGGER = False  # Mantener el logging de settings.LOGGING
+CELERY_BEAT_SCHEDULE = {
+    # Análisis de canasta sobre el día cerrado (ver services/affinity_service.py)
+    "update-product-affinity": {
+        "task": "psysmysql.tasks.update_product_affinity",
+        "schedule": crontab(hour=2, minute=30),
+    },
+    "update-stock-forecasts": {
+        "task": "psysmysql.tasks.update_stock_forecasts",
+        "schedule": crontab(hour=3, minute=0),
+    },
+}
 
 # Configuración de Correo Electrónico
 EMAIL_BACKEND = "django.core.mail.backends.smtp.EmailBackend"
@@ -0,0 +1,11 @@
+"""
+Benchmarks de rendimiento para PsysMsql
+
+Ejecutar desde el directorio del proyecto (donde está manage.py) contra una
+base de datos de pruebas poblada con ``python manage.py seed_perf --database psys_bench``:
+
+    python -m benchmarks.sell_pipeline --database psys_bench --output bench/current.json
+
+Los resultados (p50/p95, consultas SQL y memoria pico por endpoint) se
+guardan en JSON para compararlos entre commits.
+"""
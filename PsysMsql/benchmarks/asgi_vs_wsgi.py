@@ -0,0 +1,188 @@
+"""
+Benchmark de concurrencia: vistas de lectura servidas por ASGI frente a WSGI.
+
+Levantar los dos servidores con el mismo número de workers y la misma base
+(poblada con ``python manage.py seed_perf``):
+
+    uvicorn PsysMsql.asgi:application --port 8000 --workers 4
+    uvicorn PsysMsql.wsgi:application --interface wsgi --port 8001 --workers 4
+
+Uso:
+    python -m benchmarks.asgi_vs_wsgi --output bench/asgi_vs_wsgi.json
+    python -m benchmarks.asgi_vs_wsgi --concurrency 400 --requests 8000 --paths /dashboard/api/
+
+Cada conexión es un cliente HTTP/1.1 keep-alive autenticado con una sesión
+del usuario de benchmark; se reportan req/s, p50/p95/p99 y errores por
+servidor y ruta.
+
+``PsysMsql.asgi`` enruta las variantes async de las vistas (``aview_product``,
+``adashboard_api``...) y ``PsysMsql.wsgi`` las síncronas, así cada servidor
+se mide con las vistas que sirve en producción.
+"""
+
+import argparse
+import asyncio
+import time
+from importlib import import_module
+from urllib.parse import urlsplit
+
+from .harness import percentile, setup_django, write_results
+
+setup_django()
+
+from django.conf import settings  # noqa: E402
+from django.contrib.auth import (  # noqa: E402
+    BACKEND_SESSION_KEY,
+    HASH_SESSION_KEY,
+    SESSION_KEY,
+)
+from django.contrib.auth.models import User  # noqa: E402
+
+BENCH_USERNAME = "perf_benchmark"
+DEFAULT_PATHS = [
+    "/list-product/",
+    "/search-products-ajax/?q=pro",
+    "/all_clients/",
+    "/dashboard/api/?endpoint=summary",
+    "/dashboard/realtime/",
+]
+
+
+def session_cookie():
+    """Sesión autenticada del usuario de benchmark, compartida por ambos servidores"""
+    user, _ = User.objects.get_or_create(
+        username=BENCH_USERNAME,
+        defaults={"is_staff": True, "is_superuser": True},
+    )
+    session = import_module(settings.SESSION_ENGINE).SessionStore()
+    session[SESSION_KEY] = str(user.pk)
+    session[BACKEND_SESSION_KEY] = "django.contrib.auth.backends.ModelBackend"
+    session[HASH_SESSION_KEY] = user.get_session_auth_hash()
+    session.save()
+    return f"{settings.SESSION_COOKIE_NAME}={session.session_key}"
+
+
+async def read_response(reader):
+    """Lee una respuesta HTTP/1.1 completa (Content-Length o chunked)"""
+    head = await reader.readuntil(b"\r\n\r\n")
+    lines = head.decode("latin-1").split("\r\n")
+    status = int(lines[0].split()[1])
+    headers = {}
+    for line in lines[1:]:
+        if ":" in line:
+            name, value = line.split(":", 1)
+            headers[name.strip().lower()] = value.strip()
+
+    if "content-length" in headers:
+        await reader.readexactly(int(headers["content-length"]))
+    elif headers.get("transfer-encoding") == "chunked":
+        while True:
+            size = int((await reader.readuntil(b"\r\n")).split(b";")[0], 16)
+            await reader.readexactly(size + 2)
+            if size == 0:
+                break
+    return status, headers.get("connection", "").lower() != "close"
+
+
+async def worker(url, path, cookie, remaining, timings_ms, errors):
+    parts = urlsplit(url)
+    request = (
+        f"GET {path} HTTP/1.1\r\n"
+        f"Host: {parts.netloc}\r\n"
+        f"Cookie: {cookie}\r\n"
+        "Connection: keep-alive\r\n\r\n"
+    ).encode()
+
+    reader = writer = None
+    while remaining[0] > 0:
+        remaining[0] -= 1
+        start = time.perf_counter_ns()
+        try:
+            if reader is None or writer is None:
+                reader, writer = await asyncio.open_connection(
+                    parts.hostname, parts.port or 80
+                )
+            writer.write(request)
+            await writer.drain()
+            status, keep_alive = await read_response(reader)
+        except (OSError, asyncio.IncompleteReadError, ValueError, IndexError):
+            errors["connection"] += 1
+            if writer is not None:
+                writer.close()
+            reader = writer = None
+            continue
+
+        timings_ms.append((time.perf_counter_ns() - start) / 1_000_000)
+        if status >= 400:
+            errors[str(status)] = errors.get(str(status), 0) + 1
+        if not keep_alive:
+            writer.close()
+            reader = writer = None
+
+    if writer is not None:
+        writer.close()
+
+
+async def run_load(url, path, cookie, concurrency, requests):
+    timings_ms = []
+    errors = {"connection": 0}
+    remaining = [requests]
+
+    start = time.perf_counter()
+    await asyncio.gather(
+        *(
+            worker(url, path, cookie, remaining, timings_ms, errors)
+            for _ in range(concurrency)
+        )
+    )
+    elapsed = time.perf_counter() - start
+
+    return {
+        "concurrency": concurrency,
+        "requests": requests,
+        "completed": len(timings_ms),
+        "req_per_s": round(len(timings_ms) / elapsed, 1) if elapsed else 0.0,
+        "p50_ms": round(percentile(timings_ms, 50), 3),
+        "p95_ms": round(percentile(timings_ms, 95), 3),
+        "p99_ms": round(percentile(timings_ms, 99), 3),
+        "errors": {name: count for name, count in errors.items() if count},
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--asgi-url", default="http://127.0.0.1:8000")
+    parser.add_argument("--wsgi-url", default="http://127.0.0.1:8001")
+    parser.add_argument("--concurrency", type=int, default=200)
+    parser.add_argument("--requests", type=int, default=4_000, help="Por servidor y ruta")
+    parser.add_argument("--paths", nargs="*", default=DEFAULT_PATHS)
+    parser.add_argument("--output", default="bench/asgi_vs_wsgi.json")
+    args = parser.parse_args(argv)
+
+    cookie = session_cookie()
+    servers = {"asgi": args.asgi_url, "wsgi": args.wsgi_url}
+
+    results = {}
+    for server, url in servers.items():
+        results[server] = {}
+        for path in args.paths:
+            result = asyncio.run(
+                run_load(url, path, cookie, args.concurrency, args.requests)
+            )
+            results[server][path] = result
+            print(
+                f"{server} {path:<36} {result['req_per_s']:>9.1f} req/s "
+                f"p50={result['p50_ms']:>8.2f}ms p99={result['p99_ms']:>8.2f}ms "
+                f"errors={result['errors'] or 0}"
+            )
+
+    path = write_results(
+        args.output,
+        results,
+        {"concurrency": args.concurrency, "requests": args.requests, "servers": servers},
+    )
+    print(f"Resultados guardados en {path}")
+
+
+if __name__ == "__main__":
+    main()
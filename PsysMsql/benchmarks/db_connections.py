@@ -0,0 +1,128 @@
+"""
+Benchmark del costo de conexión a la base de datos por petición.
+
+Simula el ciclo de vida de Django en cada petición (``close_old_connections``
+al empezar y al terminar) alrededor de una consulta corta, con tres modos:
+
+- ``per_request``: ``CONN_MAX_AGE=0``, una conexión nueva por petición
+  (TCP + autenticación + ``SET NAMES``), como antes de este cambio.
+- ``persistent``: ``CONN_MAX_AGE=60`` con ``CONN_HEALTH_CHECKS``.
+- ``pool``: backend ``psysmysql.backends.mysql_pool`` (solo MySQL).
+
+Uso:
+    python -m benchmarks.db_connections --output bench/db_connections.json
+    python -m benchmarks.db_connections --requests 2000 --modes per_request pool
+"""
+
+import argparse
+import copy
+import time
+
+from .harness import percentile, setup_django, write_results
+
+setup_django()
+
+from django.db import connection, connections  # noqa: E402
+from django.db.backends.signals import connection_created  # noqa: E402
+from django.db.utils import load_backend  # noqa: E402
+
+MODES = {
+    "per_request": {"CONN_MAX_AGE": 0, "CONN_HEALTH_CHECKS": False},
+    "persistent": {"CONN_MAX_AGE": 60, "CONN_HEALTH_CHECKS": True},
+    "pool": {
+        "ENGINE": "psysmysql.backends.mysql_pool",
+        "CONN_MAX_AGE": 0,
+        "CONN_HEALTH_CHECKS": False,
+    },
+}
+QUERY = "SELECT 1"
+
+
+def make_wrapper(mode):
+    """Conexión independiente de ``default`` con la configuración del modo"""
+    settings_dict = copy.deepcopy(connections["default"].settings_dict)
+    settings_dict.update(MODES[mode])
+    backend = load_backend(settings_dict["ENGINE"])
+    return backend.DatabaseWrapper(settings_dict, alias=f"bench_{mode}")
+
+
+def run_mode(mode, requests, warmup):
+    wrapper = make_wrapper(mode)
+    opened = []
+
+    def count_connect(sender, connection, **kwargs):
+        if connection is wrapper:
+            opened.append(1)
+
+    def request():
+        # request_started / request_finished -> close_old_connections()
+        wrapper.close_if_unusable_or_obsolete()
+        with wrapper.cursor() as cursor:
+            cursor.execute(QUERY)
+            cursor.fetchone()
+        wrapper.close_if_unusable_or_obsolete()
+
+    for _ in range(warmup):
+        request()
+
+    connection_created.connect(count_connect)
+    timings_ms = []
+    try:
+        for _ in range(requests):
+            start = time.perf_counter_ns()
+            request()
+            timings_ms.append((time.perf_counter_ns() - start) / 1_000_000)
+    finally:
+        connection_created.disconnect(count_connect)
+        pool = getattr(wrapper, "pool", None)
+        pool_status = pool.status() if pool is not None else None
+        wrapper.close()
+
+    # En modo pool connect() se llama en cada petición: lo que cuenta son
+    # las conexiones físicas que abrió el pool
+    physical = pool_status["created"] if pool_status else len(opened)
+    return {
+        "requests": requests,
+        "connections_opened": physical,
+        "p50_ms": round(percentile(timings_ms, 50), 4),
+        "p95_ms": round(percentile(timings_ms, 95), 4),
+        "mean_ms": round(sum(timings_ms) / len(timings_ms), 4),
+        "pool": pool_status,
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--output", default="bench/db_connections.json")
+    parser.add_argument("--requests", type=int, default=1_000)
+    parser.add_argument("--warmup", type=int, default=10)
+    parser.add_argument("--modes", nargs="*", default=list(MODES))
+    args = parser.parse_args(argv)
+
+    results = {}
+    for mode in args.modes:
+        if mode == "pool" and connection.vendor != "mysql":
+            print(f"{mode:<12} omitido: el pool es para MySQL ({connection.vendor})")
+            continue
+        results[mode] = run_mode(mode, args.requests, args.warmup)
+        print(
+            f"{mode:<12} p50={results[mode]['p50_ms']:>8.3f}ms "
+            f"p95={results[mode]['p95_ms']:>8.3f}ms "
+            f"conexiones={results[mode]['connections_opened']}"
+        )
+
+    if "per_request" in results:
+        baseline = results["per_request"]["mean_ms"]
+        for mode, result in results.items():
+            if mode != "per_request":
+                result["overhead_removed_ms"] = round(baseline - result["mean_ms"], 4)
+                print(f"{mode:<12} ahorro por petición: {result['overhead_removed_ms']:.3f}ms")
+
+    path = write_results(
+        args.output, results, {"requests": args.requests, "query": QUERY}
+    )
+    print(f"Resultados guardados en {path}")
+
+
+if __name__ == "__main__":
+    main()
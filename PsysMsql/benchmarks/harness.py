@@ -0,0 +1,159 @@
+"""
+Utilidades comunes para medir latencia, consultas SQL y memoria
+"""
+
+import json
+import math
+import os
+import platform
+import subprocess
+import time
+import tracemalloc
+from contextlib import ExitStack, contextmanager
+from datetime import datetime, timezone
+from pathlib import Path
+
+import django
+from django.db import connection, connections
+from django.test.utils import CaptureQueriesContext
+
+# Los benchmarks que escriben (carrito, ventas) solo corren sobre una base
+# cuyo nombre lo indique y que se nombre explícitamente con --database
+BENCH_DATABASE_MARKERS = ("bench", "perf", "test")
+
+
+def setup_django():
+    """Configura Django para ejecutar benchmarks fuera de manage.py"""
+    os.environ.setdefault("DJANGO_SETTINGS_MODULE", "PsysMsql.settings")
+    django.setup()
+
+
+def require_bench_database(name):
+    """
+    Detiene el benchmark si ``default`` no es la base dedicada ``name``
+
+    ``name`` debe coincidir con ``DATABASES["default"]["NAME"]`` (o su nombre
+    de archivo en SQLite) y contener "bench", "perf" o "test": así no se borra
+    el carrito ni se insertan ventas en la base de producción por error.
+    """
+    configured = str(connections["default"].settings_dict["NAME"])
+    if name not in (configured, Path(configured).name):
+        raise SystemExit(
+            f"--database {name!r} no coincide con la base configurada ({configured!r})"
+        )
+    if not any(marker in name.lower() for marker in BENCH_DATABASE_MARKERS):
+        raise SystemExit(
+            f"La base {name!r} no parece dedicada a benchmarks: su nombre debe "
+            f"contener {', '.join(BENCH_DATABASE_MARKERS)}"
+        )
+
+
+@contextmanager
+def capture_all_queries():
+    """
+    Consultas ejecutadas en todas las conexiones configuradas
+
+    Con la réplica de lectura activa las lecturas no pasan por ``default``.
+
+    Yields:
+        list: al salir, las consultas de todos los alias
+    """
+    captured = []
+    with ExitStack() as stack:
+        contexts = [
+            stack.enter_context(CaptureQueriesContext(connections[alias]))
+            for alias in connections
+        ]
+        yield captured
+    for context in contexts:
+        captured.extend(context.captured_queries)
+
+
+def percentile(samples, pct):
+    """Percentil por rango más cercano sobre una lista de muestras"""
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    rank = max(0, math.ceil(pct / 100 * len(ordered)) - 1)
+    return ordered[rank]
+
+
+def run_case(func, iterations=30, warmup=3, setup=None):
+    """
+    Ejecuta ``func`` varias veces y devuelve sus estadísticas.
+
+    ``setup`` se ejecuta antes de cada iteración y no se incluye en el tiempo.
+    La memoria pico se mide en una iteración adicional con tracemalloc para no
+    distorsionar las latencias.
+    """
+    for _ in range(warmup):
+        if setup:
+            setup()
+        func()
+
+    timings_ms = []
+    query_counts = []
+    errors = 0
+    for _ in range(iterations):
+        if setup:
+            setup()
+        with capture_all_queries() as queries:
+            start = time.perf_counter_ns()
+            response = func()
+            elapsed = time.perf_counter_ns() - start
+        timings_ms.append(elapsed / 1_000_000)
+        query_counts.append(len(queries))
+        if getattr(response, "status_code", 200) >= 500:
+            errors += 1
+
+    if setup:
+        setup()
+    tracemalloc.start()
+    try:
+        func()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    return {
+        "iterations": iterations,
+        "p50_ms": round(percentile(timings_ms, 50), 3),
+        "p95_ms": round(percentile(timings_ms, 95), 3),
+        "mean_ms": round(sum(timings_ms) / len(timings_ms), 3),
+        "min_ms": round(min(timings_ms), 3),
+        "max_ms": round(max(timings_ms), 3),
+        "queries": int(percentile(query_counts, 50)),
+        "queries_max": max(query_counts),
+        "peak_memory_kb": round(peak / 1024, 1),
+        "errors": errors,
+    }
+
+
+def git_commit():
+    try:
+        return (
+            subprocess.check_output(
+                ["git", "rev-parse", "--short", "HEAD"], stderr=subprocess.DEVNULL
+            )
+            .decode()
+            .strip()
+        )
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def write_results(path, results, extra_meta=None):
+    """Guarda los resultados con metadatos del entorno"""
+    meta = {
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+        "git_commit": git_commit(),
+        "python": platform.python_version(),
+        "django": django.get_version(),
+        "database": connection.vendor,
+    }
+    meta.update(extra_meta or {})
+
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(json.dumps({"meta": meta, "results": results}, indent=2))
+    return path
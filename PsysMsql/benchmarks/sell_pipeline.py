@@ -0,0 +1,169 @@
+"""
+Benchmark del flujo de venta/checkout y de los endpoints de reportes.
+
+Uso:
+    python -m benchmarks.sell_pipeline --database psys_bench --output bench/current.json
+    python -m benchmarks.sell_pipeline --database psys_bench --cases sell_product_get
+
+Vacía el carrito y registra ventas en la base configurada: ``--database`` debe
+nombrar la base ``default`` y esta debe ser una base dedicada (su nombre
+contiene "bench", "perf" o "test") poblada con ``python manage.py seed_perf``.
+"""
+
+import argparse
+
+from .harness import require_bench_database, setup_django, run_case, write_results
+
+setup_django()
+
+from django.apps import apps  # noqa: E402
+from django.contrib.auth.models import User  # noqa: E402
+from django.test import Client  # noqa: E402
+from django.urls import reverse  # noqa: E402
+
+# Modelos desde el registro de apps: el benchmark está fuera del paquete psysmysql
+Clients, Products, RegistersellDetail, Sell, SellProducts, Stock = (
+    apps.get_model("psysmysql", name)
+    for name in ("Clients", "Products", "RegistersellDetail", "Sell", "SellProducts", "Stock")
+)
+
+BENCH_USERNAME = "perf_benchmark"
+CART_SIZE = 5
+MIN_STOCK = 100
+
+
+class SellPipelineBenchmark:
+    def __init__(self):
+        self.user, _ = User.objects.get_or_create(
+            username=BENCH_USERNAME,
+            defaults={"is_staff": True, "is_superuser": True},
+        )
+        self.client = Client(SERVER_NAME="localhost", raise_request_exception=False)
+        self.client.force_login(self.user)
+
+        self.products = list(
+            Stock.objects.filter(quantitystock__gte=MIN_STOCK)
+            .select_related("id_products")
+            .values_list("id_products", "id_products__price")[:CART_SIZE]
+        )
+        if not self.products:
+            raise SystemExit(
+                "No hay productos con stock suficiente. Ejecute 'manage.py seed_perf'."
+            )
+
+    def clear_cart(self):
+        SellProducts.objects.all().delete()
+        Sell.objects.all().delete()
+
+    def fill_cart(self):
+        """Deja el carrito con CART_SIZE líneas, como lo haría add-to-cart"""
+        self.clear_cart()
+        for product_id, price in self.products:
+            sell = Sell.objects.create(totalsell=1, id_product_id=product_id)
+            SellProducts.objects.create(
+                idsell=sell, idproduct_id=product_id, quantity=1, priceunitaty=price
+            )
+        session = self.client.session
+        session["idproduct"] = self.products[0][0]
+        session.save()
+
+    # --- casos ---
+
+    def sell_product_get(self):
+        return self.client.get(reverse("sell_product"))
+
+    def add_to_cart(self):
+        return self.client.post(
+            reverse("sell_product"),
+            {"sell": "", "id_product": self.products[0][0], "totalsell": 1},
+        )
+
+    def handle_add_form(self):
+        return self.client.post(
+            reverse("sell_product"),
+            {
+                "add": "",
+                "type_pay": "Efectivo",
+                "state_sell": "Pagado",
+                "notes": "benchmark",
+                "quantity_pay": "99999999",
+            },
+        )
+
+    def handle_sent_form(self):
+        return self.client.post(
+            reverse("sell_product"),
+            {"sent": "", "action_type": "sent_sell", "client_email_selected": ""},
+        )
+
+    def search_products_ajax(self):
+        return self.client.get(reverse("search_products_ajax"), {"q": "perf prod"})
+
+    def list_all_sell_register(self):
+        return self.client.get(reverse("list_all_sell_register"))
+
+    def api_products(self):
+        return self.client.get("/api/v1/products/")
+
+    def api_sales_analytics(self):
+        return self.client.get("/api/v1/sales/analytics/")
+
+    def cases(self):
+        return {
+            "sell_product_get": (self.sell_product_get, self.fill_cart),
+            "add_to_cart": (self.add_to_cart, self.clear_cart),
+            "handle_add_form": (self.handle_add_form, self.fill_cart),
+            "handle_sent_form": (self.handle_sent_form, self.fill_cart),
+            "search_products_ajax": (self.search_products_ajax, None),
+            "list_all_sell_register": (self.list_all_sell_register, None),
+            "api_products": (self.api_products, None),
+            "api_sales_analytics": (self.api_sales_analytics, None),
+        }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument(
+        "--database", required=True, help="Nombre de la base dedicada (confirmación)"
+    )
+    parser.add_argument("--output", default="bench/current.json")
+    parser.add_argument("--iterations", type=int, default=30)
+    parser.add_argument("--warmup", type=int, default=3)
+    parser.add_argument("--cases", nargs="*", help="Subconjunto de casos a ejecutar")
+    args = parser.parse_args(argv)
+    require_bench_database(args.database)
+
+    benchmark = SellPipelineBenchmark()
+    cases = benchmark.cases()
+    selected = args.cases or list(cases)
+
+    results = {}
+    try:
+        for name in selected:
+            func, setup = cases[name]
+            results[name] = run_case(func, args.iterations, args.warmup, setup)
+            print(
+                f"{name:<26} p50={results[name]['p50_ms']:>9.2f}ms "
+                f"p95={results[name]['p95_ms']:>9.2f}ms "
+                f"queries={results[name]['queries']}"
+            )
+    finally:
+        benchmark.clear_cart()
+
+    path = write_results(
+        args.output,
+        results,
+        {
+            "iterations": args.iterations,
+            "dataset": {
+                "products": Products.objects.count(),
+                "clients": Clients.objects.count(),
+                "sales": RegistersellDetail.objects.count(),
+            },
+        },
+    )
+    print(f"Resultados guardados en {path}")
+
+
+if __name__ == "__main__":
+    main()
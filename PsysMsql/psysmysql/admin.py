@@ -14,4 +14,9 @@ admin.site.register(models.Sell)
 admin.site.register(models.SellProducts)
 admin.site.register(models.Stock)
 admin.site.register(models.RegistersellDetail)
+admin.site.register(models.RegistersellArchive)
 admin.site.register(models.Clients)
+admin.site.register(models.DailySalesRollup)
+admin.site.register(models.DailyProductSalesRollup)
+admin.site.register(models.ProductAffinity)
+admin.site.register(models.StockForecast)
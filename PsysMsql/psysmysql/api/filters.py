@@ -8,8 +8,40 @@ in API endpoints using django-filter.
 import django_filters
 from django.db.models import Q,F
 from datetime import datetime, timedelta
+from rest_framework import filters
+from rest_framework.settings import api_settings
 from ..models import Products, Sell, Stock, Clients, RegistersellDetail
 from ..forms import RegisterSellDetailForm
+from ..services.fulltext_service import FULLTEXT_INDEXES, FullTextSearch
+from ..services.stock_service import StockThresholds
+
+
+class FullTextSearchFilter(filters.SearchFilter):
+    """
+    SearchFilter backed by MySQL FULLTEXT indexes
+
+    ``?search=`` runs ``MATCH ... AGAINST`` in boolean mode and orders by
+    relevance unless the request sets ``?ordering=`` (list this backend after
+    OrderingFilter). Relevance has no column a cursor can point at, so
+    KeysetPagination serves ranked results with ``?page=`` pages instead of
+    cursors. Short words and databases without FULLTEXT fall back to
+    ``icontains`` over the view's ``search_fields``.
+    """
+
+    def filter_queryset(self, request, queryset, view):
+        query = request.query_params.get(self.search_param, "")
+        search_fields = self.get_search_fields(view, request)
+        if not query.strip() or not search_fields:
+            return queryset
+        if queryset.model._meta.db_table not in FULLTEXT_INDEXES:
+            return super().filter_queryset(request, queryset, view)
+
+        return FullTextSearch.filter(
+            queryset,
+            query,
+            like_fields=search_fields,
+            order_by_relevance=api_settings.ORDERING_PARAM not in request.query_params,
+        )
 
 
 class ProductFilter(django_filters.FilterSet):
@@ -46,13 +78,15 @@ class ProductFilter(django_filters.FilterSet):
         return queryset
 
     @staticmethod
-    def filter_low_stock(queryset, value):
-        """Filter products with low stock (<=10)"""
+    def filter_low_stock(queryset, name, value):
+        """Filter products in stock but below their own reorder point"""
         if value:
-            stock_ids = Stock.objects.filter(
-                quantity__gt=0, quantity__lte=10
-            ).values_list("name_id", flat=True)
-            return queryset.filter(id__in=stock_ids)
+            return queryset.filter(
+                StockThresholds.low_stock_q(
+                    quantity="stock__quantitystock", product_path=""
+                ),
+                stock__quantitystock__gt=0,
+            )
         return queryset
 
     @staticmethod
@@ -0,0 +1,180 @@
+"""
+Pagination classes for PsysMsql API
+
+Keyset (cursor) pagination for the high-volume endpoints: every page is a
+single ``WHERE (key) < (cursor) ORDER BY key LIMIT n`` query, so deep pages
+cost the same as the first one.
+"""
+
+from typing import Any
+
+from django.core.exceptions import FieldDoesNotExist
+from rest_framework.exceptions import NotFound, ValidationError
+from rest_framework.filters import OrderingFilter
+from rest_framework.pagination import BasePagination, PageNumberPagination
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+from rest_framework.utils.urls import replace_query_param
+
+from ..utils import estimate_count, keyset_paginate
+
+
+class RankedPagination(PageNumberPagination):
+    """Page-number pagination for results ordered by a computed rank"""
+
+    page_size_query_param = "page_size"
+    max_page_size = 100
+
+
+class KeysetPagination(BasePagination):
+    """
+    Cursor pagination over (ordering fields, primary key)
+
+    The ordering comes from the view's OrderingFilter (``?ordering=`` or the
+    view's default ``ordering``); the primary key is appended as a unique
+    tiebreaker so cursors are stable. Nullable fields sort NULL first and are
+    compared with ``IS NULL`` in the cursor predicate. Ordering by a related
+    or non-column field is rejected with 400. Cursors are opaque strings.
+
+    When a filter already ordered the queryset by an annotation, such as the
+    ``relevance`` of FullTextSearchFilter, there is no column to put in a
+    cursor: those responses fall back to ``?page=`` pagination
+    (RankedPagination) and keep the filter's order.
+
+    The total is not computed by default. ``?count=exact`` runs ``COUNT(*)``
+    and ``?count=approximate`` uses the information_schema row estimate.
+    """
+
+    page_size = api_settings.PAGE_SIZE
+    page_size_query_param = "page_size"
+    max_page_size = 100
+    cursor_query_param = "cursor"
+    count_query_param = "count"
+
+    def get_ordering(self, request, queryset, view):
+        ordering = None
+        for backend in getattr(view, "filter_backends", []):
+            if issubclass(backend, OrderingFilter):
+                ordering = backend().get_ordering(request, queryset, view)
+                break
+        pk = queryset.model._meta.pk.name
+        fields = []
+        for field in ordering or [f"-{pk}"]:
+            self.check_ordering_field(queryset.model, field.lstrip("-"))
+            fields.append(field)
+            if field.lstrip("-") == pk:
+                return tuple(fields)
+        return (*fields, f"-{pk}" if fields[-1].startswith("-") else pk)
+
+    @staticmethod
+    def check_ordering_field(model, name):
+        """Only local columns can be compared against a cursor value"""
+        try:
+            field = model._meta.get_field(name)
+        except FieldDoesNotExist:
+            field = None
+        if field is None or not field.concrete or field.is_relation:
+            raise ValidationError(
+                {api_settings.ORDERING_PARAM: [f"Cannot paginate ordered by '{name}'"]}
+            )
+
+    @staticmethod
+    def is_ranked(queryset):
+        """The queryset is ordered by an annotation (e.g. search relevance)"""
+        return any(
+            isinstance(field, str) and field.lstrip("-") in queryset.query.annotations
+            for field in queryset.query.order_by
+        )
+
+    def get_page_size(self, request):
+        try:
+            size = int(request.query_params[self.page_size_query_param])
+        except (KeyError, ValueError):
+            return self.page_size
+        return min(max(size, 1), self.max_page_size)
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.ranked_pagination = None
+        if self.is_ranked(queryset):
+            self.ranked_pagination = RankedPagination()
+            # Primary key as tiebreaker so equal ranks keep their page
+            queryset = queryset.order_by(
+                *queryset.query.order_by, queryset.model._meta.pk.name
+            )
+            return self.ranked_pagination.paginate_queryset(queryset, request, view)
+
+        ordering = self.get_ordering(request, queryset, view)
+        try:
+            self.page = keyset_paginate(
+                queryset,
+                ordering,
+                request.query_params.get(self.cursor_query_param),
+                self.get_page_size(request),
+            )
+        except ValueError:
+            raise NotFound("Invalid cursor")
+
+        count_mode = request.query_params.get(self.count_query_param)
+        if count_mode == "exact":
+            self.count = queryset.count()
+        elif count_mode == "approximate":
+            self.count = estimate_count(queryset)
+        else:
+            self.count = None
+        return list(self.page)
+
+    def get_link(self, cursor):
+        if cursor is None:
+            return None
+        url = self.request.build_absolute_uri()
+        return replace_query_param(url, self.cursor_query_param, cursor)
+
+    def get_paginated_response(self, data):
+        if self.ranked_pagination is not None:
+            return self.ranked_pagination.get_paginated_response(data)
+        payload: dict[str, Any] = {
+            "next": self.get_link(self.page.next_cursor),
+            "previous": self.get_link(self.page.previous_cursor),
+        }
+        if self.request.query_params.get(self.count_query_param):
+            payload["count"] = self.count
+        payload["results"] = data
+        return Response(payload)
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            "type": "object",
+            "required": ["results"],
+            "properties": {
+                "next": {"type": "string", "nullable": True, "format": "uri"},
+                "previous": {"type": "string", "nullable": True, "format": "uri"},
+                "count": {"type": "integer", "nullable": True},
+                "results": schema,
+            },
+        }
+
+    def get_schema_operation_parameters(self, view):
+        return [
+            {
+                "name": self.cursor_query_param,
+                "required": False,
+                "in": "query",
+                "description": "Opaque cursor from the previous response",
+                "schema": {"type": "string"},
+            },
+            {
+                "name": self.page_size_query_param,
+                "required": False,
+                "in": "query",
+                "description": f"Results per page (max {self.max_page_size})",
+                "schema": {"type": "integer"},
+            },
+            {
+                "name": self.count_query_param,
+                "required": False,
+                "in": "query",
+                "description": "Include a total: exact or approximate",
+                "schema": {"type": "string", "enum": ["exact", "approximate"]},
+            },
+        ]
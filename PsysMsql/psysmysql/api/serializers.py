@@ -9,6 +9,31 @@ from rest_framework import serializers
 from django.contrib.auth.models import User
 from ..models import Products, Sell, SellProducts, Stock, RegistersellDetail, Clients
 from ..forms import RegisterSellDetailForm
+from ..constants import LOW_STOCK_THRESHOLD
+
+
+def product_stock_quantity(obj):
+    """Stock of a product (annotated by ProductViewSet, else one query)"""
+    if hasattr(obj, "stock_quantity"):
+        return obj.stock_quantity
+    stock = Stock.objects.filter(id_products=obj).values_list(
+        "quantitystock", flat=True
+    ).first()
+    return stock or 0
+
+
+def product_stock_status(obj, quantity):
+    """Stock status against the product's reorder point (forecast)"""
+    threshold = getattr(obj, "low_stock_threshold", None)
+    if threshold is None:
+        forecast = getattr(obj, "forecast", None)
+        threshold = forecast.reorder_point if forecast else LOW_STOCK_THRESHOLD
+    if quantity == 0:
+        return "out_of_stock"
+    elif quantity < threshold:
+        return "low_stock"
+    else:
+        return "in_stock"
 
 
 class UserSerializer(serializers.ModelSerializer):
@@ -85,31 +110,22 @@ class ProductSerializer(serializers.ModelSerializer):
         read_only_fields = ["id"]
 
     @staticmethod
-    def get_stock_quantity(self, obj):
+    def get_stock_quantity(obj):
         """Get total stock quantity for this product"""
-        try:
-            stock = Stock.objects.get(id_products=obj)
-            return stock.quantitystock
-        except Stock.DoesNotExist:
-            return 0
-
-    def get_stock_status(self, obj):
-        """Determine stock status based on quantity"""
-        quantity = self.get_stock_quantity(obj)
-        if quantity == 0:
-            return "out_of_stock"
-        elif quantity < 10:  # Configurable threshold
-            return "low_stock"
-        else:
-            return "in_stock"
+        return product_stock_quantity(obj)
 
     @staticmethod
-    def get_formatted_price(self, obj):
+    def get_stock_status(obj):
+        """Determine stock status against the product's reorder point"""
+        return product_stock_status(obj, product_stock_quantity(obj))
+
+    @staticmethod
+    def get_formatted_price(obj):
         """Format price as currency string"""
         return f"${obj.price:,.2f}"
 
     @staticmethod
-    def validate_price(self, value):
+    def validate_price(value):
         """Validate price is positive"""
         if value <= 0:
             raise serializers.ValidationError("El precio debe ser mayor a cero")
@@ -148,20 +164,11 @@ class ProductListSerializer(serializers.ModelSerializer):
 
     @staticmethod
     def get_stock_quantity(obj):
-        try:
-            stock = Stock.objects.get(id_products=obj)
-            return stock.quantitystock
-        except Stock.DoesNotExist:
-            return 0
-
-    def get_stock_status(self, obj):
-        quantity = self.get_stock_quantity(obj)
-        if quantity == 0:
-            return "out_of_stock"
-        elif quantity < 10:
-            return "low_stock"
-        else:
-            return "in_stock"
+        return product_stock_quantity(obj)
+
+    @staticmethod
+    def get_stock_status(obj):
+        return product_stock_status(obj, product_stock_quantity(obj))
 
 
 class StockSerializer(serializers.ModelSerializer):
@@ -348,10 +355,13 @@ class RegisterSellDetailSerializer(serializers.ModelSerializer):
 class AnalyticsSerializer(serializers.Serializer):
     """Serializer for analytics data"""
 
-    total_sales = serializers.DecimalField(max_digits=10, decimal_places=2)
+    start_date = serializers.DateField()
+    end_date = serializers.DateField()
+    total_sales = serializers.FloatField()
     total_orders = serializers.IntegerField()
-    average_order_value = serializers.DecimalField(max_digits=10, decimal_places=2)
-    top_products = ProductListSerializer(many=True)
+    average_order_value = serializers.FloatField()
+    top_products = serializers.ListField(child=serializers.DictField())
     sales_by_payment_method = serializers.DictField()
     monthly_sales = serializers.ListField()
-    low_stock_products = ProductListSerializer(many=True)
+    daily_sales = serializers.ListField()
+    low_stock_products = serializers.ListField(child=serializers.DictField())
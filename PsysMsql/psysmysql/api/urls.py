@@ -158,6 +158,13 @@ Sales filters:
 - ?this_month=true                 - This month's sales
 - ?last_30_days=true               - Last 30 days sales
 
+Sales analytics (/api/v1/sales/analytics/):
+- ?start_date={date}               - Range start (YYYY-MM-DD, default 30 days ago)
+- ?end_date={date}                 - Range end (YYYY-MM-DD, default today)
+
+Daily summary (/api/v1/sales/daily_summary/):
+- ?date={date}                     - Day to summarize (YYYY-MM-DD, default today)
+
 Client filters:
 - ?name={name}                     - Filter by name
 - ?email={email}                   - Filter by email
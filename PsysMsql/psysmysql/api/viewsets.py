@@ -7,17 +7,29 @@ Each ViewSet provides CRUD operations and custom actions for specific models.
 
 from rest_framework import viewsets, status, filters
 from rest_framework.decorators import action
+from rest_framework.exceptions import NotFound
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
 from django_filters.rest_framework import DjangoFilterBackend
 from django.contrib.auth.models import User
-from django.db.models import Sum, Count, Avg
+from django.db.models import Sum, Count, Avg, DecimalField, F, Min, Q, Value
+from django.db.models.functions import Coalesce
 from django.db import transaction
+from django.utils import timezone
 from datetime import datetime, timedelta
+from decimal import Decimal
 
 from ..models import Products, Sell, SellProducts, Stock, Clients, RegistersellDetail
 from ..services.product_service import CreateProduct, UpdateProducts, DeleteProducts
-from ..services.sell_service import  RegisterSell
+from ..services.sell_service import RegisterSell, SalesAnalytics
+from ..services.stock_service import StockThresholds
+from ..services.affinity_service import ProductAffinityJob
+from ..services.analytics_service import SOURCES as SALES_INSIGHT_SOURCES, SalesInsights
+from ..constants import (
+    ANALYTICS_DEFAULT_DAYS,
+    ANALYTICS_MAX_DAYS,
+    FREQUENTLY_BOUGHT_LIMIT,
+)
 from .serializers import (
     ProductSerializer,
     ProductListSerializer,
@@ -29,8 +41,49 @@ from .serializers import (
     UserCreateSerializer,
     RegisterSellDetailSerializer,
 )
+from .pagination import KeysetPagination
 from .permissions import IsOwnerOrAdmin
-from .filters import ProductFilter, SellFilter, StockFilter, RegisterSellDetailFilter
+from .filters import (
+    FullTextSearchFilter,
+    ProductFilter,
+    SellFilter,
+    StockFilter,
+    RegisterSellDetailFilter,
+)
+
+
+def date_range_params(request):
+    """``start_date``/``end_date`` query params (YYYY-MM-DD), last ANALYTICS_DEFAULT_DAYS by default"""
+    end_date = timezone.localdate()
+    start_date = end_date - timedelta(days=ANALYTICS_DEFAULT_DAYS)
+
+    # Override with query parameters if provided
+    if "start_date" in request.query_params:
+        try:
+            start_date = datetime.strptime(
+                request.query_params["start_date"], "%Y-%m-%d"
+            ).date()
+        except ValueError:
+            pass
+
+    if "end_date" in request.query_params:
+        try:
+            end_date = datetime.strptime(
+                request.query_params["end_date"], "%Y-%m-%d"
+            ).date()
+        except ValueError:
+            pass
+
+    return start_date, end_date
+
+
+def date_range_error(start_date, end_date):
+    """Error message for an unusable range, ``None`` if it can be queried"""
+    if start_date > end_date:
+        return "start_date must be before end_date"
+    if (end_date - start_date).days >= ANALYTICS_MAX_DAYS:
+        return f"Date range cannot exceed {ANALYTICS_MAX_DAYS} days"
+    return None
 
 
 class UserViewSet(viewsets.ModelViewSet):
@@ -82,14 +135,25 @@ class ProductViewSet(viewsets.ModelViewSet):
     permission_classes = [IsAuthenticated]
     filter_backends = [
         DjangoFilterBackend,
-        filters.SearchFilter,
         filters.OrderingFilter,
+        FullTextSearchFilter,
     ]
     filterset_class = ProductFilter
     search_fields = ["name", "description"]
     ordering_fields = ["name", "price", "id"]
     ordering = ["name"]
 
+    def get_queryset(self):
+        """Products with their stock level and low-stock threshold (one query)"""
+        return (
+            super()
+            .get_queryset()
+            .annotate(
+                stock_quantity=Coalesce(Min("stock__quantitystock"), 0),
+                low_stock_threshold=StockThresholds.threshold(product_path=""),
+            )
+        )
+
     def get_serializer_class(self):
         """Return appropriate serializer based on action"""
         if self.action == "list":
@@ -126,61 +190,82 @@ class ProductViewSet(viewsets.ModelViewSet):
 
     @action(detail=False, methods=["get"])
     def low_stock(self, request):
-        """Get products with low stock"""
-        threshold = request.query_params.get("threshold", 10)
-        try:
-            threshold = int(threshold)
-        except ValueError:
-            threshold = 10
+        """
+        Get products with low stock
 
-        # Get products where stock is below threshold
-        low_stock_products = []
-        for product in self.get_queryset():
-            try:
-                stock = Stock.objects.get(name=product)
-                if stock.quantitystock <= threshold:
-                    low_stock_products.append(product)
-            except Stock.DoesNotExist:
-                low_stock_products.append(product)  # No stock record = low stock
+        Each product is compared with its own reorder point (nightly
+        forecast); ``?threshold=N`` applies one fixed threshold instead.
+        Products without a stock record count as low stock.
+        """
+        queryset = self.get_queryset()
+        try:
+            threshold = int(request.query_params["threshold"])
+            queryset = queryset.filter(stock_quantity__lte=threshold)
+        except (KeyError, ValueError):
+            queryset = queryset.filter(stock_quantity__lt=F("low_stock_threshold"))
 
-        serializer = ProductListSerializer(low_stock_products, many=True)
+        serializer = ProductListSerializer(
+            queryset.order_by("stock_quantity", "name"), many=True
+        )
         return Response(serializer.data)
 
     @action(detail=False, methods=["get"])
-    def out_of_stock(self):
-        """Get products that are out of stock"""
-        out_of_stock_products = []
-        for product in self.get_queryset():
-            try:
-                stock = Stock.objects.get(name=product)
-                if stock.quantitystock == 0:
-                    out_of_stock_products.append(product)
-            except Stock.DoesNotExist:
-                out_of_stock_products.append(product)
-
-        serializer = ProductListSerializer(out_of_stock_products, many=True)
+    def out_of_stock(self, request):
+        """Get products that are out of stock (or have no stock record)"""
+        queryset = self.get_queryset().filter(stock_quantity=0).order_by("name")
+        serializer = ProductListSerializer(queryset, many=True)
         return Response(serializer.data)
 
     @action(detail=True, methods=["get"])
-    def stock_history(self):
+    def stock_history(self, request, pk=None):
         """Get stock movement history for a product"""
         product = self.get_object()
         # This would require a StockMovement model to track history
-        # For now, return basic stock info
-        try:
-            stock = Stock.objects.get(name=product)
-            data = {
-                "current_stock": stock.quantitystock,
-                "min_stock": stock.min_stock,
-                "max_stock": stock.max_stock,
+        # For now, return the current stock and its low-stock threshold
+        return Response(
+            {
+                "current_stock": product.stock_quantity,
+                "low_stock_threshold": product.low_stock_threshold,
                 # Add movement history when StockMovement model is implemented
                 "movements": [],
             }
-            return Response(data)
-        except Stock.DoesNotExist:
-            return Response(
-                {"current_stock": 0, "min_stock": 0, "max_stock": 0, "movements": []}
-            )
+        )
+
+    @action(detail=True, methods=["get"])
+    def frequently_bought_with(self, request, pk=None):
+        """
+        Get products frequently bought together with this one
+
+        Answered from ``ProductAffinity`` (computed nightly from the sales
+        baskets) with a single indexed query; ``?limit=`` caps the rules.
+        """
+        if not str(pk).isdigit():
+            raise NotFound()
+        try:
+            limit = int(request.query_params.get("limit", FREQUENTLY_BOUGHT_LIMIT))
+        except ValueError:
+            limit = FREQUENTLY_BOUGHT_LIMIT
+        limit = max(1, min(limit, 50))
+
+        rules = ProductAffinityJob.frequently_bought_with(int(pk), limit)
+        return Response(
+            [
+                {
+                    "idproducts": rule.id_related_id,
+                    "name": rule.id_related.name,
+                    "price": (
+                        float(rule.id_related.price)
+                        if rule.id_related.price is not None
+                        else None
+                    ),
+                    "baskets": rule.baskets,
+                    "support": round(rule.support, 4),
+                    "confidence": round(rule.confidence, 4),
+                    "lift": round(rule.lift, 4),
+                }
+                for rule in rules
+            ]
+        )
 
 
 class StockViewSet(viewsets.ModelViewSet):
@@ -204,16 +289,26 @@ class StockViewSet(viewsets.ModelViewSet):
     ordering = ["id_products__name"]
 
     @action(detail=False, methods=["get"])
-    def summary(self):
-        """Get stock summary statistics"""
-        queryset = self.get_queryset()
-
-        total_products = queryset.count()
-        total_stock_value = sum(stock.quantity * stock.name.price for stock in queryset)
-        low_stock_count = sum(
-            1 for stock in queryset if stock.quantity <= stock.min_stock
+    def summary(self, request):
+        """Get stock summary statistics (one aggregate query)"""
+        totals = (
+            self.filter_queryset(self.get_queryset())
+            .order_by()
+            .aggregate(
+                total_products=Count("idstock"),
+                total_stock_value=Coalesce(
+                    Sum(F("quantitystock") * F("id_products__price")),
+                    Value(Decimal("0")),
+                    output_field=DecimalField(),
+                ),
+                low_stock_count=Count("idstock", filter=StockThresholds.low_stock_q()),
+                out_of_stock_count=Count("idstock", filter=Q(quantitystock=0)),
+            )
         )
-        out_of_stock_count = queryset.filter(quantity=0).count()
+        total_products = totals["total_products"]
+        total_stock_value = float(totals["total_stock_value"])
+        low_stock_count = totals["low_stock_count"]
+        out_of_stock_count = totals["out_of_stock_count"]
 
         data = {
             "total_products": total_products,
@@ -269,7 +364,8 @@ class ClientViewSet(viewsets.ModelViewSet):
     queryset = Clients.objects.all()
     serializer_class = ClientSerializer
     permission_classes = [IsAuthenticated]
-    filter_backends = [filters.SearchFilter, filters.OrderingFilter]
+    pagination_class = KeysetPagination
+    filter_backends = [filters.OrderingFilter, FullTextSearchFilter]
     search_fields = [
         "id",
         "name",
@@ -294,53 +390,31 @@ class ClientViewSet(viewsets.ModelViewSet):
     ordering = ["name"]
 
     @action(detail=True, methods=["get"])
-    def purchase_history(self):
-        """Get purchase history for a client"""
-        client = self.get_object()
-        sells = Sell.objects.filter(client=client).order_by("-created_at")
+    def purchase_history(self, request, pk=None):
+        """
+        Get purchase history for a client
 
-        serializer = SellSerializer(sells, many=True)
-        return Response(serializer.data)
+        Sales (``register_sells``) are not linked to clients yet, so the
+        history is empty until a client reference is stored with each sale.
+        """
+        self.get_object()
+        return Response([])
 
     @action(detail=True, methods=["get"])
-    def stats(self):
-        """Get statistics for a client"""
-        client = self.get_object()
-        sells = Sell.objects.filter(client=client)
-
-        total_purchases = sells.aggregate(
-            total_amount=Sum("total_price"),
-            total_orders=Count("id"),
-            avg_order=Avg("total_price"),
+    def stats(self, request, pk=None):
+        """Get statistics for a client (empty until sales reference clients)"""
+        self.get_object()
+        return Response(
+            {
+                "total_amount": 0,
+                "total_orders": 0,
+                "average_order_value": 0,
+                "top_products": [],
+                "first_purchase": None,
+                "last_purchase": None,
+            }
         )
 
-        # Most purchased products
-        top_products = (
-            SellProducts.objects.filter(sell__client=client)
-            .values("name__name")
-            .annotate(total_quantity=Sum("quantity"))
-            .order_by("-total_quantity")[:5]
-        )
-
-        data = {
-            "total_amount": total_purchases["total_amount"] or 0,
-            "total_orders": total_purchases["total_orders"] or 0,
-            "average_order_value": total_purchases["avg_order"] or 0,
-            "top_products": list(top_products),
-            "first_purchase": (
-                sells.order_by("created_at").first().created_at
-                if sells.exists()
-                else None
-            ),
-            "last_purchase": (
-                sells.order_by("-created_at").first().created_at
-                if sells.exists()
-                else None
-            ),
-        }
-
-        return Response(data)
-
 
 class SellViewSet(viewsets.ModelViewSet):
     """
@@ -352,6 +426,7 @@ class SellViewSet(viewsets.ModelViewSet):
     queryset = Sell.objects.all()
     serializer_class = SellSerializer
     permission_classes = [IsAuthenticated]
+    pagination_class = KeysetPagination
     filter_backends = [
         DjangoFilterBackend,
         filters.SearchFilter,
@@ -359,7 +434,7 @@ class SellViewSet(viewsets.ModelViewSet):
     ]
     filterset_class = SellFilter
     search_fields = ["idsell", "datesell", "totalsell", "id_product"]
-    ordering_fields = ["datesell", "total_price"]
+    ordering_fields = ["datesell", "totalsell"]
     ordering = ["datesell"]
 
     def get_serializer_class(self):
@@ -408,136 +483,61 @@ class SellViewSet(viewsets.ModelViewSet):
 
     @action(detail=False, methods=["get"])
     def analytics(self, request):
-        """Get sales analytics"""
-        # Date range
-        end_date = datetime.now().date()
-        start_date = end_date - timedelta(days=30)  # Last 30 days
-
-        # Override with query parameters if provided
-        if "start_date" in request.query_params:
-            try:
-                start_date = datetime.strptime(
-                    request.query_params["start_date"], "%Y-%m-%d"
-                ).date()
-            except ValueError:
-                pass
+        """
+        Get sales analytics for a date range
 
-        if "end_date" in request.query_params:
-            try:
-                end_date = datetime.strptime(
-                    request.query_params["end_date"], "%Y-%m-%d"
-                ).date()
-            except ValueError:
-                pass
+        Aggregates completed sale registers (``RegistersellDetail``) with one
+        grouped query per metric family, so any range is answered in a fixed
+        number of queries. Results are cached per (start_date, end_date);
+        ranges longer than ANALYTICS_MAX_DAYS are rejected with 400.
+        """
+        start_date, end_date = date_range_params(request)
+        error = date_range_error(start_date, end_date)
+        if error:
+            return Response({"error": error}, status=status.HTTP_400_BAD_REQUEST)
 
-        # Filter sales by date range
-        sells_queryset = self.get_queryset().filter(
-            created_at__date__gte=start_date, created_at__date__lte=end_date
-        )
-
-        # Basic metrics
-        metrics = sells_queryset.aggregate(
-            total_sales=Sum("total_price"),
-            total_orders=Count("id"),
-            avg_order_value=Avg("total_price"),
-        )
-
-        # Sales by payment method
-        payment_methods = sells_queryset.values("payment_method").annotate(
-            total=Sum("total_price"), count=Count("id")
-        )
-
-        # Top products
-        top_products_data = (
-            SellProducts.objects.filter(sell__in=sells_queryset)
-            .values("name")
-            .annotate(total_quantity=Sum("quantity"), total_revenue=Sum("quantity"))
-            .order_by("-total_quantity")[:10]
-        )
-
-        top_products = Products.objects.filter(
-            id__in=[item["name"] for item in top_products_data]
-        )
-
-        # Low stock products
-        low_stock_products = []
-        for product in Products.objects.all()[:10]:  # Limit for performance
-            try:
-                stock = Stock.objects.get(name=product)
-                if stock.quantitystock <= 10:  # Configurable threshold
-                    low_stock_products.append(product)
-            except Stock.DoesNotExist:
-                low_stock_products.append(product)
-
-        # Monthly sales (simplified)
-        monthly_sales = []
-        current_date = start_date
-        while current_date <= end_date:
-            month_sales = sells_queryset.filter(
-                created_at__year=current_date.year, created_at__month=current_date.month
-            ).aggregate(total=Sum("total_price"))
-
-            monthly_sales.append(
-                {
-                    "month": current_date.strftime("%Y-%m"),
-                    "total": month_sales["total"] or 0,
-                }
-            )
-
-            # Move to next month
-            if current_date.month == 12:
-                current_date = current_date.replace(year=current_date.year + 1, month=1)
-            else:
-                current_date = current_date.replace(month=current_date.month + 1)
-
-        data = {
-            "total_sales": metrics["total_sales"] or 0,
-            "total_orders": metrics["total_orders"] or 0,
-            "average_order_value": metrics["avg_order_value"] or 0,
-            "top_products": ProductListSerializer(top_products, many=True).data,
-            "sales_by_payment_method": {
-                item["payment_method"]: item["total"] for item in payment_methods
-            },
-            "monthly_sales": monthly_sales,
-            "low_stock_products": ProductListSerializer(
-                low_stock_products, many=True
-            ).data,
-        }
-
-        return Response(data)
+        return Response(SalesAnalytics.get_sales_analytics(start_date, end_date))
 
     @action(detail=False, methods=["get"])
-    def daily_summary(self):
-        """Get daily sales summary"""
-        today = datetime.now().date()
-
-        # Get today's sales
-        today_sales = self.get_queryset().filter(created_at__date=today)
-
-        summary = today_sales.aggregate(
-            total_sales=Sum("total_price"),
-            total_orders=Count("id"),
-            avg_order_value=Avg("total_price"),
-        )
-
-        # Sales by hour
-        hourly_sales = []
-        for hour in range(24):
-            hour_sales = today_sales.filter(created_at__hour=hour).aggregate(
-                total=Sum("total_price")
+    def insights(self, request):
+        """
+        Get vectorized sales metrics for a date range
+
+        Basket size distribution, revenue percentiles, weekday/hour heatmap,
+        employee performance and product velocity, computed with NumPy/pandas
+        over the range loaded once as columns. ``?source=parquet`` reads the
+        files written by ``export_sales_parquet`` instead of the database.
+        Results are cached per (start_date, end_date, source).
+        """
+        start_date, end_date = date_range_params(request)
+        error = date_range_error(start_date, end_date)
+        if error:
+            return Response({"error": error}, status=status.HTTP_400_BAD_REQUEST)
+        source = request.query_params.get("source", "db")
+        if source not in SALES_INSIGHT_SOURCES:
+            return Response(
+                {"error": f"source must be one of {', '.join(SALES_INSIGHT_SOURCES)}"},
+                status=status.HTTP_400_BAD_REQUEST,
             )
 
-            hourly_sales.append({"hour": hour, "total": hour_sales["total"] or 0})
+        return Response(SalesInsights.get_insights(start_date, end_date, source))
 
-        data = {
-            "date": today,
-            "total_sales": summary["total_sales"] or 0,
-            "total_orders": summary["total_orders"] or 0,
-            "average_order_value": summary["avg_order_value"] or 0,
-            "hourly_sales": hourly_sales,
-        }
+    @action(detail=False, methods=["get"])
+    def daily_summary(self, request):
+        """
+        Get daily sales summary with an hourly breakdown
+
+        Served from a per-day cache that is updated as each sale completes;
+        ``?date=YYYY-MM-DD`` selects another day (default today).
+        """
+        day = timezone.localdate()
+        if "date" in request.query_params:
+            try:
+                day = datetime.strptime(request.query_params["date"], "%Y-%m-%d").date()
+            except ValueError:
+                pass
 
-        return Response(data)
+        return Response(SalesAnalytics.get_daily_summary(day))
 
 
 # viewset RegisterSellDetailViewSet
@@ -549,6 +549,7 @@ class RegisterSellDetailViewset(viewsets.ModelViewSet):
     queryset = RegistersellDetail.objects.all().order_by("-date")
     serializer_class = RegisterSellDetailSerializer
     permission_classes = [IsAuthenticated]
+    pagination_class = KeysetPagination
     filter_backends = [
         DjangoFilterBackend,
         filters.SearchFilter,
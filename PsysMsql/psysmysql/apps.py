@@ -4,3 +4,6 @@ from django.apps import AppConfig
 class PsysmysqlConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'psysmysql'
+
+    def ready(self):
+        from . import signals  # noqa: F401
@@ -0,0 +1,40 @@
+"""
+Backend MySQL con pool de conexiones
+
+Igual que ``django.db.backends.mysql`` pero ``connect``/``close`` sacan y
+devuelven conexiones de un ``QueuePool`` del proceso en vez de abrir y
+cerrar un socket (TCP + autenticación + ``SET NAMES``) en cada petición o
+tarea. Las opciones del pool van en la clave ``POOL`` de la base de datos:
+
+    DATABASES["default"]["ENGINE"] = "psysmysql.backends.mysql_pool"
+    DATABASES["default"]["POOL"] = {"pool_size": 5, "max_overflow": 10}
+
+Con este backend ``CONN_MAX_AGE`` debe ser 0: Django "cierra" la conexión al
+terminar cada petición o tarea y el pool decide si la conserva.
+"""
+
+from functools import partial
+
+from django.db.backends.mysql import base as mysql
+from django.db.utils import DatabaseErrorWrapper
+
+from ...connection_pool import QueuePool, get_pool
+
+
+class DatabaseWrapper(mysql.DatabaseWrapper):
+    pool: QueuePool | None = None
+
+    def get_new_connection(self, conn_params):
+        self.pool = get_pool(
+            self.alias,
+            partial(super().get_new_connection, conn_params),
+            **self.settings_dict.get("POOL", {}),
+        )
+        return self.pool.connect()
+
+    def _close(self):
+        if self.connection is None or self.pool is None:
+            return super()._close()
+        # Lo mismo que ``self.wrap_database_errors`` (cached_property de Django)
+        with DatabaseErrorWrapper(self):
+            self.pool.release(self.connection)
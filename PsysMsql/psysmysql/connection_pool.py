@@ -0,0 +1,210 @@
+"""
+Pool de conexiones a la base de datos por proceso
+
+Un ``QueuePool`` al estilo de SQLAlchemy para mysqlclient: mantiene hasta
+``pool_size`` conexiones abiertas y reutilizables, permite ``max_overflow``
+conexiones adicionales en los picos (se cierran al devolverlas) y espera
+``timeout`` segundos por una conexión libre antes de fallar.
+
+Al sacar una conexión se descarta si superó ``recycle`` segundos de vida o
+si no responde al ping (``pre_ping``); al devolverla se hace ``rollback``
+para no filtrar una transacción abierta al siguiente uso.
+
+Lo usa el backend ``psysmysql.backends.mysql_pool`` (``PSYS_DB_POOL=1``,
+pensado para los workers de Celery). Cada proceso tiene sus propios pools:
+tras un ``fork`` los sockets heredados se descartan sin cerrarlos.
+
+Usage:
+    pool = get_pool("default", lambda: MySQLdb.connect(**params), pool_size=5)
+    connection = pool.connect()
+    ...
+    pool.release(connection)
+"""
+
+import os
+import queue
+import threading
+import time
+
+from .logging_config import get_db_logger
+
+logger = get_db_logger()
+
+# Pools del proceso por alias de base de datos
+_pools = {}
+_pools_lock = threading.Lock()
+
+
+class PoolTimeout(Exception):
+    """No hubo una conexión libre dentro del tiempo de espera"""
+
+
+def ping(connection):
+    """Ping de mysqlclient sin reconexión automática"""
+    connection.ping()
+
+
+class QueuePool:
+    def __init__(
+        self,
+        creator,
+        pool_size=5,
+        max_overflow=10,
+        timeout=30,
+        recycle=3600,
+        pre_ping=True,
+        ping=ping,
+    ):
+        self.creator = creator
+        self.pool_size = pool_size
+        self.max_overflow = max_overflow
+        self.timeout = timeout
+        self.recycle = recycle
+        self.pre_ping = pre_ping
+        self.ping = ping
+        self.pid = os.getpid()
+        # LIFO: las conexiones más recientes siguen calientes y las demás caducan
+        self.idle = queue.LifoQueue(maxsize=pool_size)
+        self.created_at = {}
+        self.pending = 0
+        self.lock = threading.Lock()
+        self.stats = {"created": 0, "reused": 0, "discarded": 0, "timeouts": 0}
+
+    @property
+    def size(self):
+        """Conexiones abiertas (libres y en uso)"""
+        return len(self.created_at)
+
+    def status(self):
+        return {
+            "size": self.size,
+            "idle": self.idle.qsize(),
+            "checked_out": self.size - self.idle.qsize(),
+            **self.stats,
+        }
+
+    def connect(self):
+        """Saca una conexión libre, o abre una nueva si hay cupo"""
+        deadline = time.monotonic() + self.timeout
+        while True:
+            try:
+                connection = self.idle.get_nowait()
+            except queue.Empty:
+                connection = self.create()
+                if connection is not None:
+                    return connection
+                connection = self.wait(deadline)
+            if self.usable(connection):
+                self.stats["reused"] += 1
+                return connection
+            self.discard(connection)
+
+    def create(self):
+        with self.lock:
+            if self.size + self.pending >= self.pool_size + self.max_overflow:
+                return None
+            # Reservar el cupo y conectar fuera del lock
+            self.pending += 1
+        try:
+            connection = self.creator()
+        finally:
+            with self.lock:
+                self.pending -= 1
+        with self.lock:
+            self.created_at[id(connection)] = time.monotonic()
+            self.stats["created"] += 1
+        return connection
+
+    def wait(self, deadline):
+        remaining = deadline - time.monotonic()
+        try:
+            return self.idle.get(timeout=max(remaining, 0))
+        except queue.Empty:
+            self.stats["timeouts"] += 1
+            raise PoolTimeout(
+                f"Sin conexiones libres tras {self.timeout}s "
+                f"(pool_size={self.pool_size}, max_overflow={self.max_overflow})"
+            )
+
+    def usable(self, connection):
+        created_at = self.created_at.get(id(connection))
+        if created_at is None:
+            return False
+        if self.recycle is not None and time.monotonic() - created_at > self.recycle:
+            return False
+        if self.pre_ping:
+            try:
+                self.ping(connection)
+            except Exception:
+                logger.warning("Conexión del pool sin respuesta, se descarta")
+                return False
+        return True
+
+    def release(self, connection):
+        """Devuelve la conexión al pool (o la cierra si sobra o quedó rota)"""
+        if id(connection) not in self.created_at:
+            self.close(connection)
+            return
+        try:
+            connection.rollback()
+        except Exception:
+            self.discard(connection)
+            return
+        try:
+            self.idle.put_nowait(connection)
+        except queue.Full:
+            # Conexión de overflow
+            self.discard(connection)
+
+    def discard(self, connection):
+        with self.lock:
+            self.created_at.pop(id(connection), None)
+            self.stats["discarded"] += 1
+        self.close(connection)
+
+    @staticmethod
+    def close(connection):
+        try:
+            connection.close()
+        except Exception:
+            pass
+
+    def dispose(self, close=True):
+        """
+        Vacía el pool
+
+        Con ``close=False`` (tras un fork) las conexiones heredadas se
+        olvidan sin cerrarlas, ya que el socket es del proceso padre.
+        """
+        while True:
+            try:
+                connection = self.idle.get_nowait()
+            except queue.Empty:
+                break
+            if close:
+                self.close(connection)
+        with self.lock:
+            self.created_at.clear()
+
+
+def get_pool(alias, creator, **options):
+    """Pool del proceso para ``alias`` (se crea en el primer uso)"""
+    pid = os.getpid()
+    with _pools_lock:
+        pool = _pools.get(alias)
+        if pool is not None and pool.pid != pid:
+            pool.dispose(close=False)
+            pool = None
+        if pool is None:
+            pool = QueuePool(creator, **options)
+            _pools[alias] = pool
+            logger.info(f"Pool de conexiones '{alias}' creado: {options}")
+        return pool
+
+
+def dispose_pools(close=True):
+    """Vacía todos los pools del proceso (p. ej. al iniciar un worker hijo)"""
+    with _pools_lock:
+        for pool in _pools.values():
+            pool.dispose(close=close)
+        _pools.clear()
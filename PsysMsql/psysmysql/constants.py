@@ -46,17 +46,86 @@ ERROR_URL = "error"
 CACHE_KEY_ALL_PRODUCTS = "all_products"
 CACHE_KEY_STOCK_LIST = "stock_list"
 CACHE_KEY_USER_GROUPS = "user_groups_{}"
+CACHE_KEY_SALES_ANALYTICS = "sales_analytics_{}_{}"
+CACHE_KEY_DAILY_SUMMARY = "daily_summary_{}_{}"
+CACHE_KEY_DAILY_SUMMARY_GENERATION = "daily_summary_generation_{}"
+CACHE_KEY_DASHBOARD = "dashboard_{}"
+CACHE_KEY_TYPEAHEAD_VERSION = "typeahead_version"
+CACHE_KEY_CLIENTS_COUNT = "clients_count"
+CACHE_KEY_SALES_ARCHIVE = "sales_archive_boundary"
+CACHE_KEY_SALES_INSIGHTS = "sales_insights_{}_{}_{}"
 
 # Cache timeout (en segundos)
 CACHE_TIMEOUT_FLASH = 0.60
+CACHE_TIMEOUT_MINUTE = 60
 CACHE_TIMEOUT_SHORT = 60 * 5  # 5 minutos
 CACHE_TIMEOUT_MEDIUM = 60 * 15  # 15 minutos
 CACHE_TIMEOUT_LONG = 60 * 60  # 1 hora
 
+# Inventario
+LOW_STOCK_THRESHOLD = 10  # Umbral de los productos sin pronóstico (StockForecast)
+
+# Pronóstico de demanda y punto de reorden
+FORECAST_HISTORY_DAYS = 90  # Días de rollups por producto
+FORECAST_ALPHA = 0.2  # Suavizado exponencial: peso del último día
+FORECAST_LEAD_TIME_DAYS = 3  # Días entre el pedido y la llegada del inventario
+FORECAST_SERVICE_Z = 1.65  # Stock de seguridad para ~95% de nivel de servicio
+
+# Analítica de ventas
+ANALYTICS_DEFAULT_DAYS = 30
+ANALYTICS_MAX_DAYS = 366  # Rango máximo (días, inclusive) por consulta
+TOP_PRODUCTS_LIMIT = 10
+BASKET_SIZE_CAP = 20  # Canastas con más unidades se agrupan en "20+"
+REVENUE_PERCENTILES = (10, 25, 50, 75, 90, 95, 99)
+PRODUCT_VELOCITY_LIMIT = 20
+
+# Afinidad de productos (análisis de canasta)
+AFFINITY_WINDOW_DAYS = 90  # Ventana deslizante de canastas
+AFFINITY_MIN_BASKETS = 2  # Pares con menos canastas juntas se descartan
+AFFINITY_RULES_PER_PRODUCT = 20  # Reglas guardadas por producto
+FREQUENTLY_BOUGHT_LIMIT = 10
+
+# Archivado y particiones de register_sells
+ARCHIVE_AFTER_MONTHS = 12  # Ventas más antiguas pasan a register_sells_archive
+ARCHIVE_BATCH_SIZE = 1000
+PARTITION_MONTHS_AHEAD = 3  # Particiones mensuales creadas por adelantado
+
+# Exportación de ventas a Parquet
+SALES_EXPORT_CHUNK_SIZE = 5000  # Ventas por lote (una consulta por lote)
+SALES_EXPORT_SETTLE_MINUTES = 10  # Ventas más recientes esperan a la siguiente exportación
+
+# Autocompletado de productos
+TYPEAHEAD_MIN_QUERY = 2  # Caracteres mínimos antes de buscar
+TYPEAHEAD_LIMIT = 10
+
+# Búsqueda de clientes en caja
+CLIENT_LOOKUP_LIMIT = 20
+
+# Búsqueda de texto completo (innodb_ft_min_token_size)
+FULLTEXT_MIN_TERM_LENGTH = 3
+
+# Feed en vivo del dashboard (SSE)
+LIVE_FEED_CHANNEL = "psysmysql:sales"
+LIVE_FEED_HEARTBEAT = 15  # Segundos entre comentarios keep-alive
+LIVE_FEED_QUEUE_SIZE = 100  # Eventos pendientes por cliente antes de descartar
+LIVE_FEED_RECONNECT_MAX = 30  # Segundos máximos entre reintentos de suscripción
+
 # Paginación
 PRODUCTS_PER_PAGE = 25
 SELLS_PER_PAGE = 20
 STOCK_PER_PAGE = 30
+CLIENTS_PER_PAGE = 50
+
+# Presupuesto de consultas por request
+QUERY_COUNT_WARNING_THRESHOLD = 50
+
+# Réplica de lectura
+REPLICA_READ_PATHS = ("/api/",)  # GET/HEAD/OPTIONS con estos prefijos leen de la réplica
+REPLICA_STICKY_COOKIE = "psys_primary"
+REPLICA_STICKY_SECONDS = 10  # Lecturas en la primaria tras escribir (retraso de la réplica); no cubre Celery ni el admin
+
+# Métricas de rendimiento
+METRICS_SUMMARY_INTERVAL = 60 * 5  # Resumen en el log cada 5 minutos
 
 # Facturación
 HEADER = "Factura fisca/Psys"
@@ -0,0 +1,125 @@
+"""
+Enrutamiento de lecturas a la réplica de MySQL
+
+Las escrituras siempre van a ``default`` (la primaria del checkout). Las
+lecturas van a ``settings.DATABASE_REPLICA_ALIAS`` solo dentro de un ámbito
+de réplica:
+
+- peticiones GET/HEAD/OPTIONS a la API (``ReplicaRoutingMiddleware``)
+- servicios de reportes decorados con ``@read_from_replica()``
+
+Tras la primera escritura de una petición el resto de sus lecturas vuelven a
+la primaria, y la cookie ``REPLICA_STICKY_COOKIE`` mantiene a ese usuario en
+la primaria ``REPLICA_STICKY_SECONDS`` más, para que un cajero vea su propia
+venta aunque la réplica vaya con retraso.
+
+La cookie solo cubre al navegador que escribió, y solo si la réplica se
+pone al día en menos de ``REPLICA_STICKY_SECONDS``. Las escrituras de tareas
+de Celery (rollups, pronósticos, afinidad, archivado) no tienen petición ni
+cookie, y las del admin solo fijan la primaria para ese usuario: el resto de
+lecturas de la API pueden ver esos datos con el retraso de la réplica.
+
+Sin ``DATABASE_REPLICA_ALIAS`` configurado el router no cambia nada.
+
+Usage:
+    class GetStatistic:
+        @staticmethod
+        @read_from_replica()
+        def total_money_sell():
+            ...
+"""
+
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS
+
+
+class RoutingState:
+    """Estado de enrutamiento de la petición o tarea en curso"""
+
+    __slots__ = ("use_replica", "pinned", "wrote")
+
+    def __init__(self, use_replica=False, pinned=False):
+        self.use_replica = use_replica
+        # Escritura reciente (cookie de la sesión): lecturas en la primaria
+        self.pinned = pinned
+        # Escritura en este ámbito: las lecturas siguientes van a la primaria
+        self.wrote = False
+
+    @property
+    def primary_only(self):
+        return self.pinned or self.wrote
+
+
+# Un objeto mutable por ámbito: sync_to_async copia el contexto pero el
+# estado se comparte, así una escritura en el hilo fija la primaria también
+# para el resto de la petición
+routing_state: ContextVar[RoutingState | None] = ContextVar(
+    "db_routing_state", default=None
+)
+
+
+def replica_alias():
+    return getattr(settings, "DATABASE_REPLICA_ALIAS", None)
+
+
+@contextmanager
+def routing_scope(use_replica=False, pinned=False):
+    """Ámbito de enrutamiento nuevo (una petición, una tarea)"""
+    state = RoutingState(use_replica, pinned)
+    token = routing_state.set(state)
+    try:
+        yield state
+    finally:
+        routing_state.reset(token)
+
+
+@contextmanager
+def read_from_replica():
+    """Lecturas de reportes desde la réplica (salvo que la petición ya escribió)"""
+    state = routing_state.get()
+    if state is None:
+        with routing_scope(use_replica=True) as state:
+            yield state
+        return
+
+    previous = state.use_replica
+    state.use_replica = True
+    try:
+        yield state
+    finally:
+        state.use_replica = previous
+
+
+class ReplicaRouter:
+    def db_for_read(self, model, **hints):
+        alias = replica_alias()
+        state = routing_state.get()
+        if not alias or state is None:
+            return None
+        if state.primary_only:
+            return DEFAULT_DB_ALIAS
+        if state.use_replica:
+            return alias
+        return None
+
+    def db_for_write(self, model, **hints):
+        state = routing_state.get()
+        if state is not None:
+            state.wrote = True
+        # Explícito: un objeto leído de la réplica se guarda en la primaria
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        databases = {DEFAULT_DB_ALIAS, replica_alias()}
+        if obj1._state.db in databases and obj2._state.db in databases:
+            return True
+        return None
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        # El esquema llega a la réplica por replicación
+        if replica_alias() and db == replica_alias():
+            return False
+        return None
@@ -0,0 +1,178 @@
+"""
+Feed en vivo de ventas para el dashboard (Server-Sent Events)
+
+Al completar una venta se publica un delta de KPIs en un canal de Redis
+pub/sub. Cada proceso ASGI mantiene una sola suscripción a ese canal y
+reparte los mensajes a las colas de los clientes SSE conectados, así el
+número de conexiones a Redis y de consultas no crece con los dashboards
+abiertos.
+
+Usage:
+    transaction.on_commit(lambda: publish_sale(register))
+
+    async for event in sales_events():
+        yield event
+"""
+
+import asyncio
+import json
+from concurrent.futures import ThreadPoolExecutor
+
+import redis
+import redis.asyncio as aioredis
+from django.conf import settings
+from django.utils import timezone
+
+from .constants import (
+    LIVE_FEED_CHANNEL,
+    LIVE_FEED_HEARTBEAT,
+    LIVE_FEED_QUEUE_SIZE,
+    LIVE_FEED_RECONNECT_MAX,
+)
+from .logging_config import get_logger
+
+logger = get_logger("live_feed")
+
+_publisher = None
+# Un solo hilo: las ventas se publican en orden y la caja no espera a Redis
+_publish_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="live_feed")
+
+
+def get_publisher():
+    global _publisher
+    if _publisher is None:
+        _publisher = redis.Redis.from_url(
+            settings.LIVE_FEED_REDIS_URL, socket_connect_timeout=1, socket_timeout=1
+        )
+    return _publisher
+
+
+def sale_delta(register, lines=()):
+    """Delta de KPIs y actividad que produce una venta"""
+    sold_at = timezone.localtime(register.date)
+    total = float(register.total_sell)
+    return {
+        "id": register.idsell,
+        "date": sold_at.date().isoformat(),
+        "hour": sold_at.hour,
+        "kpis": {
+            "total_sales": 1,
+            "total_revenue": total,
+            "units": sum(int(line.get("quantity", 0)) for line in lines),
+        },
+        "type_pay": register.type_pay,
+        "activity": {
+            "type": "sale",
+            "id": register.idsell,
+            "description": (
+                f"Venta #{register.idsell} por {register.id_employed} "
+                f"({register.type_pay}, {register.state_sell})"
+            ),
+            "amount": total,
+            "timestamp": sold_at.strftime("%Y-%m-%d %H:%M"),
+        },
+    }
+
+
+def publish(sell_id, data):
+    try:
+        get_publisher().publish(LIVE_FEED_CHANNEL, data)
+    except redis.RedisError as e:
+        logger.warning(f"No se pudo publicar la venta {sell_id}: {e}")
+
+
+def publish_sale(register, lines=()):
+    """
+    Publica la venta en segundo plano; un Redis caído o lento no debe
+    afectar el registro de ventas. Devuelve el ``Future`` de la publicación.
+    """
+    data = json.dumps(sale_delta(register, lines))
+    return _publish_executor.submit(publish, register.idsell, data)
+
+
+def format_event(data, event=None):
+    """Mensaje en formato text/event-stream"""
+    lines = [f"event: {event}"] if event else []
+    lines.extend(f"data: {line}" for line in data.splitlines() or [""])
+    return "\n".join(lines) + "\n\n"
+
+
+class SalesBroadcaster:
+    """Una suscripción a Redis por event loop, repartida a N colas de clientes"""
+
+    def __init__(self, channel=LIVE_FEED_CHANNEL):
+        self.channel = channel
+        self.queues = set()
+        self.task = None
+        self.loop = None
+
+    def add_queue(self):
+        queue = asyncio.Queue(maxsize=LIVE_FEED_QUEUE_SIZE)
+        self.queues.add(queue)
+        loop = asyncio.get_running_loop()
+        if self.task is None or self.task.done() or self.loop is not loop:
+            self.loop = loop
+            self.task = loop.create_task(self.listen())
+        return queue
+
+    def remove_queue(self, queue):
+        self.queues.discard(queue)
+        if not self.queues and self.task is not None:
+            self.task.cancel()
+            self.task = None
+
+    def dispatch(self, data):
+        for queue in list(self.queues):
+            try:
+                queue.put_nowait(data)
+            except asyncio.QueueFull:
+                # Cliente lento: se descarta el delta, el refresco periódico resincroniza
+                logger.debug("Cola SSE llena, delta descartado")
+
+    async def listen(self):
+        delay = 1
+        while self.queues:
+            client = aioredis.from_url(settings.LIVE_FEED_REDIS_URL)
+            pubsub = client.pubsub()
+            try:
+                await pubsub.subscribe(self.channel)
+                async for message in pubsub.listen():
+                    if message["type"] == "message":
+                        delay = 1
+                        data = message["data"]
+                        self.dispatch(data.decode() if isinstance(data, bytes) else data)
+                logger.warning("Suscripción al feed de ventas cerrada por Redis")
+            except redis.RedisError as e:
+                logger.warning(f"Suscripción al feed de ventas interrumpida: {e}")
+            finally:
+                await pubsub.aclose()
+                await client.aclose()
+            # Espera creciente entre reintentos, también si la suscripción
+            # terminó sin error
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, LIVE_FEED_RECONNECT_MAX)
+
+
+broadcaster = SalesBroadcaster()
+
+
+async def sales_events(snapshot=None, heartbeat=LIVE_FEED_HEARTBEAT):
+    """
+    Eventos SSE para un cliente: snapshot inicial, un evento ``sale`` por
+    venta y comentarios keep-alive mientras no haya ventas.
+    """
+    queue = broadcaster.add_queue()
+    try:
+        # Indica al navegador cuánto esperar antes de reconectar
+        yield "retry: 5000\n\n"
+        if snapshot is not None:
+            yield format_event(json.dumps(snapshot), "snapshot")
+        while True:
+            try:
+                data = await asyncio.wait_for(queue.get(), timeout=heartbeat)
+            except asyncio.TimeoutError:
+                yield ": keep-alive\n\n"
+                continue
+            yield format_event(data, "sale")
+    finally:
+        broadcaster.remove_queue(queue)
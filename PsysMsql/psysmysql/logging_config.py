@@ -1,7 +1,102 @@
+import atexit
+import copy
+import json
 import logging
 import os
-from datetime import datetime
+import random
+from contextvars import ContextVar
+from datetime import datetime, timezone
+from functools import wraps
+from logging.handlers import (
+    QueueHandler,
+    QueueListener,
+    RotatingFileHandler,
+    TimedRotatingFileHandler,
+)
+from queue import Queue
 import time
+import weakref
+
+from . import metrics
+
+
+LOG_FORMAT = "%(asctime)s - %(name)s - %(levelname)s - [%(request_id)s] - %(message)s"
+LOG_DEFAULTS = {"request_id": "-"}
+
+# Id de correlación del request (o tarea Celery) en curso
+request_id_var: ContextVar[str | None] = ContextVar("request_id", default=None)
+
+# Atributos estándar de LogRecord: el resto son campos ``extra``
+RESERVED_RECORD_ATTRS = set(
+    logging.LogRecord("", 0, "", 0, "", None, None).__dict__
+) | {"message", "asctime", "request_id"}
+
+
+class RequestIdFilter(logging.Filter):
+    """
+    Agrega ``record.request_id`` desde el contexto del request.
+
+    Debe ir en el handler que encola (se ejecuta en el hilo del request, no en
+    el del listener).
+    """
+
+    def filter(self, record):
+        record.request_id = request_id_var.get() or "-"
+        return True
+
+
+class SamplingFilter(logging.Filter):
+    """
+    Muestreo de records DEBUG/INFO por logger
+
+    ``rates`` asocia prefijos de logger con la fracción de records que se
+    conservan (se usa el prefijo más específico). WARNING y superiores nunca
+    se descartan.
+
+        SamplingFilter(rates={"psysmysql.sells": 0.1, "psysmysql.products": 0.25})
+    """
+
+    def __init__(self, rates=None):
+        super().__init__()
+        self.rates = sorted(
+            (rates or {}).items(), key=lambda item: len(item[0]), reverse=True
+        )
+
+    def rate_for(self, logger_name):
+        for prefix, rate in self.rates:
+            if logger_name == prefix or logger_name.startswith(f"{prefix}."):
+                return rate
+        return 1.0
+
+    def filter(self, record):
+        if record.levelno >= logging.WARNING:
+            return True
+        rate = self.rate_for(record.name)
+        return rate >= 1.0 or random.random() < rate
+
+
+class JsonFormatter(logging.Formatter):
+    """Una línea JSON por record, con el id de correlación y los campos extra"""
+
+    def format(self, record):
+        data = {
+            "timestamp": datetime.fromtimestamp(record.created, timezone.utc).isoformat(),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+            "request_id": getattr(record, "request_id", "-"),
+            "module": record.module,
+            "function": record.funcName,
+            "line": record.lineno,
+        }
+        for key, value in record.__dict__.items():
+            if key not in RESERVED_RECORD_ATTRS and key not in data:
+                data[key] = value
+        if record.exc_info:
+            data["exception"] = self.formatException(record.exc_info)
+        elif record.exc_text:
+            data["exception"] = record.exc_text
+        return json.dumps(data, default=str, ensure_ascii=False)
 
 
 class ColoredFormatter(logging.Formatter):
@@ -16,49 +111,134 @@ class ColoredFormatter(logging.Formatter):
     }
 
     def format(self, record):
-        # Agregar colores si es terminal
-        if hasattr(record, "levelname"):
-            color = self.COLORS.get(record.levelname, self.COLORS["ENDC"])
-            record.levelname = f"{color}{record.levelname}{self.COLORS['ENDC']}"
+        # Copia: el mismo record lo formatea también el handler de archivo
+        record = copy.copy(record)
+        color = self.COLORS.get(record.levelname, self.COLORS["ENDC"])
+        record.levelname = f"{color}{record.levelname}{self.COLORS['ENDC']}"
 
         return super().format(record)
 
 
-def setup_logging():
+class QueueListenerHandler(QueueHandler):
     """
-    Configura el sistema de logging para el proyecto
+    Handler no bloqueante para los hilos de request
+
+    El hilo que registra solo encola el record; un ``QueueListener`` en segundo
+    plano le da formato y lo escribe en el archivo (con rotación por tamaño o
+    por tiempo) y, opcionalmente, en consola. Con ``json_format`` el archivo se
+    escribe en líneas JSON (``JsonFormatter``). Se configura desde
+    ``settings.LOGGING``:
+
+        "handlers": {
+            "async": {
+                "()": "psysmysql.logging_config.QueueListenerHandler",
+                "filename": BASE_DIR / "logs" / "psysmysql.log",
+                "rotation": "time",
+            },
+        }
     """
-    # Crear directorio de logs si no existe
-    log_dir = os.path.join(os.path.dirname(__file__), "..", "logs")
-    os.makedirs(log_dir, exist_ok=True)
-
-    # Configuración básica
-    logging.basicConfig(
-        level=logging.INFO,
-        format="%(asctime)s - %(name)s - %(levelname)s - %(message)s",
-        handlers=[
-            # Handler para archivo
-            logging.FileHandler(
-                os.path.join(
-                    log_dir, f'psysmysql_{datetime.now().strftime("%Y%m%d")}.log'
-                )
-            ),
-            # Handler para consola con colores
-            logging.StreamHandler(),
-        ],
-    )
 
-    # Configurar handler de consola con colores
-    console_handler = logging.StreamHandler()
-    console_handler.setFormatter(
-        ColoredFormatter("%(asctime)s - %(name)s - %(levelname)s - %(message)s")
-    )
+    def __init__(
+        self,
+        filename,
+        rotation="time",
+        when="midnight",
+        max_bytes=10 * 1024 * 1024,
+        backup_count=14,
+        console=True,
+        fmt=LOG_FORMAT,
+        json_format=False,
+    ):
+        os.makedirs(os.path.dirname(os.path.abspath(filename)), exist_ok=True)
+
+        if rotation == "size":
+            file_handler = RotatingFileHandler(
+                filename,
+                maxBytes=max_bytes,
+                backupCount=backup_count,
+                encoding="utf-8",
+                delay=True,
+            )
+        elif rotation == "time":
+            file_handler = TimedRotatingFileHandler(
+                filename,
+                when=when,
+                backupCount=backup_count,
+                encoding="utf-8",
+                delay=True,
+            )
+        else:
+            raise ValueError("Rotación inválida. Use 'size' o 'time'")
+        if json_format:
+            file_handler.setFormatter(JsonFormatter())
+        else:
+            file_handler.setFormatter(logging.Formatter(fmt, defaults=LOG_DEFAULTS))
+        self.target_handlers: list[logging.Handler] = [file_handler]
+
+        if console:
+            console_handler = logging.StreamHandler()
+            if console_handler.stream.isatty():
+                console_handler.setFormatter(ColoredFormatter(fmt, defaults=LOG_DEFAULTS))
+            else:
+                console_handler.setFormatter(logging.Formatter(fmt, defaults=LOG_DEFAULTS))
+            self.target_handlers.append(console_handler)
+
+        self.listener = None
+        super().__init__(Queue(-1))
+        self.start_listener()
+        listener_handlers.add(self)
+
+    def start_listener(self):
+        self.listener = QueueListener(
+            self.queue, *self.target_handlers, respect_handler_level=True
+        )
+        self.listener.start()
+
+    def restart_listener(self):
+        self.queue = Queue(-1)
+        self.start_listener()
+
+    def stop_listener(self):
+        listener_handlers.discard(self)
+        if self.listener is not None and self.listener._thread is not None:
+            self.listener.stop()
+        for handler in self.target_handlers:
+            handler.close()
+
+    def prepare(self, record):
+        # Solo se resuelven los argumentos del mensaje; el formato completo
+        # (fecha, traceback) y la escritura se hacen en el hilo del listener
+        record = copy.copy(record)
+        record.msg = record.getMessage()
+        record.args = None
+        return record
+
+    def flush(self):
+        """Espera a que el listener procese los records encolados"""
+        if self.listener is not None and self.listener._thread is not None:
+            self.queue.join()
+        for handler in self.target_handlers:
+            handler.flush()
+
+
+# Handlers con listener activo. Los hooks de fork y salida se registran una
+# sola vez para todos: reconfigurar el logging no los acumula
+listener_handlers: "weakref.WeakSet[QueueListenerHandler]" = weakref.WeakSet()
+
+
+def restart_listeners():
+    # El hilo del listener no sobrevive a fork (workers de Celery/gunicorn)
+    for handler in list(listener_handlers):
+        handler.restart_listener()
+
 
-    # Logger principal
-    logger = logging.getLogger("psysmysql")
-    logger.setLevel(logging.DEBUG)
+def stop_listeners():
+    for handler in list(listener_handlers):
+        handler.stop_listener()
 
-    return logger
+
+os.register_at_fork(after_in_child=restart_listeners)
+atexit.register(stop_listeners)
 
 
 def get_logger(name):
@@ -141,29 +321,31 @@ def log_function_call(logger=None):
 
 
 # Decorator para timing de funciones
-def log_execution_time(logger=None):
+def log_execution_time(logger=None, metric_name=None):
     """
     Decorator para medir tiempo de ejecución
+
+    La duración se registra en los histogramas de ``psysmysql.metrics`` sin
+    escribir en el log; solo los errores se registran en el logger.
     """
-    import time
 
     def decorator(func):
-        def wrapper(*args, **kwargs):
-            func_logger = logger or get_logger("performance")
-            func_name = f"{func.__module__}.{func.__name__}"
+        name = metric_name or f"{func.__module__}.{func.__qualname__}"
 
-            start_time = time.time()
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            start_ns = time.perf_counter_ns()
             try:
                 result = func(*args, **kwargs)
-                execution_time = time.time() - start_time
-                func_logger.info(f"{func_name} ejecutado en {execution_time:.3f}s")
-                return result
             except Exception as e:
-                execution_time = time.time() - start_time
-                func_logger.error(
-                    f"{func_name} falló después de {execution_time:.3f}s: {str(e)}"
+                duration_ns = time.perf_counter_ns() - start_ns
+                metrics.registry.observe(name, duration_ns, error=True)
+                (logger or get_logger("performance")).error(
+                    f"{name} falló después de {duration_ns / 1e9:.3f}s: {str(e)}"
                 )
                 raise
+            metrics.registry.observe(name, time.perf_counter_ns() - start_ns)
+            return result
 
         return wrapper
 
@@ -172,30 +354,31 @@ def log_execution_time(logger=None):
 
 # Context manager para logging de operaciones
 class LogOperation:
+    """
+    Mide la duración de un bloque y la registra en ``psysmysql.metrics``.
 
-    def __init__(self, operation_name, logger=None):
+    ``operation_name`` solo se usa en el mensaje de error; el histograma se
+    agrupa por ``metric_name`` (por defecto, el nombre del logger) para no
+    crear una serie por cada valor interpolado.
+    """
+
+    def __init__(self, operation_name, logger=None, metric_name=None):
         self.operation_name = operation_name
         self.logger = logger or get_logger("operations")
-        self.start_time: float
+        self.metric_name = metric_name or self.logger.name
+        self.start_ns: int
 
     def __enter__(self):
-
-        self.start_time = time.time()
-        self.logger.info(f"Iniciando: {self.operation_name}")
+        self.start_ns = time.perf_counter_ns()
         return self
 
     def __exit__(self, exc_type, exc_val, exc_tb):
-
-        duration = self.start_time - time.time()
-        if exc_type is None:
-            self.logger.info(f"Completado: {self.operation_name} ({duration:.3f}s)")
-        else:
+        duration_ns = time.perf_counter_ns() - self.start_ns
+        metrics.registry.observe(self.metric_name, duration_ns, exc_type is not None)
+        if exc_type is not None:
             self.logger.error(
-                f"Error en: {self.operation_name} ({duration:.3f}s): {str(exc_val)}"
+                f"Error en: {self.operation_name} ({duration_ns / 1e9:.3f}s): {str(exc_val)}"
             )
 
         return False  # No suprimir excepciones
 
-
-# Inicializar logging
-setup_logging()
@@ -0,0 +1,36 @@
+"""
+Mueve las ventas antiguas de register_sells a register_sells_archive.
+
+Los rollups diarios no se tocan: los reportes históricos siguen completos.
+
+Uso:
+    python manage.py archive_sales
+    python manage.py archive_sales --months 18 --batch-size 500
+"""
+
+from django.core.management.base import BaseCommand, CommandError
+
+from ...constants import ARCHIVE_AFTER_MONTHS, ARCHIVE_BATCH_SIZE
+from ...services.archive_service import SalesArchive
+
+
+class Command(BaseCommand):
+    help = "Archiva las ventas con más de N meses y elimina sus particiones"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--months", type=int, default=ARCHIVE_AFTER_MONTHS)
+        parser.add_argument("--batch-size", type=int, default=ARCHIVE_BATCH_SIZE)
+
+    def handle(self, *args, **options):
+        if options["months"] < ARCHIVE_AFTER_MONTHS:
+            raise CommandError(f"--months debe ser al menos {ARCHIVE_AFTER_MONTHS}")
+        if options["batch_size"] < 1:
+            raise CommandError("--batch-size debe ser al menos 1")
+
+        cutoff = SalesArchive.cutoff(options["months"])
+        moved = SalesArchive.archive(options["months"], options["batch_size"])
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Ventas archivadas (anteriores a {cutoff:%Y-%m-%d}): {moved}"
+            )
+        )
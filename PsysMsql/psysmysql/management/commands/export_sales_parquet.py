@@ -0,0 +1,43 @@
+"""
+Exporta el historial de ventas a archivos Parquet particionados por fecha.
+
+Por defecto es incremental: solo exporta las ventas posteriores a la última
+exportación (marca de agua en <destino>/_export_state.json). Las ventas de
+los últimos minutos (SALES_EXPORT_SETTLE_MINUTES) esperan a la siguiente.
+
+Uso:
+    python manage.py export_sales_parquet
+    python manage.py export_sales_parquet --output /data/ventas --chunk-size 10000
+    python manage.py export_sales_parquet --full
+"""
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from ...constants import SALES_EXPORT_CHUNK_SIZE
+from ...services.export_service import SalesExport
+
+
+class Command(BaseCommand):
+    help = "Exporta register_sells y sus líneas a Parquet (datasets sales y sale_lines)"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--output", default=settings.SALES_EXPORT_DIR)
+        parser.add_argument("--chunk-size", type=int, default=SALES_EXPORT_CHUNK_SIZE)
+        parser.add_argument(
+            "--full", action="store_true", help="Ignora la marca de agua y exporta todo"
+        )
+
+    def handle(self, *args, **options):
+        if options["chunk_size"] < 1:
+            raise CommandError("--chunk-size debe ser al menos 1")
+
+        result = SalesExport.export(
+            options["output"], chunk_size=options["chunk_size"], full=options["full"]
+        )
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Exportadas {result['sales']} ventas y {result['lines']} líneas "
+                f"en {result['files']} archivos (idsell<={result['last_idsell']})"
+            )
+        )
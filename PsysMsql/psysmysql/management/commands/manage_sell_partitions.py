@@ -0,0 +1,46 @@
+"""
+Crea las particiones mensuales futuras de register_sells (solo MySQL).
+
+Pensado para ejecutarse a diario o semanalmente (cron / Celery beat).
+
+Uso:
+    python manage.py manage_sell_partitions
+    python manage.py manage_sell_partitions --months-ahead 6
+    python manage.py manage_sell_partitions --list
+"""
+
+from django.core.management.base import BaseCommand, CommandError
+
+from ...constants import PARTITION_MONTHS_AHEAD
+from ...services.partition_service import SellPartitions, partition_name
+
+
+class Command(BaseCommand):
+    help = "Agrega las particiones mensuales que falten en register_sells"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--months-ahead", type=int, default=PARTITION_MONTHS_AHEAD)
+        parser.add_argument(
+            "--list", action="store_true", help="Solo lista las particiones actuales"
+        )
+
+    def handle(self, *args, **options):
+        if options["months_ahead"] < 0:
+            raise CommandError("--months-ahead no puede ser negativo")
+        if not SellPartitions.supported():
+            self.stdout.write(
+                self.style.WARNING("El particionado solo aplica a MySQL; nada que hacer")
+            )
+            return
+
+        if options["list"]:
+            for month in SellPartitions.existing():
+                self.stdout.write(partition_name(month))
+            return
+
+        created = SellPartitions.ensure_future(options["months_ahead"])
+        if created:
+            message = f"Particiones creadas: {', '.join(created)}"
+        else:
+            message = "Las particiones ya estaban al día"
+        self.stdout.write(self.style.SUCCESS(message))
@@ -0,0 +1,135 @@
+"""
+Compara dos archivos de resultados de benchmarks y falla si hay regresiones.
+
+Uso:
+    python manage.py perfcompare bench/baseline.json bench/current.json
+    python manage.py perfcompare base.json current.json --p95-threshold 20 --queries-threshold 2
+"""
+
+import json
+from pathlib import Path
+
+from django.core.management.base import BaseCommand, CommandError
+
+# (clave en el JSON, opción, etiqueta, umbral por defecto, umbral relativo en %)
+METRICS = [
+    ("p50_ms", "p50", "p50 ms", 10.0, True),
+    ("p95_ms", "p95", "p95 ms", 15.0, True),
+    ("queries", "queries", "queries", 0, False),
+    ("peak_memory_kb", "memory", "mem KB", 20.0, True),
+]
+
+
+def load_results(path):
+    try:
+        data = json.loads(Path(path).read_text())
+    except (OSError, json.JSONDecodeError) as e:
+        raise CommandError(f"No se pudo leer {path}: {e}")
+    if "results" not in data:
+        raise CommandError(f"{path} no es un archivo de resultados de benchmark")
+    return data
+
+
+def compare_metric(baseline, current, threshold, relative, min_delta=0.0):
+    """
+    Devuelve (delta, delta_pct, regresión) para una métrica.
+
+    En métricas relativas se ignoran variaciones menores que ``min_delta``
+    para no marcar ruido en endpoints de pocos milisegundos.
+    """
+    if baseline is None or current is None:
+        return None, None, False
+    delta = current - baseline
+    delta_pct = (delta / baseline * 100) if baseline else (100.0 if delta else 0.0)
+    if relative:
+        regression = delta > min_delta and delta_pct > threshold
+    else:
+        regression = delta > threshold
+    return delta, delta_pct, regression
+
+
+class Command(BaseCommand):
+    help = "Compara resultados de benchmarks y sale con error ante regresiones"
+
+    def add_arguments(self, parser):
+        parser.add_argument("baseline")
+        parser.add_argument("current")
+        for key, option, label, default, relative in METRICS:
+            unit = "%" if relative else "absoluto"
+            parser.add_argument(
+                f"--{option}-threshold",
+                dest=f"{key}_threshold",
+                type=float,
+                default=default,
+                help=f"Aumento máximo permitido en {label} ({unit}, defecto {default})",
+            )
+        parser.add_argument(
+            "--min-ms",
+            type=float,
+            default=1.0,
+            help="Variación mínima en ms para considerar regresión de latencia",
+        )
+        parser.add_argument(
+            "--min-kb",
+            type=float,
+            default=64.0,
+            help="Variación mínima en KB para considerar regresión de memoria",
+        )
+
+    def handle(self, *args, **options):
+        baseline = load_results(options["baseline"])
+        current = load_results(options["current"])
+
+        self.stdout.write(
+            f"Base:   {options['baseline']} ({baseline['meta'].get('git_commit')})\n"
+            f"Actual: {options['current']} ({current['meta'].get('git_commit')})\n"
+        )
+
+        header = f"{'endpoint':<26}" + "".join(
+            f"{label:>30}" for _, _, label, _, _ in METRICS
+        )
+        self.stdout.write(header)
+        self.stdout.write("-" * len(header))
+
+        regressions = []
+        for endpoint in sorted(set(baseline["results"]) | set(current["results"])):
+            base_row = baseline["results"].get(endpoint)
+            current_row = current["results"].get(endpoint)
+            if base_row is None or current_row is None:
+                status = "solo en actual" if base_row is None else "solo en base"
+                self.stdout.write(self.style.WARNING(f"{endpoint:<26}{status:>30}"))
+                continue
+
+            cells = []
+            for key, _, label, _, relative in METRICS:
+                min_delta = options["min_kb"] if key == "peak_memory_kb" else options["min_ms"]
+                delta, delta_pct, regression = compare_metric(
+                    base_row.get(key),
+                    current_row.get(key),
+                    options[f"{key}_threshold"],
+                    relative,
+                    min_delta,
+                )
+                if delta is None:
+                    cells.append(f"{'-':>30}")
+                    continue
+                cell = f"{base_row[key]:.1f} -> {current_row[key]:.1f} ({delta_pct:+.1f}%)"
+                if regression:
+                    regressions.append((endpoint, label, delta_pct))
+                    cells.append(self.style.ERROR(f"{cell:>30}"))
+                elif delta < 0:
+                    cells.append(self.style.SUCCESS(f"{cell:>30}"))
+                else:
+                    cells.append(f"{cell:>30}")
+            self.stdout.write(f"{endpoint:<26}" + "".join(cells))
+
+        self.stdout.write("")
+        if regressions:
+            for endpoint, label, delta_pct in regressions:
+                self.stdout.write(
+                    self.style.ERROR(f"Regresión: {endpoint} {label} {delta_pct:+.1f}%")
+                )
+            raise CommandError(
+                f"{len(regressions)} regresiones de rendimiento detectadas", returncode=1
+            )
+        self.stdout.write(self.style.SUCCESS("Sin regresiones de rendimiento"))
@@ -0,0 +1,46 @@
+"""
+Reconstruye los rollups diarios de ventas desde register_sells.
+
+Uso:
+    python manage.py rebuild_sales_rollups
+    python manage.py rebuild_sales_rollups --start-date 2025-01-01 --end-date 2025-01-31
+"""
+
+import argparse
+from datetime import datetime
+
+from django.core.management.base import BaseCommand, CommandError
+
+from ...services.rollup_service import SalesRollup
+
+
+def parse_date(value):
+    try:
+        return datetime.strptime(value, "%Y-%m-%d").date()
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"fecha inválida (se espera YYYY-MM-DD): {value}")
+
+
+class Command(BaseCommand):
+    help = "Recalcula DailySalesRollup y DailyProductSalesRollup desde el historial"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--start-date", type=parse_date)
+        parser.add_argument("--end-date", type=parse_date)
+        parser.add_argument("--chunk-size", type=int, default=2_000)
+
+    def handle(self, *args, **options):
+        start_date = options["start_date"]
+        end_date = options["end_date"]
+        if start_date and end_date and start_date > end_date:
+            raise CommandError("--start-date debe ser anterior a --end-date")
+
+        sales_rows, product_rows = SalesRollup.rebuild(
+            start_date, end_date, chunk_size=options["chunk_size"]
+        )
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Rollups reconstruidos: {sales_rows} filas de ventas, "
+                f"{product_rows} filas de productos"
+            )
+        )
@@ -0,0 +1,244 @@
+"""
+Genera datos de volumen realista para pruebas de rendimiento.
+
+Solo corre sobre una base dedicada, nombrada con --database (ver
+benchmarks.harness.require_bench_database).
+
+Uso:
+    python manage.py seed_perf --database psys_bench
+    python manage.py seed_perf --database psys_bench --products 5000 --sales 100000
+    python manage.py seed_perf --database psys_bench --clear
+"""
+
+import random
+from contextlib import contextmanager
+from datetime import timedelta
+from decimal import Decimal
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.utils import timezone
+
+from benchmarks.harness import require_bench_database
+
+from ...constants import IVA_RATE
+from ...forms import RegisterSellDetailForm
+from ...models import (
+    Products,
+    Stock,
+    Clients,
+    RegistersellDetail,
+    RegistersellArchive,
+)
+from ...services.rollup_service import SalesRollup
+from ...services.typeahead_service import ProductTypeahead
+
+PERF_PRODUCT_PREFIX = "Perf producto"
+PERF_CLIENT_DOMAIN = "perf.psys.local"
+PERF_EMPLOYEE_PREFIX = "perf_vendedor"
+
+TYPE_PAYS = [value for value, _ in RegisterSellDetailForm.OPTIONS_TYPE_PAY]
+SELL_STATES = [value for value, _ in RegisterSellDetailForm.OPTIONS_STATE_SELL]
+
+
+@contextmanager
+def disable_auto_now(model, field_name):
+    """Permite asignar fechas históricas a campos ``auto_now`` en bulk_create"""
+    field = model._meta.get_field(field_name)
+    original = field.auto_now
+    field.auto_now = False
+    try:
+        yield
+    finally:
+        field.auto_now = original
+
+
+class Command(BaseCommand):
+    help = "Genera productos, stock, clientes y ventas masivas con bulk_create"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--database", required=True, help="Nombre de la base dedicada (confirmación)"
+        )
+        parser.add_argument("--products", type=int, default=50_000)
+        parser.add_argument("--sales", type=int, default=1_000_000)
+        parser.add_argument("--clients", type=int, default=10_000)
+        parser.add_argument("--employees", type=int, default=20)
+        parser.add_argument(
+            "--days", type=int, default=730, help="Días de historial de ventas"
+        )
+        parser.add_argument("--batch-size", type=int, default=5_000)
+        parser.add_argument("--seed", type=int, default=42)
+        parser.add_argument(
+            "--clear",
+            action="store_true",
+            help="Elimina los datos generados previamente por seed_perf y termina",
+        )
+
+    def handle(self, *args, **options):
+        try:
+            require_bench_database(options["database"])
+        except SystemExit as e:
+            raise CommandError(e.code)
+
+        self.rng = random.Random(options["seed"])
+        self.batch_size = options["batch_size"]
+
+        if options["clear"]:
+            self.clear()
+            return
+
+        products = self.seed_products(options["products"])
+        self.seed_clients(options["clients"])
+        self.seed_sales(
+            options["sales"], products, options["employees"], options["days"]
+        )
+
+    def clear(self):
+        sales, _ = RegistersellDetail.objects.filter(
+            id_employed__startswith=PERF_EMPLOYEE_PREFIX
+        ).delete()
+        archived, _ = RegistersellArchive.objects.filter(
+            id_employed__startswith=PERF_EMPLOYEE_PREFIX
+        ).delete()
+        sales += archived
+        clients, _ = Clients.objects.filter(
+            email__endswith=f"@{PERF_CLIENT_DOMAIN}"
+        ).delete()
+        products, _ = Products.objects.filter(
+            name__startswith=PERF_PRODUCT_PREFIX
+        ).delete()
+        ProductTypeahead.invalidate()
+        self.rebuild_rollups()
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Eliminados: {sales} ventas, {clients} clientes, {products} productos"
+            )
+        )
+
+    def batches(self, total):
+        for start in range(0, total, self.batch_size):
+            yield start, min(start + self.batch_size, total)
+
+    def seed_products(self, total):
+        existing = Products.objects.filter(name__startswith=PERF_PRODUCT_PREFIX).count()
+        for start, end in self.batches(total - existing):
+            with transaction.atomic():
+                created = Products.objects.bulk_create(
+                    Products(
+                        name=f"{PERF_PRODUCT_PREFIX} {existing + i:06d}",
+                        price=Decimal(self.rng.randint(500, 500_000)),
+                        description=f"Producto generado para pruebas {existing + i}",
+                    )
+                    for i in range(start, end)
+                )
+                # MySQL no devuelve PKs en bulk_create: se recuperan por nombre
+                created_ids = Products.objects.filter(
+                    name__in=[product.name for product in created]
+                ).values_list("idproducts", flat=True)
+                Stock.objects.bulk_create(
+                    Stock(id_products_id=pk, quantitystock=self.rng.randint(0, 500))
+                    for pk in created_ids
+                )
+            self.stdout.write(f"Productos: {existing + end}/{total}")
+        # bulk_create no pasa por los servicios de productos
+        ProductTypeahead.invalidate()
+
+        return list(
+            Products.objects.filter(name__startswith=PERF_PRODUCT_PREFIX).values_list(
+                "idproducts", "name", "price"
+            )
+        )
+
+    def seed_clients(self, total):
+        existing = Clients.objects.filter(
+            email__endswith=f"@{PERF_CLIENT_DOMAIN}"
+        ).count()
+        for start, end in self.batches(total - existing):
+            Clients.objects.bulk_create(
+                Clients(
+                    name=f"Cliente perf {existing + i:06d}",
+                    email=f"cliente{existing + i:06d}@{PERF_CLIENT_DOMAIN}",
+                    direction=f"Calle {self.rng.randint(1, 200)} # {self.rng.randint(1, 99)}",
+                    nit=f"{900_000_000 + existing + i}",
+                    country="Colombia",
+                    departament="Valle del Cauca",
+                    city="Cali",
+                )
+                for i in range(start, end)
+            )
+            self.stdout.write(f"Clientes: {existing + end}/{total}")
+
+    def build_detail(self, products):
+        """Construye el detalle de venta con el mismo formato que _handle_add_form"""
+        items = []
+        subtotal = 0.0
+        quantity_total = 0
+        for idproducts, name, price in self.rng.sample(
+            products, k=min(len(products), self.rng.randint(1, 6))
+        ):
+            quantity = self.rng.randint(1, 5)
+            pricexquantity = quantity * float(price)
+            subtotal += pricexquantity
+            quantity_total += quantity
+            items.append(
+                {
+                    "id": idproducts,
+                    "id_product": idproducts,
+                    "name": name,
+                    "price": float(price),
+                    "quantity": quantity,
+                    "pricexquantity": pricexquantity,
+                }
+            )
+        iva = subtotal * IVA_RATE
+        items.append(
+            {
+                "totals": {
+                    "quantity": quantity_total,
+                    "subtotal": subtotal - iva,
+                    "iva": iva,
+                    "total_sell": subtotal,
+                }
+            }
+        )
+        return items, subtotal
+
+    def seed_sales(self, total, products, employees, days):
+        if not products:
+            self.stdout.write(self.style.WARNING("Sin productos: no se generan ventas"))
+            return
+
+        employee_names = [f"{PERF_EMPLOYEE_PREFIX}{i}" for i in range(employees)]
+        now = timezone.now()
+        span_seconds = days * 24 * 60 * 60
+
+        with disable_auto_now(RegistersellDetail, "date"):
+            for start, end in self.batches(total):
+                registers = []
+                for _ in range(start, end):
+                    items, total_sell = self.build_detail(products)
+                    registers.append(
+                        RegistersellDetail(
+                            date=now - timedelta(seconds=self.rng.randint(0, span_seconds)),
+                            id_employed=self.rng.choice(employee_names),
+                            total_sell=Decimal(f"{total_sell:.2f}"),
+                            type_pay=self.rng.choice(TYPE_PAYS),
+                            state_sell=self.rng.choice(SELL_STATES),
+                            notes="",
+                            quantity_pay=Decimal(f"{total_sell:.2f}"),
+                            detail_sell=str(items),
+                        )
+                    )
+                RegistersellDetail.objects.bulk_create(registers)
+                self.stdout.write(f"Ventas: {end}/{total}")
+
+        # bulk_create no pasa por el registro de ventas: recalcular rollups
+        self.rebuild_rollups()
+        self.stdout.write(self.style.SUCCESS("Datos de rendimiento generados"))
+
+    def rebuild_rollups(self):
+        sales_rows, product_rows = SalesRollup.rebuild(chunk_size=self.batch_size)
+        self.stdout.write(
+            f"Rollups: {sales_rows} filas de ventas, {product_rows} filas de productos"
+        )
@@ -0,0 +1,227 @@
+"""
+Métricas de rendimiento en memoria
+
+Registra duraciones con ``time.perf_counter_ns`` en histogramas por nombre de
+operación, sin escribir una línea de log por llamada. Los histogramas se
+exponen en formato de texto Prometheus (vista ``/metrics/``) y se resumen en el
+log de forma periódica.
+
+Usage:
+    with timer("products.create"):
+        ...
+
+    @timed("stock.summary")
+    def get_stock_summary():
+        ...
+"""
+
+import logging
+import threading
+import time
+from bisect import bisect_left
+from functools import wraps
+
+from .constants import METRICS_SUMMARY_INTERVAL
+
+logger = logging.getLogger("psysmysql.performance")
+
+# Límites superiores de los buckets en nanosegundos (1ms .. 10s)
+BUCKET_BOUNDS_NS = [
+    int(seconds * 1_000_000_000)
+    for seconds in (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+]
+
+METRIC_NAME = "psysmysql_operation_duration_seconds"
+ERRORS_METRIC_NAME = "psysmysql_operation_errors_total"
+
+
+class Histogram:
+    """Histograma de duraciones de una operación"""
+
+    __slots__ = ("lock", "buckets", "count", "sum_ns", "max_ns", "errors")
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        # Un bucket por límite más el bucket +Inf
+        self.buckets = [0] * (len(BUCKET_BOUNDS_NS) + 1)
+        self.count = 0
+        self.sum_ns = 0
+        self.max_ns = 0
+        self.errors = 0
+
+    def observe(self, duration_ns, error=False):
+        index = bisect_left(BUCKET_BOUNDS_NS, duration_ns)
+        with self.lock:
+            self.buckets[index] += 1
+            self.count += 1
+            self.sum_ns += duration_ns
+            if duration_ns > self.max_ns:
+                self.max_ns = duration_ns
+            if error:
+                self.errors += 1
+
+    def snapshot(self):
+        with self.lock:
+            return {
+                "buckets": list(self.buckets),
+                "count": self.count,
+                "sum_ns": self.sum_ns,
+                "max_ns": self.max_ns,
+                "errors": self.errors,
+            }
+
+    @staticmethod
+    def quantile_ns(snapshot, q):
+        """Cuantil aproximado: límite superior del bucket que lo contiene"""
+        target = q * snapshot["count"]
+        cumulative = 0
+        for bound, bucket_count in zip(BUCKET_BOUNDS_NS, snapshot["buckets"]):
+            cumulative += bucket_count
+            if cumulative >= target:
+                return bound
+        return snapshot["max_ns"]
+
+
+class MetricsRegistry:
+    """Conjunto de histogramas por nombre de operación"""
+
+    def __init__(self, summary_interval=METRICS_SUMMARY_INTERVAL):
+        self.lock = threading.Lock()
+        self.histograms = {}
+        self.summary_interval = summary_interval
+        self.last_summary = time.monotonic()
+
+    def histogram(self, name):
+        histogram = self.histograms.get(name)
+        if histogram is None:
+            with self.lock:
+                histogram = self.histograms.setdefault(name, Histogram())
+        return histogram
+
+    def observe(self, name, duration_ns, error=False):
+        self.histogram(name).observe(duration_ns, error)
+        if self.summary_interval and (
+            time.monotonic() - self.last_summary >= self.summary_interval
+        ):
+            snapshot = self.claim_summary()
+            if snapshot is not None:
+                self.write_summary(snapshot)
+
+    def claim_summary(self):
+        """Reserva el resumen del intervalo para un solo hilo
+
+        Comprueba y renueva ``last_summary`` y toma la lista de histogramas
+        bajo el mismo lock que ``reset``; los demás hilos que pasaron la
+        comprobación sin lock reciben None y no escriben un resumen duplicado.
+        """
+        with self.lock:
+            now = time.monotonic()
+            if now - self.last_summary < self.summary_interval:
+                return None
+            self.last_summary = now
+            items = list(self.histograms.items())
+        return {name: histogram.snapshot() for name, histogram in sorted(items)}
+
+    def snapshot(self):
+        with self.lock:
+            items = list(self.histograms.items())
+        return {name: histogram.snapshot() for name, histogram in sorted(items)}
+
+    def reset(self):
+        with self.lock:
+            self.histograms = {}
+            self.last_summary = time.monotonic()
+
+    def log_summary(self):
+        """Escribe una línea de resumen por operación"""
+        with self.lock:
+            self.last_summary = time.monotonic()
+        self.write_summary(self.snapshot())
+
+    @staticmethod
+    def write_summary(snapshot):
+        for name, data in snapshot.items():
+            if not data["count"]:
+                continue
+            logger.info(
+                f"{name}: n={data['count']} "
+                f"media={data['sum_ns'] / data['count'] / 1e6:.2f}ms "
+                f"p95<={Histogram.quantile_ns(data, 0.95) / 1e6:.0f}ms "
+                f"max={data['max_ns'] / 1e6:.2f}ms errores={data['errors']}"
+            )
+
+    def render_prometheus(self):
+        """Histogramas en formato de exposición de texto de Prometheus"""
+        snapshot = self.snapshot()
+        lines = [
+            f"# HELP {METRIC_NAME} Duración de operaciones instrumentadas",
+            f"# TYPE {METRIC_NAME} histogram",
+        ]
+        for name, data in snapshot.items():
+            label = escape_label(name)
+            cumulative = 0
+            for bound, bucket_count in zip(BUCKET_BOUNDS_NS, data["buckets"]):
+                cumulative += bucket_count
+                lines.append(
+                    f'{METRIC_NAME}_bucket{{operation="{label}",le="{bound / 1e9:g}"}} {cumulative}'
+                )
+            lines.append(
+                f'{METRIC_NAME}_bucket{{operation="{label}",le="+Inf"}} {data["count"]}'
+            )
+            lines.append(
+                f'{METRIC_NAME}_sum{{operation="{label}"}} {data["sum_ns"] / 1e9:.9f}'
+            )
+            lines.append(f'{METRIC_NAME}_count{{operation="{label}"}} {data["count"]}')
+
+        lines.append(
+            f"# HELP {ERRORS_METRIC_NAME} Operaciones instrumentadas que fallaron"
+        )
+        lines.append(f"# TYPE {ERRORS_METRIC_NAME} counter")
+        for name, data in snapshot.items():
+            lines.append(
+                f'{ERRORS_METRIC_NAME}{{operation="{escape_label(name)}"}} {data["errors"]}'
+            )
+        return "\n".join(lines) + "\n"
+
+
+def escape_label(value):
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+registry = MetricsRegistry()
+
+
+class timer:
+    """Context manager que registra la duración de un bloque"""
+
+    __slots__ = ("name", "start_ns")
+
+    def __init__(self, name):
+        self.name = name
+        self.start_ns = 0
+
+    def __enter__(self):
+        self.start_ns = time.perf_counter_ns()
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        registry.observe(
+            self.name, time.perf_counter_ns() - self.start_ns, exc_type is not None
+        )
+        return False
+
+
+def timed(name=None):
+    """Decorator que registra la duración de cada llamada a la función"""
+
+    def decorator(func):
+        metric_name = name or f"{func.__module__}.{func.__qualname__}"
+
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            with timer(metric_name):
+                return func(*args, **kwargs)
+
+        return wrapper
+
+    return decorator
@@ -0,0 +1,232 @@
+"""
+Middlewares del proyecto psysmysql
+"""
+
+import re
+import time
+import uuid
+from contextlib import ExitStack
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.db import connections
+
+from .constants import (
+    QUERY_COUNT_WARNING_THRESHOLD,
+    REPLICA_READ_PATHS,
+    REPLICA_STICKY_COOKIE,
+    REPLICA_STICKY_SECONDS,
+)
+from .db_router import RoutingState, routing_state
+from .logging_config import get_db_logger, request_id_var
+
+REQUEST_ID_HEADER = "X-Request-ID"
+VALID_REQUEST_ID = re.compile(r"^[A-Za-z0-9._-]{1,64}$")
+
+
+class RequestIdMiddleware:
+    """
+    Asigna un id de correlación a cada request.
+
+    Reutiliza la cabecera ``X-Request-ID`` entrante (proxy/balanceador) si es
+    válida o genera uno nuevo. El id queda en ``request.request_id``, en el
+    contexto de logging (``request_id_var``), en las tareas Celery encoladas
+    durante el request y en la cabecera de la respuesta.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+
+        token = self.bind_request_id(request)
+        try:
+            response = self.get_response(request)
+        finally:
+            request_id_var.reset(token)
+
+        response[REQUEST_ID_HEADER] = request.request_id
+        return response
+
+    async def __acall__(self, request):
+        token = self.bind_request_id(request)
+        try:
+            response = await self.get_response(request)
+        finally:
+            request_id_var.reset(token)
+
+        response[REQUEST_ID_HEADER] = request.request_id
+        return response
+
+    @staticmethod
+    def bind_request_id(request):
+        request_id = request.headers.get(REQUEST_ID_HEADER, "")
+        if not VALID_REQUEST_ID.match(request_id):
+            request_id = uuid.uuid4().hex
+
+        request.request_id = request_id
+        return request_id_var.set(request_id)
+
+
+class QueryCounter:
+    """
+    Wrapper para ``connection.execute_wrapper`` que cuenta las consultas SQL
+    y acumula el tiempo que pasan en la base de datos.
+    """
+
+    def __init__(self):
+        self.count = 0
+        self.duration = 0.0
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.duration += time.perf_counter() - start
+            self.count += 1
+
+
+class QueryCountMiddleware:
+    """
+    Cuenta las consultas SQL y el tiempo en base de datos de cada request.
+
+    Los valores se registran con ``get_db_logger()`` y se exponen en la
+    cabecera ``Server-Timing`` (``db`` y ``app``), visible en las devtools
+    del navegador y utilizada por los tests de presupuesto de consultas.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.logger = get_db_logger()
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    @staticmethod
+    def install_counter(stack, counter):
+        for alias in connections:
+            stack.enter_context(connections[alias].execute_wrapper(counter))
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+
+        counter = QueryCounter()
+        start = time.perf_counter()
+
+        with ExitStack() as stack:
+            self.install_counter(stack, counter)
+            response = self.get_response(request)
+
+        return self.process(request, response, counter, start)
+
+    async def __acall__(self, request):
+        counter = QueryCounter()
+        start = time.perf_counter()
+
+        # El ORM async ejecuta las consultas en el hilo sync_to_async del
+        # request: el wrapper se instala y se retira en ese mismo hilo
+        stack = ExitStack()
+        await sync_to_async(self.install_counter)(stack, counter)
+        try:
+            response = await self.get_response(request)
+        finally:
+            await sync_to_async(stack.close)()
+
+        return self.process(request, response, counter, start)
+
+    def process(self, request, response, counter, start):
+        total = time.perf_counter() - start
+        request.query_count = counter.count
+        request.query_duration = counter.duration
+
+        response["Server-Timing"] = (
+            f'db;dur={counter.duration * 1000:.2f};desc="{counter.count} queries", '
+            f"app;dur={(total - counter.duration) * 1000:.2f}"
+        )
+
+        if counter.count > QUERY_COUNT_WARNING_THRESHOLD:
+            self.logger.warning(
+                f"{request.method} {request.path}: {counter.count} consultas "
+                f"en {counter.duration * 1000:.2f}ms"
+            )
+        else:
+            self.logger.debug(
+                f"{request.method} {request.path}: {counter.count} consultas "
+                f"en {counter.duration * 1000:.2f}ms"
+            )
+
+        return response
+
+
+class ReplicaRoutingMiddleware:
+    """
+    Abre el ámbito de enrutamiento a la réplica de cada request.
+
+    Las peticiones seguras (GET/HEAD/OPTIONS) a ``REPLICA_READ_PATHS`` leen de
+    la réplica. Si el request escribe, la respuesta lleva la cookie
+    ``REPLICA_STICKY_COOKIE`` y los requests de ese navegador leen de la
+    primaria durante ``REPLICA_STICKY_SECONDS``. Las escrituras de Celery y
+    de otros usuarios no fijan la cookie (ver ``db_router``).
+    """
+
+    sync_capable = True
+    async_capable = True
+    safe_methods = ("GET", "HEAD", "OPTIONS")
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+
+        state = self.routing_state(request)
+        token = routing_state.set(state)
+        try:
+            response = self.get_response(request)
+        finally:
+            routing_state.reset(token)
+        return self.process(request, response, state)
+
+    async def __acall__(self, request):
+        state = self.routing_state(request)
+        token = routing_state.set(state)
+        try:
+            response = await self.get_response(request)
+        finally:
+            routing_state.reset(token)
+        return self.process(request, response, state)
+
+    def routing_state(self, request):
+        return RoutingState(
+            use_replica=(
+                request.method in self.safe_methods
+                and request.path.startswith(REPLICA_READ_PATHS)
+            ),
+            pinned=REPLICA_STICKY_COOKIE in request.COOKIES,
+        )
+
+    @staticmethod
+    def process(request, response, state):
+        if state.wrote:
+            response.set_cookie(
+                REPLICA_STICKY_COOKIE,
+                "1",
+                max_age=REPLICA_STICKY_SECONDS,
+                httponly=True,
+                samesite="Lax",
+            )
+        return response
+
@@ -0,0 +1,90 @@
+# Generated by Django 5.2.4 on 2026-10-19 05:51
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+from ..services.rollup_service import aggregate_sales
+
+
+def backfill_rollups(apps, schema_editor):
+    """Llena los rollups con el historial: los reportes los leen desde ya"""
+    db = schema_editor.connection.alias
+    RegistersellDetail = apps.get_model("psysmysql", "RegistersellDetail")
+    Products = apps.get_model("psysmysql", "Products")
+    DailySalesRollup = apps.get_model("psysmysql", "DailySalesRollup")
+    DailyProductSalesRollup = apps.get_model("psysmysql", "DailyProductSalesRollup")
+
+    product_ids = dict(Products.objects.using(db).values_list("name", "idproducts"))
+    rows = RegistersellDetail.objects.using(db).values_list(
+        "date", "type_pay", "id_employed", "total_sell", "detail_sell"
+    ).iterator(chunk_size=2000)
+    sales, products = aggregate_sales(rows, product_ids)
+
+    DailySalesRollup.objects.using(db).bulk_create(
+        (
+            DailySalesRollup(
+                date=day,
+                type_pay=type_pay,
+                id_employed=id_employed,
+                sells_count=count,
+                revenue=revenue,
+                units=units,
+            )
+            for (day, type_pay, id_employed), (count, revenue, units) in sales.items()
+        ),
+        batch_size=2000,
+    )
+    DailyProductSalesRollup.objects.using(db).bulk_create(
+        (
+            DailyProductSalesRollup(
+                date=day, id_product_id=product_id, units=units, revenue=revenue
+            )
+            for (day, product_id), (units, revenue) in products.items()
+        ),
+        batch_size=2000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('psysmysql', '0002_registerselldetail_quantity_pay'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DailySalesRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField()),
+                ('type_pay', models.CharField(max_length=150)),
+                ('id_employed', models.CharField(max_length=150)),
+                ('sells_count', models.IntegerField(default=0)),
+                ('revenue', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('units', models.IntegerField(default=0)),
+            ],
+            options={
+                'verbose_name': 'Daily_sales_rollup',
+                'verbose_name_plural': 'Daily_sales_rollups',
+                'db_table': 'daily_sales_rollup',
+                'unique_together': {('date', 'type_pay', 'id_employed')},
+            },
+        ),
+        migrations.CreateModel(
+            name='DailyProductSalesRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField()),
+                ('units', models.IntegerField(default=0)),
+                ('revenue', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('id_product', models.ForeignKey(db_column='id_product', on_delete=django.db.models.deletion.CASCADE, to='psysmysql.products')),
+            ],
+            options={
+                'verbose_name': 'Daily_product_sales_rollup',
+                'verbose_name_plural': 'Daily_product_sales_rollups',
+                'db_table': 'daily_product_sales_rollup',
+                'unique_together': {('date', 'id_product')},
+            },
+        ),
+        migrations.RunPython(backfill_rollups, migrations.RunPython.noop),
+    ]
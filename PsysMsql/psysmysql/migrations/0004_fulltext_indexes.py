@@ -0,0 +1,43 @@
+from django.db import migrations
+
+# Índices FULLTEXT para FullTextSearch (services/fulltext_service.py).
+# Django no tiene un tipo de índice FULLTEXT: se crean con SQL y solo en
+# MySQL; en SQLite (desarrollo y tests) la búsqueda usa icontains.
+FULLTEXT_INDEXES = [
+    ("Products", "products_fulltext", ["name", "description"]),
+    (
+        "clients",
+        "clients_fulltext",
+        ["name", "email", "direction", "telephone", "nit", "country", "departament", "city"],
+    ),
+]
+
+
+def create_fulltext_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != "mysql":
+        return
+    quote = schema_editor.quote_name
+    for table, name, columns in FULLTEXT_INDEXES:
+        schema_editor.execute(
+            f"CREATE FULLTEXT INDEX {quote(name)} ON {quote(table)} "
+            f"({', '.join(quote(column) for column in columns)})"
+        )
+
+
+def drop_fulltext_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != "mysql":
+        return
+    quote = schema_editor.quote_name
+    for table, name, _ in FULLTEXT_INDEXES:
+        schema_editor.execute(f"DROP INDEX {quote(name)} ON {quote(table)}")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('psysmysql', '0003_daily_sales_rollups'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_fulltext_indexes, drop_fulltext_indexes),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.4 on 2026-10-19 06:08
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('psysmysql', '0004_fulltext_indexes'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='clients',
+            name='nit',
+            field=models.CharField(db_index=True, max_length=100),
+        ),
+    ]
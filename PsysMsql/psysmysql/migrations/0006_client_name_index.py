@@ -0,0 +1,18 @@
+# Generated by Django 5.2.4 on 2026-10-19 06:10
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('psysmysql', '0005_client_nit_index'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='clients',
+            name='name',
+            field=models.CharField(db_index=True, max_length=200),
+        ),
+    ]
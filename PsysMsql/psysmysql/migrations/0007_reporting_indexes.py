@@ -0,0 +1,60 @@
+# Generated by Django 5.2.4 on 2026-10-19 06:20
+
+from django.db import migrations, models
+from django.db.models import Count, Min, Sum
+
+
+def merge_duplicate_stock(apps, schema_editor):
+    """
+    Deja un solo registro de stock por producto antes de la restricción única
+
+    Las unidades de los registros duplicados se suman en el más antiguo.
+    """
+    Stock = apps.get_model("psysmysql", "Stock")
+    duplicates = (
+        Stock.objects.values("id_products")
+        .annotate(rows=Count("idstock"), first=Min("idstock"), total=Sum("quantitystock"))
+        .filter(rows__gt=1)
+    )
+    for row in duplicates:
+        Stock.objects.filter(pk=row["first"]).update(quantitystock=row["total"])
+        Stock.objects.filter(id_products=row["id_products"]).exclude(pk=row["first"]).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('psysmysql', '0006_client_name_index'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='registerselldetail',
+            index=models.Index(fields=['date'], name='register_sells_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='registerselldetail',
+            index=models.Index(fields=['type_pay', 'date'], name='register_sells_pay_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='registerselldetail',
+            index=models.Index(fields=['id_employed', 'date'], name='register_sells_emp_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='registerselldetail',
+            index=models.Index(fields=['state_sell', 'date'], name='register_sells_state_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='sellproducts',
+            index=models.Index(fields=['idsell', 'idproduct'], name='sellproducts_sell_product_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='stock',
+            index=models.Index(fields=['quantitystock'], name='stock_quantity_idx'),
+        ),
+        migrations.RunPython(merge_duplicate_stock, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='stock',
+            constraint=models.UniqueConstraint(fields=('id_products',), name='stock_unique_product'),
+        ),
+    ]
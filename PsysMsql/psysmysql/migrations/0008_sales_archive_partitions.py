@@ -0,0 +1,93 @@
+# Generated by Django 5.2.4 on 2026-10-19 06:22
+
+from datetime import date
+
+from django.db import migrations, models
+
+# Particionado mensual de register_sells y archivo comprimido, solo en MySQL
+# (ver services/partition_service.py). MySQL exige que la columna de
+# partición forme parte de cada clave única: la clave primaria pasa a ser
+# (idsell, date); idsell sigue siendo AUTO_INCREMENT y único en la práctica.
+PARTITION_MONTHS_AHEAD = 3
+
+
+def add_months(month, months):
+    index = month.year * 12 + month.month - 1 + months
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def partition_sales(apps, schema_editor):
+    if schema_editor.connection.vendor != "mysql":
+        return
+    quote = schema_editor.quote_name
+    with schema_editor.connection.cursor() as cursor:
+        cursor.execute("SELECT MIN(date) FROM register_sells")
+        oldest = cursor.fetchone()[0] or date.today()
+
+    month = date(oldest.year, oldest.month, 1)
+    last = add_months(date.today().replace(day=1), PARTITION_MONTHS_AHEAD)
+    partitions = []
+    while month <= last:
+        upper = add_months(month, 1)
+        partitions.append(
+            f"PARTITION p{month:%Y%m} VALUES LESS THAN (TO_DAYS('{upper:%Y-%m-%d}'))"
+        )
+        month = upper
+    partitions.append("PARTITION p_future VALUES LESS THAN MAXVALUE")
+
+    table = quote("register_sells")
+    schema_editor.execute(
+        f"ALTER TABLE {table} DROP PRIMARY KEY, "
+        f"ADD PRIMARY KEY ({quote('idsell')}, {quote('date')})"
+    )
+    schema_editor.execute(
+        f"ALTER TABLE {table} PARTITION BY RANGE (TO_DAYS({quote('date')})) "
+        f"({', '.join(partitions)})"
+    )
+    schema_editor.execute(
+        f"ALTER TABLE {quote('register_sells_archive')} ROW_FORMAT=COMPRESSED"
+    )
+
+
+def unpartition_sales(apps, schema_editor):
+    if schema_editor.connection.vendor != "mysql":
+        return
+    quote = schema_editor.quote_name
+    table = quote("register_sells")
+    schema_editor.execute(f"ALTER TABLE {table} REMOVE PARTITIONING")
+    schema_editor.execute(
+        f"ALTER TABLE {table} DROP PRIMARY KEY, ADD PRIMARY KEY ({quote('idsell')})"
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('psysmysql', '0007_reporting_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RegistersellArchive',
+            fields=[
+                ('idsell', models.IntegerField(primary_key=True, serialize=False)),
+                ('date', models.DateTimeField()),
+                ('id_employed', models.CharField(max_length=150)),
+                ('total_sell', models.DecimalField(decimal_places=2, max_digits=10)),
+                ('type_pay', models.CharField(max_length=150)),
+                ('state_sell', models.CharField(max_length=150)),
+                ('notes', models.TextField(blank=True, max_length=200, null=True)),
+                ('quantity_pay', models.DecimalField(blank=True, decimal_places=2, max_digits=10, null=True)),
+                ('detail_sell', models.TextField()),
+                ('archived_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'verbose_name': 'Register_sell_archive',
+                'verbose_name_plural': 'Register_sells_archive',
+                'db_table': 'register_sells_archive',
+                'ordering': ['-date'],
+                'indexes': [models.Index(fields=['date'], name='register_archive_date_idx')],
+            },
+        ),
+        migrations.RunPython(partition_sales, unpartition_sales),
+    ]
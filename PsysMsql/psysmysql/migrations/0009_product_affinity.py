@@ -0,0 +1,51 @@
+# Generated by Django 5.2.4 on 2026-10-19 06:34
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('psysmysql', '0008_sales_archive_partitions'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DailyProductPair',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField()),
+                ('baskets', models.IntegerField(default=0)),
+                ('id_product', models.ForeignKey(db_column='id_product', on_delete=django.db.models.deletion.CASCADE, related_name='+', to='psysmysql.products')),
+                ('id_related', models.ForeignKey(db_column='id_related', on_delete=django.db.models.deletion.CASCADE, related_name='+', to='psysmysql.products')),
+            ],
+            options={
+                'verbose_name': 'Daily_product_pair',
+                'verbose_name_plural': 'Daily_product_pairs',
+                'db_table': 'daily_product_pairs',
+                'unique_together': {('date', 'id_product', 'id_related')},
+            },
+        ),
+        migrations.CreateModel(
+            name='ProductAffinity',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('baskets', models.IntegerField()),
+                ('support', models.FloatField()),
+                ('confidence', models.FloatField()),
+                ('lift', models.FloatField()),
+                ('window_start', models.DateField()),
+                ('window_end', models.DateField()),
+                ('id_product', models.ForeignKey(db_column='id_product', on_delete=django.db.models.deletion.CASCADE, related_name='affinities', to='psysmysql.products')),
+                ('id_related', models.ForeignKey(db_column='id_related', on_delete=django.db.models.deletion.CASCADE, related_name='+', to='psysmysql.products')),
+            ],
+            options={
+                'verbose_name': 'Product_affinity',
+                'verbose_name_plural': 'Product_affinities',
+                'db_table': 'product_affinity',
+                'indexes': [models.Index(fields=['id_product', '-confidence', '-lift'], name='product_affinity_rank_idx')],
+                'unique_together': {('id_product', 'id_related')},
+            },
+        ),
+    ]
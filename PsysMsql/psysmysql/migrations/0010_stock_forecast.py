@@ -0,0 +1,32 @@
+# Generated by Django 5.2.4 on 2026-10-19 06:38
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('psysmysql', '0009_product_affinity'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='StockForecast',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('daily_demand', models.FloatField(default=0)),
+                ('demand_std', models.FloatField(default=0)),
+                ('safety_stock', models.IntegerField(default=0)),
+                ('reorder_point', models.IntegerField(default=1)),
+                ('days_of_cover', models.FloatField(blank=True, null=True)),
+                ('computed_on', models.DateField()),
+                ('id_product', models.OneToOneField(db_column='id_product', on_delete=django.db.models.deletion.CASCADE, related_name='forecast', to='psysmysql.products')),
+            ],
+            options={
+                'verbose_name': 'Stock_forecast',
+                'verbose_name_plural': 'Stock_forecasts',
+                'db_table': 'stock_forecast',
+            },
+        ),
+    ]
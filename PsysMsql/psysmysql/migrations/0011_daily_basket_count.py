@@ -0,0 +1,26 @@
+# Generated by Django 5.2.4 on 2026-10-19 07:12
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('psysmysql', '0010_stock_forecast'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DailyBasketCount',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField(unique=True)),
+                ('baskets', models.IntegerField(default=0)),
+            ],
+            options={
+                'verbose_name': 'Daily_basket_count',
+                'verbose_name_plural': 'Daily_basket_counts',
+                'db_table': 'daily_basket_counts',
+            },
+        ),
+    ]
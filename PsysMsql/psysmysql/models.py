@@ -55,6 +55,10 @@ class SellProducts(models.Model):
     class Meta:
         managed = True
         db_table = "Sell_Products"
+        indexes = [
+            # Líneas de una venta y búsqueda de un producto dentro de ella
+            models.Index(fields=["idsell", "idproduct"], name="sellproducts_sell_product_idx"),
+        ]
 
     def __str__(self):
         return self.idproduct.name
@@ -70,6 +74,14 @@ class Stock(models.Model):
     class Meta:
         managed = True
         db_table = "Stock"
+        indexes = [
+            # Rangos de stock bajo / sin stock
+            models.Index(fields=["quantitystock"], name="stock_quantity_idx"),
+        ]
+        constraints = [
+            # Un registro de stock por producto (CreateStock usa get_or_create)
+            models.UniqueConstraint(fields=["id_products"], name="stock_unique_product"),
+        ]
 
     def __str__(self):
         return self.id_products.name
@@ -209,19 +221,61 @@ class RegistersellDetail(models.Model):
         verbose_name_plural = "Register_sells"
         db_table = "register_sells"
         ordering = ["-date"]
+        # InnoDB agrega la clave primaria a cada índice: (date) cubre el orden
+        # (-date, -idsell) de la paginación por keyset
+        indexes = [
+            models.Index(fields=["date"], name="register_sells_date_idx"),
+            models.Index(fields=["type_pay", "date"], name="register_sells_pay_date_idx"),
+            models.Index(fields=["id_employed", "date"], name="register_sells_emp_date_idx"),
+            models.Index(fields=["state_sell", "date"], name="register_sells_state_date_idx"),
+        ]
+
+    def __str__(self):
+        return self.id_employed
+
+
+class RegistersellArchive(models.Model):
+    """
+    Ventas antiguas movidas desde ``register_sells`` por ``SalesArchive``
+
+    Mismas columnas y mismo ``idsell``; en MySQL la tabla usa
+    ``ROW_FORMAT=COMPRESSED`` (migración 0008).
+    """
+
+    idsell = models.IntegerField(primary_key=True)
+    date = models.DateTimeField()
+    id_employed = models.CharField(max_length=150)
+    total_sell = models.DecimalField(max_digits=10, decimal_places=2)
+    type_pay = models.CharField(max_length=150)
+    state_sell = models.CharField(max_length=150)
+    notes = models.TextField(max_length=200, blank=True, null=True)
+    quantity_pay = models.DecimalField(
+        max_digits=10, decimal_places=2, blank=True, null=True
+    )
+    detail_sell = models.TextField()
+    archived_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        verbose_name = "Register_sell_archive"
+        verbose_name_plural = "Register_sells_archive"
+        db_table = "register_sells_archive"
+        ordering = ["-date"]
+        indexes = [
+            models.Index(fields=["date"], name="register_archive_date_idx"),
+        ]
 
     def __str__(self):
         return self.id_employed
 
 
 class Clients(models.Model):
-    name = models.CharField(max_length=200)
+    name = models.CharField(max_length=200, db_index=True)
     email = models.EmailField(
         max_length=150, null=False, unique=True, default="no-email@example.com"
     )
     direction = models.CharField(max_length=100)
     telephone = PhoneNumberField(blank=True, null=True, unique=True)
-    nit = models.CharField(max_length=100)
+    nit = models.CharField(max_length=100, db_index=True)
     country = models.CharField(max_length=100)
     departament = models.CharField(max_length=100)
     city = models.CharField(max_length=100)
@@ -233,3 +287,146 @@ class Clients(models.Model):
 
     def __str__(self):
         return self.name
+
+
+class DailySalesRollup(models.Model):
+    date = models.DateField()
+    type_pay = models.CharField(max_length=150)
+    id_employed = models.CharField(max_length=150)
+    sells_count = models.IntegerField(default=0)
+    revenue = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    units = models.IntegerField(default=0)
+
+    class Meta:
+        verbose_name = "Daily_sales_rollup"
+        verbose_name_plural = "Daily_sales_rollups"
+        db_table = "daily_sales_rollup"
+        unique_together = (("date", "type_pay", "id_employed"),)
+
+    def __str__(self):
+        return f"{self.date} {self.type_pay} {self.id_employed}"
+
+
+class DailyProductSalesRollup(models.Model):
+    date = models.DateField()
+    id_product = models.ForeignKey(
+        Products, on_delete=models.CASCADE, db_column="id_product"
+    )
+    units = models.IntegerField(default=0)
+    revenue = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+
+    class Meta:
+        verbose_name = "Daily_product_sales_rollup"
+        verbose_name_plural = "Daily_product_sales_rollups"
+        db_table = "daily_product_sales_rollup"
+        unique_together = (("date", "id_product"),)
+
+    def __str__(self):
+        return f"{self.date} {self.id_product_id}"
+
+
+class DailyProductPair(models.Model):
+    """
+    Co-ocurrencias de productos en las canastas de un día
+
+    ``id_product <= id_related``; la diagonal (``id_product == id_related``)
+    guarda en cuántas canastas apareció cada producto.
+    """
+
+    date = models.DateField()
+    id_product = models.ForeignKey(
+        Products, on_delete=models.CASCADE, db_column="id_product", related_name="+"
+    )
+    id_related = models.ForeignKey(
+        Products, on_delete=models.CASCADE, db_column="id_related", related_name="+"
+    )
+    baskets = models.IntegerField(default=0)
+
+    class Meta:
+        verbose_name = "Daily_product_pair"
+        verbose_name_plural = "Daily_product_pairs"
+        db_table = "daily_product_pairs"
+        unique_together = (("date", "id_product", "id_related"),)
+
+    def __str__(self):
+        return f"{self.date} {self.id_product_id}-{self.id_related_id}"
+
+
+class DailyBasketCount(models.Model):
+    """Canastas de un día procesadas en ``DailyProductPair`` (total de la ventana)"""
+
+    date = models.DateField(unique=True)
+    baskets = models.IntegerField(default=0)
+
+    class Meta:
+        verbose_name = "Daily_basket_count"
+        verbose_name_plural = "Daily_basket_counts"
+        db_table = "daily_basket_counts"
+
+    def __str__(self):
+        return f"{self.date} {self.baskets}"
+
+
+class ProductAffinity(models.Model):
+    """Regla de asociación ``id_product -> id_related`` en la ventana de análisis"""
+
+    id_product = models.ForeignKey(
+        Products,
+        on_delete=models.CASCADE,
+        db_column="id_product",
+        related_name="affinities",
+    )
+    id_related = models.ForeignKey(
+        Products, on_delete=models.CASCADE, db_column="id_related", related_name="+"
+    )
+    baskets = models.IntegerField()
+    support = models.FloatField()
+    confidence = models.FloatField()
+    lift = models.FloatField()
+    window_start = models.DateField()
+    window_end = models.DateField()
+
+    class Meta:
+        verbose_name = "Product_affinity"
+        verbose_name_plural = "Product_affinities"
+        db_table = "product_affinity"
+        unique_together = (("id_product", "id_related"),)
+        indexes = [
+            # frequently_bought_with: reglas de un producto ya ordenadas
+            models.Index(
+                fields=["id_product", "-confidence", "-lift"],
+                name="product_affinity_rank_idx",
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.id_product_id} -> {self.id_related_id}"
+
+
+class StockForecast(models.Model):
+    """
+    Demanda pronosticada y punto de reorden de un producto (lote nocturno)
+
+    El stock está bajo cuando ``quantitystock < reorder_point``.
+    """
+
+    id_product = models.OneToOneField(
+        Products,
+        on_delete=models.CASCADE,
+        db_column="id_product",
+        related_name="forecast",
+    )
+    daily_demand = models.FloatField(default=0)  # Unidades por día (EWMA)
+    demand_std = models.FloatField(default=0)
+    safety_stock = models.IntegerField(default=0)
+    reorder_point = models.IntegerField(default=1)
+    days_of_cover = models.FloatField(blank=True, null=True)  # None: sin demanda
+    computed_on = models.DateField()
+
+    class Meta:
+        verbose_name = "Stock_forecast"
+        verbose_name_plural = "Stock_forecasts"
+        db_table = "stock_forecast"
+
+    def __str__(self):
+        return f"{self.id_product_id}: {self.reorder_point}"
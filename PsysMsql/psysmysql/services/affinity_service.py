@@ -0,0 +1,277 @@
+"""
+Afinidad de productos (análisis de canasta)
+
+Cada día cerrado se procesa una sola vez: sus canastas (``detail_sell``) se
+convierten en una matriz dispersa X de canastas × productos (1 si el
+producto está en la canasta) y ``XᵀX`` da en cuántas canastas aparece cada
+par de productos; el triángulo superior (con la diagonal) se guarda en
+``DailyProductPair`` y el número de canastas procesadas en
+``DailyBasketCount``.
+
+La tarea nocturna ``update_product_affinity`` procesa los días pendientes de
+la ventana deslizante (``AFFINITY_WINDOW_DAYS``), borra los que salieron de
+ella y recalcula ``ProductAffinity`` con las reglas ``A -> B``:
+
+    soporte    = canastas(A y B) / canastas
+    confianza  = canastas(A y B) / canastas(A)
+    lift       = confianza / (canastas(B) / canastas)
+
+Usage:
+    ProductAffinityJob.update()
+    ProductAffinityJob.frequently_bought_with(product_id)
+"""
+
+from datetime import timedelta
+
+from django.db import transaction
+from django.db.models import Sum
+from django.utils import timezone
+
+import numpy as np
+from scipy import sparse
+
+from .. import models
+from .. import constants as const
+from ..logging_config import get_sell_logger, LogOperation
+from ..services.archive_service import SalesArchive
+from ..services.rollup_service import date_window, parse_detail_sell
+
+
+def basket_matrix(baskets):
+    """
+    Matriz CSR canastas × productos a partir de listas de ids de producto
+
+    Returns:
+        tuple: (matriz, ids de producto de cada columna)
+    """
+    flat = np.fromiter(
+        (product_id for basket in baskets for product_id in basket), dtype=np.int64
+    )
+    product_ids, columns = np.unique(flat, return_inverse=True)
+    indptr = np.zeros(len(baskets) + 1, dtype=np.int64)
+    indptr[1:] = np.cumsum([len(basket) for basket in baskets])
+    matrix = sparse.csr_matrix(
+        (np.ones(flat.size, dtype=np.int32), columns, indptr),
+        shape=(len(baskets), product_ids.size),
+    )
+    return matrix, product_ids
+
+
+def line_product_id(line, product_ids):
+    """Id de producto de una línea del detalle (por nombre en ventas antiguas)"""
+    try:
+        return int(line.get("id_product") or product_ids[line["name"]])
+    except (KeyError, TypeError, ValueError):
+        return None
+
+
+def co_occurrences(baskets):
+    """
+    Pares (producto, producto relacionado, canastas) con ``producto <= relacionado``
+
+    La diagonal es el número de canastas de cada producto.
+    """
+    if not baskets:
+        return []
+    matrix, product_ids = basket_matrix(baskets)
+    counts = sparse.triu(matrix.T @ matrix).tocoo()
+    return list(
+        zip(
+            product_ids[counts.row].tolist(),
+            product_ids[counts.col].tolist(),
+            counts.data.tolist(),
+        )
+    )
+
+
+def association_rules(pairs, total_baskets, min_baskets, per_product):
+    """
+    Reglas ``A -> B`` en ambos sentidos a partir de los pares de la ventana
+
+    Returns:
+        list: tuplas (A, B, canastas, soporte, confianza, lift) con las
+        ``per_product`` reglas de mayor confianza de cada producto
+    """
+    if not pairs or not total_baskets:
+        return []
+    first, second, together = (
+        np.asarray(column, dtype=np.int64) for column in zip(*pairs)
+    )
+    # Canastas de cada producto (diagonal), ordenadas por id para searchsorted
+    diagonal = first == second
+    order = np.argsort(first[diagonal])
+    products = first[diagonal][order]
+    product_baskets = together[diagonal][order].astype(np.float64)
+
+    keep = ~diagonal & (together >= min_baskets)
+    first, second, together = first[keep], second[keep], together[keep]
+    # Cada par da dos reglas: A -> B y B -> A
+    antecedent = np.concatenate([first, second])
+    consequent = np.concatenate([second, first])
+    together = np.concatenate([together, together]).astype(np.float64)
+    antecedent_baskets = product_baskets[np.searchsorted(products, antecedent)]
+    consequent_baskets = product_baskets[np.searchsorted(products, consequent)]
+
+    support = together / total_baskets
+    confidence = together / antecedent_baskets
+    lift = confidence / (consequent_baskets / total_baskets)
+
+    # Las mejores ``per_product`` reglas de cada producto
+    order = np.lexsort((-lift, -confidence, antecedent))
+    rank = np.arange(order.size) - np.searchsorted(antecedent[order], antecedent[order])
+    selected = order[rank < per_product]
+    return [
+        (
+            int(antecedent[i]),
+            int(consequent[i]),
+            int(together[i]),
+            float(support[i]),
+            float(confidence[i]),
+            float(lift[i]),
+        )
+        for i in selected
+    ]
+
+
+class ProductAffinityJob:
+
+    @staticmethod
+    def day_baskets(day, product_ids=None):
+        """Productos distintos de cada venta del día (ids existentes)"""
+        if product_ids is None:
+            product_ids = dict(models.Products.objects.values_list("name", "idproducts"))
+        existing = set(product_ids.values())
+        start, end = date_window(day, day)
+        baskets = []
+        for queryset in SalesArchive.querysets(start, end):
+            for detail_sell in queryset.values_list("detail_sell", flat=True).iterator(
+                chunk_size=2000
+            ):
+                basket = sorted(
+                    existing.intersection(
+                        line_product_id(line, product_ids)
+                        for line in parse_detail_sell(detail_sell)
+                    )
+                )
+                if basket:
+                    baskets.append(basket)
+        return baskets
+
+    @staticmethod
+    def record_day(day, product_ids=None):
+        """Guarda las co-ocurrencias de ``day`` (reemplaza las anteriores)"""
+        baskets = ProductAffinityJob.day_baskets(day, product_ids)
+        pairs = co_occurrences(baskets)
+        with transaction.atomic():
+            # Solo las canastas con productos existentes entran en los pares
+            models.DailyBasketCount.objects.update_or_create(
+                date=day, defaults={"baskets": len(baskets)}
+            )
+            models.DailyProductPair.objects.filter(date=day).delete()
+            models.DailyProductPair.objects.bulk_create(
+                (
+                    models.DailyProductPair(
+                        date=day,
+                        id_product_id=product_id,
+                        id_related_id=related_id,
+                        baskets=baskets,
+                    )
+                    for product_id, related_id, baskets in pairs
+                ),
+                batch_size=2000,
+            )
+        return len(pairs)
+
+    @staticmethod
+    def update(window_end=None, window_days=const.AFFINITY_WINDOW_DAYS):
+        """
+        Procesa los días pendientes de la ventana y recalcula ``ProductAffinity``
+
+        ``window_end`` es el último día incluido (por defecto ayer: el día
+        en curso todavía recibe ventas).
+
+        Returns:
+            dict: días procesados y reglas guardadas
+        """
+        logger = get_sell_logger()
+        window_end = window_end or timezone.localdate() - timedelta(days=1)
+        window_start = window_end - timedelta(days=window_days - 1)
+
+        with LogOperation(
+            f"Calculando afinidad de productos {window_start} - {window_end}",
+            logger,
+            "sells.product_affinity",
+        ):
+            pairs = models.DailyProductPair.objects.order_by()
+            basket_counts = models.DailyBasketCount.objects.order_by()
+            # Días que salieron de la ventana
+            pairs.filter(date__lt=window_start).delete()
+            basket_counts.filter(date__lt=window_start).delete()
+
+            in_window = {"date__gte": window_start, "date__lte": window_end}
+            recorded = set(
+                basket_counts.filter(**in_window).values_list("date", flat=True)
+            )
+            # Solo los días con ventas (según los rollups) que no se procesaron,
+            # aunque ninguna canasta tuviera productos existentes
+            sale_days = set(
+                models.DailySalesRollup.objects.filter(**in_window)
+                .order_by()
+                .values_list("date", flat=True)
+                .distinct()
+            )
+            pending = sorted(sale_days - recorded)
+            product_ids = dict(models.Products.objects.values_list("name", "idproducts"))
+            for day in pending:
+                ProductAffinityJob.record_day(day, product_ids)
+
+            window_pairs = list(
+                pairs.filter(**in_window)
+                .values("id_product", "id_related")
+                .annotate(total=Sum("baskets"))
+                .values_list("id_product", "id_related", "total")
+            )
+            total_baskets = (
+                basket_counts.filter(**in_window).aggregate(total=Sum("baskets"))["total"]
+                or 0
+            )
+            rules = association_rules(
+                window_pairs,
+                total_baskets,
+                const.AFFINITY_MIN_BASKETS,
+                const.AFFINITY_RULES_PER_PRODUCT,
+            )
+
+            with transaction.atomic():
+                models.ProductAffinity.objects.all().delete()
+                models.ProductAffinity.objects.bulk_create(
+                    (
+                        models.ProductAffinity(
+                            id_product_id=product_id,
+                            id_related_id=related_id,
+                            baskets=baskets,
+                            support=support,
+                            confidence=confidence,
+                            lift=lift,
+                            window_start=window_start,
+                            window_end=window_end,
+                        )
+                        for product_id, related_id, baskets, support, confidence, lift in rules
+                    ),
+                    batch_size=2000,
+                )
+
+            logger.info(
+                f"Afinidad de productos: {len(pending)} días procesados, "
+                f"{len(rules)} reglas sobre {total_baskets} canastas"
+            )
+            return {"days": len(pending), "rules": len(rules)}
+
+    @staticmethod
+    def frequently_bought_with(product_id, limit=const.FREQUENTLY_BOUGHT_LIMIT):
+        """Reglas de ``product_id`` por confianza y lift (una consulta por índice)"""
+        return (
+            models.ProductAffinity.objects.filter(id_product_id=product_id)
+            .select_related("id_related")
+            .order_by("-confidence", "-lift")[:limit]
+        )
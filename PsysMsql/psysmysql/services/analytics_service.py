@@ -0,0 +1,271 @@
+"""
+Analítica vectorizada de ventas con NumPy/pandas
+
+Las ventas del rango se cargan una sola vez como columnas (``values_list``
+sobre ``register_sells`` y su archivo, o los archivos Parquet de
+``manage.py export_sales_parquet``) y cada métrica se calcula con
+operaciones sobre arreglos completos, sin bucles de Python por venta:
+
+- distribución del tamaño de canasta (unidades por venta)
+- percentiles del valor de venta
+- mapa de calor día de la semana × hora (ventas e ingresos)
+- desempeño por empleado
+- velocidad de venta por producto (desde ``DailyProductSalesRollup``)
+
+Con ``source="parquet"`` no se toca la base de datos para las ventas; los
+archivos llegan hasta la última exportación.
+
+Usage:
+    SalesInsights.get_insights(start_date, end_date)
+    SalesInsights.get_insights(start_date, end_date, source="parquet")
+"""
+
+from itertools import chain
+
+from django.conf import settings
+from django.core.cache import cache
+from django.utils import timezone
+
+import numpy as np
+import pandas as pd
+import pyarrow.parquet as pq
+
+from .. import models
+from .. import constants as const
+from ..db_router import read_from_replica
+from ..logging_config import get_sell_logger, LogOperation
+from ..services.archive_service import SalesArchive
+from ..services.rollup_service import date_window, parse_detail_sell
+
+SOURCES = ("db", "parquet")
+WEEKDAYS = ("lunes", "martes", "miércoles", "jueves", "viernes", "sábado", "domingo")
+FRAME_COLUMNS = ("idsell", "sold_at", "id_employed", "total_sell", "items", "units")
+CHUNK_SIZE = 2000
+
+
+def empty_frame():
+    return pd.DataFrame(
+        {
+            "idsell": np.empty(0, dtype=np.int64),
+            "sold_at": pd.to_datetime([], utc=True),
+            "id_employed": np.empty(0, dtype=object),
+            "total_sell": np.empty(0, dtype=np.float64),
+            "items": np.empty(0, dtype=np.int64),
+            "units": np.empty(0, dtype=np.int64),
+        }
+    )
+
+
+def db_sales_frame(start_date, end_date):
+    """Ventas del rango desde la base de datos, una columna por campo"""
+    start, end = date_window(start_date, end_date)
+    rows = chain.from_iterable(
+        queryset.values_list(
+            "idsell", "date", "id_employed", "total_sell", "detail_sell"
+        ).iterator(chunk_size=CHUNK_SIZE)
+        for queryset in SalesArchive.querysets(start, end)
+    )
+    ids, sold_at, employees, totals, items, units = [], [], [], [], [], []
+    for idsell, date, id_employed, total_sell, detail_sell in rows:
+        lines = parse_detail_sell(detail_sell)
+        ids.append(idsell)
+        sold_at.append(date)
+        employees.append(id_employed)
+        totals.append(float(total_sell or 0))
+        items.append(len(lines))
+        units.append(sum(int(line.get("quantity") or 0) for line in lines))
+    if not ids:
+        return empty_frame()
+    return pd.DataFrame(
+        {
+            "idsell": np.asarray(ids, dtype=np.int64),
+            "sold_at": pd.to_datetime(sold_at, utc=True),
+            "id_employed": employees,
+            "total_sell": np.asarray(totals, dtype=np.float64),
+            "items": np.asarray(items, dtype=np.int64),
+            "units": np.asarray(units, dtype=np.int64),
+        }
+    )
+
+
+def parquet_sales_frame(start_date, end_date):
+    """Ventas del rango desde el dataset ``sales`` exportado (particiones por fecha)"""
+    path = settings.SALES_EXPORT_DIR / "sales"
+    if not path.exists():
+        return empty_frame()
+    table = pq.read_table(
+        path,
+        columns=list(FRAME_COLUMNS),
+        filters=[
+            ("date", ">=", start_date.isoformat()),
+            ("date", "<=", end_date.isoformat()),
+        ],
+    )
+    frame = table.to_pandas()
+    frame["total_sell"] = frame["total_sell"].astype(np.float64)
+    return frame
+
+
+def basket_distribution(frame):
+    """Ventas por número de unidades en la canasta (el último grupo es ``CAP+``)"""
+    cap = const.BASKET_SIZE_CAP
+    units = frame["units"].to_numpy(dtype=np.int64)
+    counts = np.bincount(np.minimum(units, cap), minlength=cap + 1)
+    return {
+        "mean": round(float(units.mean()), 2) if units.size else 0.0,
+        "median": float(np.median(units)) if units.size else 0.0,
+        "p90": float(np.percentile(units, 90)) if units.size else 0.0,
+        "distribution": [
+            {"units": f"{size}+" if size == cap else str(size), "orders": int(count)}
+            for size, count in enumerate(counts)
+            if count
+        ],
+    }
+
+
+def revenue_percentiles(frame):
+    totals = frame["total_sell"].to_numpy(dtype=np.float64)
+    if not totals.size:
+        values = [0.0] * len(const.REVENUE_PERCENTILES)
+    else:
+        values = np.percentile(totals, const.REVENUE_PERCENTILES)
+    return {
+        "orders": int(totals.size),
+        "total": round(float(totals.sum()), 2),
+        "mean": round(float(totals.mean()), 2) if totals.size else 0.0,
+        "percentiles": {
+            f"p{percentile}": round(float(value), 2)
+            for percentile, value in zip(const.REVENUE_PERCENTILES, values)
+        },
+    }
+
+
+def hourly_heatmap(frame):
+    """Matrices 7×24 (lunes a domingo × hora local) de ventas e ingresos"""
+    local = frame["sold_at"].dt.tz_convert(timezone.get_current_timezone())
+    cells = (local.dt.weekday * 24 + local.dt.hour).to_numpy(dtype=np.int64)
+    weights = frame["total_sell"].to_numpy(dtype=np.float64)
+    orders = np.bincount(cells, minlength=7 * 24).reshape(7, 24)
+    revenue = np.bincount(cells, weights=weights, minlength=7 * 24).reshape(7, 24)
+    return {
+        "weekdays": list(WEEKDAYS),
+        "orders": orders.tolist(),
+        "revenue": revenue.round(2).tolist(),
+    }
+
+
+def employee_performance(frame):
+    if frame.empty:
+        return []
+    grouped = frame.groupby("id_employed").agg(
+        orders=("idsell", "size"),
+        revenue=("total_sell", "sum"),
+        units=("units", "sum"),
+        median_ticket=("total_sell", "median"),
+    )
+    grouped["average_ticket"] = grouped["revenue"] / grouped["orders"]
+    grouped["units_per_order"] = grouped["units"] / grouped["orders"]
+    grouped["revenue_share"] = grouped["revenue"] / grouped["revenue"].sum()
+    grouped = grouped.sort_values(["revenue", "orders"], ascending=False)
+    return [
+        {
+            "id_employed": id_employed,
+            "orders": int(row.orders),
+            "revenue": round(float(row.revenue), 2),
+            "units": int(row.units),
+            "average_ticket": round(float(row.average_ticket), 2),
+            "median_ticket": round(float(row.median_ticket), 2),
+            "units_per_order": round(float(row.units_per_order), 2),
+            "revenue_share": round(float(row.revenue_share), 4),
+        }
+        for id_employed, row in grouped.iterrows()
+    ]
+
+
+def product_velocity(start_date, end_date):
+    """Unidades por día de cada producto en el rango, desde los rollups diarios"""
+    rows = list(
+        models.DailyProductSalesRollup.objects.filter(
+            date__gte=start_date, date__lte=end_date
+        )
+        .order_by()
+        .values_list("id_product", "date", "units", "revenue")
+    )
+    if not rows:
+        return []
+    frame = pd.DataFrame(rows, columns=["id_product", "date", "units", "revenue"])
+    frame["revenue"] = frame["revenue"].astype(np.float64)
+    days = (end_date - start_date).days + 1
+    grouped = frame.groupby("id_product").agg(
+        units=("units", "sum"),
+        revenue=("revenue", "sum"),
+        days_sold=("date", "nunique"),
+        last_sold=("date", "max"),
+    )
+    grouped["velocity"] = grouped["units"] / days
+    top = grouped.sort_values(["velocity", "revenue"], ascending=False).head(
+        const.PRODUCT_VELOCITY_LIMIT
+    )
+    names = dict(
+        models.Products.objects.filter(idproducts__in=top.index.tolist()).values_list(
+            "idproducts", "name"
+        )
+    )
+    return [
+        {
+            "idproducts": int(id_product),
+            "name": names.get(id_product),
+            "units": int(row.units),
+            "revenue": round(float(row.revenue), 2),
+            "units_per_day": round(float(row.velocity), 3),
+            "days_sold": int(row.days_sold),
+            "last_sold": row.last_sold.isoformat(),
+        }
+        for id_product, row in top.iterrows()
+    ]
+
+
+class SalesInsights:
+
+    @staticmethod
+    def get_insights(start_date, end_date, source="db"):
+        """Métricas del rango, en cache por (inicio, fin, origen)"""
+        cache_key = const.CACHE_KEY_SALES_INSIGHTS.format(
+            start_date.isoformat(), end_date.isoformat(), source
+        )
+        insights = cache.get(cache_key)
+        if insights is None:
+            insights = SalesInsights.build_insights(start_date, end_date, source)
+            # Las ventanas cerradas ya no cambian
+            if end_date < timezone.localdate():
+                timeout = const.CACHE_TIMEOUT_LONG
+            else:
+                timeout = const.CACHE_TIMEOUT_SHORT
+            cache.set(cache_key, insights, timeout)
+        return insights
+
+    @staticmethod
+    @read_from_replica()
+    def build_insights(start_date, end_date, source="db"):
+        logger = get_sell_logger()
+
+        with LogOperation(
+            f"Generando métricas de ventas {start_date} - {end_date} ({source})",
+            logger,
+            "sells.insights",
+        ):
+            if source == "parquet":
+                frame = parquet_sales_frame(start_date, end_date)
+            else:
+                frame = db_sales_frame(start_date, end_date)
+
+            return {
+                "start_date": start_date.isoformat(),
+                "end_date": end_date.isoformat(),
+                "source": source,
+                "basket_size": basket_distribution(frame),
+                "revenue": revenue_percentiles(frame),
+                "hourly_heatmap": hourly_heatmap(frame),
+                "employee_performance": employee_performance(frame),
+                "product_velocity": product_velocity(start_date, end_date),
+            }
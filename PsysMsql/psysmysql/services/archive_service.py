@@ -0,0 +1,163 @@
+"""
+Archivado de ventas antiguas
+
+``SalesArchive.archive`` mueve las ventas con más de ``ARCHIVE_AFTER_MONTHS``
+meses de ``register_sells`` a ``register_sells_archive`` (comprimida en
+MySQL) por lotes, y después elimina las particiones mensuales que quedaron
+vacías. Los rollups diarios no cambian: los totales históricos siguen
+saliendo de ellos.
+
+Los reportes que leen ventas individuales por rango de fechas usan
+``SalesArchive.querysets``, que solo incluye el archivo cuando el rango
+empieza antes de la venta archivada más reciente.
+
+Usage:
+    SalesArchive.archive(months=12)
+    for queryset in SalesArchive.querysets(start, end):
+        ...
+"""
+
+from datetime import datetime
+
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Max
+from django.utils import timezone
+
+from .. import models
+from ..constants import (
+    ARCHIVE_AFTER_MONTHS,
+    ARCHIVE_BATCH_SIZE,
+    CACHE_KEY_SALES_ARCHIVE,
+    CACHE_TIMEOUT_LONG,
+)
+from ..logging_config import get_sell_logger, LogOperation
+from ..services.partition_service import SellPartitions, add_months, month_start
+
+ARCHIVE_FIELDS = (
+    "idsell",
+    "date",
+    "id_employed",
+    "total_sell",
+    "type_pay",
+    "state_sell",
+    "notes",
+    "quantity_pay",
+    "detail_sell",
+)
+
+
+class SalesArchive:
+
+    @staticmethod
+    def cutoff(months=ARCHIVE_AFTER_MONTHS, today=None):
+        """Inicio (hora local) del mes desde el que las ventas siguen vivas"""
+        month = add_months(month_start(today or timezone.localdate()), -months)
+        return timezone.make_aware(datetime(month.year, month.month, 1))
+
+    @staticmethod
+    def archive(months=ARCHIVE_AFTER_MONTHS, batch_size=ARCHIVE_BATCH_SIZE):
+        """
+        Mueve al archivo las ventas anteriores a ``cutoff(months)``
+
+        Cada lote se copia y se borra en la misma transacción; si el proceso
+        se interrumpe, la siguiente ejecución continúa donde quedó.
+
+        Returns:
+            int: ventas archivadas
+        """
+        if months < ARCHIVE_AFTER_MONTHS:
+            # needs_archive da por hecho que nada más reciente está archivado
+            raise ValueError(
+                f"No se archivan ventas de menos de {ARCHIVE_AFTER_MONTHS} meses"
+            )
+        logger = get_sell_logger()
+        cutoff = SalesArchive.cutoff(months)
+        moved = 0
+
+        with LogOperation(
+            f"Archivando ventas anteriores a {cutoff:%Y-%m-%d}",
+            logger,
+            "sells.archive",
+        ):
+            old_sales = models.RegistersellDetail.objects.filter(date__lt=cutoff)
+            while True:
+                with transaction.atomic():
+                    batch = list(
+                        old_sales.select_for_update()
+                        .order_by("date", "idsell")
+                        .values(*ARCHIVE_FIELDS)[:batch_size]
+                    )
+                    if not batch:
+                        break
+                    models.RegistersellArchive.objects.bulk_create(
+                        (models.RegistersellArchive(**row) for row in batch),
+                        ignore_conflicts=True,
+                    )
+                    # Con la fecha en el filtro MySQL solo toca las particiones viejas
+                    old_sales.filter(idsell__in=[row["idsell"] for row in batch]).delete()
+                moved += len(batch)
+
+            dropped = SellPartitions.drop_before(cutoff)
+            cache.delete(CACHE_KEY_SALES_ARCHIVE)
+            logger.info(
+                f"Ventas archivadas: {moved}, particiones eliminadas: {len(dropped)}"
+            )
+            return moved
+
+    @staticmethod
+    def boundary():
+        """
+        Fecha e id de la venta archivada más reciente
+
+        Returns:
+            dict: ``{"date": datetime, "idsell": int}`` o ``None`` sin archivo
+        """
+        boundary = cache.get(CACHE_KEY_SALES_ARCHIVE)
+        if boundary is None:
+            newest = models.RegistersellArchive.objects.aggregate(
+                date=Max("date"), idsell=Max("idsell")
+            )
+            boundary = newest if newest["date"] is not None else {}
+            cache.set(CACHE_KEY_SALES_ARCHIVE, boundary, CACHE_TIMEOUT_LONG)
+        return boundary or None
+
+    @staticmethod
+    def needs_archive(start=None):
+        """¿Un rango que empieza en ``start`` (None = sin límite) incluye ventas archivadas?"""
+        if start is not None and start >= SalesArchive.cutoff():
+            # Rango reciente: ni siquiera hace falta consultar el límite
+            return False
+        boundary = SalesArchive.boundary()
+        return boundary is not None and (start is None or start <= boundary["date"])
+
+    @staticmethod
+    def querysets(start=None, end=None):
+        """
+        Ventas del rango [start, end): la tabla viva y, si hace falta, el archivo
+
+        Returns:
+            list: querysets con las mismas columnas (``ARCHIVE_FIELDS``)
+        """
+        sources = [models.RegistersellDetail.objects.order_by()]
+        if SalesArchive.needs_archive(start):
+            sources.append(models.RegistersellArchive.objects.order_by())
+
+        querysets = []
+        for queryset in sources:
+            if start is not None:
+                queryset = queryset.filter(date__gte=start)
+            if end is not None:
+                queryset = queryset.filter(date__lt=end)
+            querysets.append(queryset)
+        return querysets
+
+    @staticmethod
+    def get_register(pk):
+        """Una venta por id, buscando en el archivo si ya no está en la tabla viva"""
+        boundary = SalesArchive.boundary()
+        if boundary is not None and int(pk) <= boundary["idsell"]:
+            archived = models.RegistersellArchive.objects.filter(idsell=pk)
+            if archived.exists():
+                return archived
+        return models.RegistersellDetail.objects.filter(idsell=pk)
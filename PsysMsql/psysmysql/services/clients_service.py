@@ -1,6 +1,58 @@
+import re
+from functools import reduce
+from operator import or_
+
+import phonenumbers
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Q
+
+from ..constants import (
+    CACHE_KEY_CLIENTS_COUNT,
+    CACHE_TIMEOUT_SHORT,
+    CLIENT_LOOKUP_LIMIT,
+    CLIENTS_PER_PAGE,
+)
 from ..models import Clients
 from ..logging_config import get_clients_logger, log_execution_time, LogOperation
+from ..services.fulltext_service import FullTextSearch
 from ..services.search_orm import Search
+from ..utils import paginate
+
+NON_DIGITS = re.compile(r"\D")
+
+
+def telephone_candidates(query):
+    """
+    Formas E.164 de un teléfono escrito en caja
+
+    ``+57 601 234 5678`` solo puede ser ``+576012345678``; ``601 234 5678`` también
+    puede ser un número local sin el código de país de
+    ``PHONENUMBER_DEFAULT_REGION``.
+    """
+    digits = NON_DIGITS.sub("", query)
+    if not digits:
+        return []
+    candidates = [f"+{digits}"]
+    region = settings.PHONENUMBER_DEFAULT_REGION
+    if region and not query.lstrip().startswith("+"):
+        country_code = phonenumbers.country_code_for_region(region)
+        if country_code:
+            candidates.append(f"+{country_code}{digits}")
+    return candidates
+
+# Columnas que muestra allclients.html
+CLIENT_LIST_FIELDS = (
+    "id",
+    "name",
+    "email",
+    "telephone",
+    "direction",
+    "nit",
+    "country",
+    "departament",
+    "city",
+)
 
 
 class RegisterClients:
@@ -20,7 +72,7 @@ class RegisterClients:
 
         logger = get_clients_logger()
 
-        with LogOperation(f"Creando cliente: {name}", logger):
+        with LogOperation(f"Creando cliente: {name}", logger, "clients.register"):
             if Search.filter(Clients, "name", name).exists():
                 logger.warning(f"No es posible crear el cliente: {name}")
                 raise ValueError("El cliente ya existe")
@@ -41,28 +93,104 @@ class RegisterClients:
 
 
 class GertAllClients:
+    """
+    Listado paginado de clientes para ``allclients.html``
+
+    Cada página es una consulta ``ORDER BY name, id LIMIT`` sobre el índice
+    de ``name`` que trae solo las columnas de la tabla (``values``); el total
+    se cuenta una vez y se guarda en cache para no repetir el COUNT(*) en
+    cada página (las señales de ``Clients`` lo borran en altas y bajas).
+    """
+
+    @staticmethod
+    def count_clients(cached=True):
+        if not cached:
+            return Clients.objects.count()
+        return cache.get_or_set(
+            CACHE_KEY_CLIENTS_COUNT, Clients.objects.count, CACHE_TIMEOUT_SHORT
+        )
 
     @staticmethod
     @log_execution_time(get_clients_logger())
-    def get_all_clients():
+    def get_all_clients(page=1, per_page=CLIENTS_PER_PAGE, cached_count=True):
+        clients = Clients.objects.order_by("name", "id").values(*CLIENT_LIST_FIELDS)
+        page_obj, paginator = paginate(
+            clients,
+            page,
+            per_page,
+            count=GertAllClients.count_clients(cached_count),
+        )
+        # Evaluar aquí: la vista async renderiza fuera de este hilo
+        page_obj.object_list = list(page_obj.object_list)
+        get_clients_logger().debug(
+            f"Clientes página {page_obj.number}/{paginator.num_pages} "
+            f"(total {paginator.count})"
+        )
+        return page_obj
+
+
+class ClientLookup:
+    """
+    Búsqueda de clientes en caja por correo, NIT o teléfono
+
+    Todas las consultas usan índices: ``email`` y ``telephone`` son únicos y
+    ``nit`` tiene índice propio. Primero se intenta la coincidencia exacta
+    (una fila por índice único), luego el prefijo (``LIKE 'abc%'``, que con
+    la collation ``_ci`` de MySQL no distingue mayúsculas) y, si la búsqueda
+    tiene letras y nada coincidió, el índice FULLTEXT (nombre, ciudad...).
+    """
+
+    @staticmethod
+    def lookup(query, limit=CLIENT_LOOKUP_LIMIT):
+        query = (query or "").strip()
+        if not query:
+            return []
+
         logger = get_clients_logger()
-        with LogOperation("Obteniendo todos los clientes", logger):
-
-            all_clients = Search.search_default(Clients).order_by("name")
-            total_clients = Search.search_default(Clients).count()
-            logger.info(f"Total de clientes obtenidos: {total_clients}")
-
-            all_clients_dict: dict = {}
-
-            for cliente_detail in all_clients:
-                all_clients_dict[cliente_detail.id] = {
-                    "name": cliente_detail.name,
-                    "email": cliente_detail.email,
-                    "direction": cliente_detail.direction,
-                    "telephone": cliente_detail.telephone,
-                    "nit": cliente_detail.nit,
-                    "country": cliente_detail.country,
-                    "departament": cliente_detail.departament,
-                    "city": cliente_detail.city,
-                }
-        return all_clients
+        with LogOperation(f"Buscando cliente: {query}", logger, "clients.lookup"):
+            clients = ClientLookup.exact(query, limit)
+            if clients:
+                return clients
+
+            clients = list(ClientLookup.prefix_queryset(query)[:limit])
+            if not clients and any(char.isalpha() for char in query):
+                clients = list(FullTextSearch.filter(Clients.objects.all(), query)[:limit])
+            logger.debug(f"Clientes encontrados para '{query}': {len(clients)}")
+            return clients
+
+    @staticmethod
+    def exact(query, limit=CLIENT_LOOKUP_LIMIT):
+        """Clientes con ese correo, NIT o teléfono exacto"""
+        if "@" in query:
+            return list(Clients.objects.filter(email__iexact=query)[:1])
+
+        clients = list(Clients.objects.filter(nit=query)[:limit])
+        telephones = telephone_candidates(query)
+        if not clients and telephones:
+            clients = list(Clients.objects.filter(telephone__in=telephones)[:1])
+        return clients
+
+    @staticmethod
+    def prefix_queryset(query):
+        # Con letras puede ser correo o NIT (p. ej. terminado en K); sin
+        # letras, NIT o teléfono (guardado en formato E.164, +57...) con o
+        # sin el código de país
+        if any(char.isalpha() for char in query):
+            condition = Q(email__istartswith=query) | Q(nit__istartswith=query)
+        else:
+            condition = reduce(
+                or_,
+                (Q(telephone__startswith=telephone) for telephone in telephone_candidates(query)),
+                Q(nit__startswith=query),
+            )
+        return Clients.objects.filter(condition).order_by("email")
+
+    @staticmethod
+    def by_email(email, fields=None):
+        """Un cliente por correo exacto (índice único), solo con ``fields``"""
+        if not email:
+            return None
+        clients = Clients.objects.filter(email__iexact=email)
+        if fields:
+            clients = clients.only(*fields)
+        return clients.first()
@@ -0,0 +1,381 @@
+from datetime import timedelta
+
+from asgiref.sync import sync_to_async
+from django.core.cache import cache
+from django.db.models import Count, Q, Sum
+from django.db.models.functions import Coalesce, TruncDay, TruncMonth, TruncWeek
+from django.utils import timezone
+
+from .. import models
+from .. import constants as const
+from ..db_router import read_from_replica
+from ..logging_config import get_logger, LogOperation
+from ..services.sell_service import SalesAnalytics
+from ..services.stock_service import StockThresholds
+
+CHART_GROUPINGS = {"day": TruncDay, "week": TruncWeek, "month": TruncMonth}
+
+PAYMENT_COLORS = ["#007bff", "#28a745", "#ffc107", "#dc3545", "#17a2b8", "#6f42c1"]
+
+# Tiempo de vida en cache de cada widget
+WIDGET_TIMEOUTS = {
+    "kpis": const.CACHE_TIMEOUT_SHORT,
+    "sales_chart": const.CACHE_TIMEOUT_SHORT,
+    "products_performance": const.CACHE_TIMEOUT_MEDIUM,
+    "payment_methods": const.CACHE_TIMEOUT_SHORT,
+    "recent_activities": const.CACHE_TIMEOUT_MINUTE,
+    "alerts": const.CACHE_TIMEOUT_MINUTE,
+}
+
+
+def growth(current, previous):
+    """Variación porcentual entre dos periodos"""
+    if not previous:
+        return 100.0 if current else 0.0
+    return round((current - previous) / previous * 100, 1)
+
+
+class DashboardService:
+    """
+    Datos del dashboard principal
+
+    Cada widget se calcula con consultas agregadas (sobre los rollups diarios
+    cuando es posible) y se guarda en cache con su propia clave y tiempo de
+    vida. ``get_dashboard_summary`` lee todas las claves con un solo
+    ``get_many`` y solo recalcula los widgets que faltan.
+    """
+
+    @staticmethod
+    def cache_key(widget, *args):
+        return const.CACHE_KEY_DASHBOARD.format("_".join([widget, *map(str, args)]))
+
+    @staticmethod
+    def cached(widget, args):
+        key = DashboardService.cache_key(widget, *args)
+        data = cache.get(key)
+        if data is None:
+            data = WIDGET_BUILDERS[widget](*args)
+            cache.set(key, data, WIDGET_TIMEOUTS[widget])
+        return data
+
+    @staticmethod
+    def get_main_kpis(days=30):
+        return DashboardService.cached("kpis", (days,))
+
+    @staticmethod
+    @read_from_replica()
+    def build_main_kpis(days):
+        today = timezone.localdate()
+        start = today - timedelta(days=days - 1)
+        previous_start = start - timedelta(days=days)
+
+        # Periodo actual y anterior en una sola consulta
+        current = Q(date__gte=start)
+        previous = Q(date__lt=start)
+        sales = models.DailySalesRollup.objects.filter(
+            date__gte=previous_start, date__lte=today
+        ).aggregate(
+            current_sales=Coalesce(Sum("sells_count", filter=current), 0),
+            current_revenue=Sum("revenue", filter=current),
+            previous_sales=Coalesce(Sum("sells_count", filter=previous), 0),
+            previous_revenue=Sum("revenue", filter=previous),
+        )
+        total_sales = sales["current_sales"]
+        revenue = float(sales["current_revenue"] or 0)
+        previous_revenue = float(sales["previous_revenue"] or 0)
+
+        low_stock = models.Stock.objects.aggregate(
+            count=Count("idstock", filter=StockThresholds.low_stock_q())
+        )["count"]
+
+        return {
+            "total_sales": total_sales,
+            "total_revenue": revenue,
+            "average_sale": revenue / total_sales if total_sales else 0.0,
+            "total_products": models.Products.objects.count(),
+            "low_stock_products": low_stock,
+            "total_clients": models.Clients.objects.count(),
+            "sales_growth": growth(total_sales, sales["previous_sales"]),
+            "revenue_growth": growth(revenue, previous_revenue),
+            "period_days": days,
+        }
+
+    @staticmethod
+    def get_sales_chart_data(days=30, grouping="day"):
+        return DashboardService.cached("sales_chart", (days, grouping))
+
+    @staticmethod
+    @read_from_replica()
+    def build_sales_chart_data(days, grouping):
+        if grouping not in CHART_GROUPINGS:
+            raise ValueError(f"Agrupación no soportada: {grouping}")
+        today = timezone.localdate()
+        start = today - timedelta(days=days - 1)
+        rows = {
+            row["period"]: row
+            for row in models.DailySalesRollup.objects.filter(
+                date__gte=start, date__lte=today
+            )
+            .annotate(period=CHART_GROUPINGS[grouping]("date"))
+            .values("period")
+            .annotate(sales=Sum("sells_count"), revenue=Sum("revenue"))
+        }
+
+        # Periodos sin ventas se muestran en cero
+        periods = []
+        day = start
+        while day <= today:
+            if grouping == "week":
+                period = day - timedelta(days=day.weekday())
+            elif grouping == "month":
+                period = day.replace(day=1)
+            else:
+                period = day
+            if not periods or periods[-1] != period:
+                periods.append(period)
+            day += timedelta(days=1)
+
+        return {
+            "labels": [period.isoformat() for period in periods],
+            "datasets": [
+                {
+                    "label": "Ventas",
+                    "data": [rows[p]["sales"] if p in rows else 0 for p in periods],
+                    "borderColor": "#28a745",
+                    "yAxisID": "y",
+                },
+                {
+                    "label": "Ingresos",
+                    "data": [
+                        float(rows[p]["revenue"]) if p in rows else 0.0 for p in periods
+                    ],
+                    "borderColor": "#007bff",
+                    "yAxisID": "y1",
+                },
+            ],
+        }
+
+    @staticmethod
+    def get_products_performance(limit=10):
+        return DashboardService.cached("products_performance", (limit,))
+
+    @staticmethod
+    @read_from_replica()
+    def build_products_performance(limit, days=30):
+        start = timezone.localdate() - timedelta(days=days - 1)
+        top_products = (
+            models.DailyProductSalesRollup.objects.filter(date__gte=start)
+            .values("id_product", "id_product__name")
+            .annotate(quantity_sold=Sum("units"), revenue=Sum("revenue"))
+            .order_by("-quantity_sold", "id_product")[:limit]
+        )
+        return {
+            "top_products": [
+                {
+                    "idproducts": row["id_product"],
+                    "name": row["id_product__name"],
+                    "quantity_sold": row["quantity_sold"],
+                    "revenue": float(row["revenue"]),
+                }
+                for row in top_products
+            ],
+            "low_stock_products": SalesAnalytics.get_low_stock_products(limit),
+        }
+
+    @staticmethod
+    def get_payment_methods_chart(days=30):
+        return DashboardService.cached("payment_methods", (days,))
+
+    @staticmethod
+    @read_from_replica()
+    def build_payment_methods_chart(days):
+        start = timezone.localdate() - timedelta(days=days - 1)
+        rows = list(
+            models.DailySalesRollup.objects.filter(date__gte=start)
+            .values("type_pay")
+            .annotate(count=Sum("sells_count"))
+            .order_by("-count", "type_pay")
+        )
+        return {
+            "labels": [row["type_pay"] for row in rows],
+            "datasets": [
+                {
+                    "data": [row["count"] for row in rows],
+                    "backgroundColor": [
+                        PAYMENT_COLORS[i % len(PAYMENT_COLORS)] for i in range(len(rows))
+                    ],
+                }
+            ],
+        }
+
+    @staticmethod
+    def get_recent_activities(limit=10):
+        return DashboardService.cached("recent_activities", (limit,))
+
+    @staticmethod
+    @read_from_replica()
+    def build_recent_activities(limit):
+        registers = models.RegistersellDetail.objects.order_by("-date").values(
+            "idsell", "date", "id_employed", "total_sell", "type_pay", "state_sell"
+        )[:limit]
+        return [
+            {
+                "type": "sale",
+                "id": register["idsell"],
+                "description": (
+                    f"Venta #{register['idsell']} por {register['id_employed']} "
+                    f"({register['type_pay']}, {register['state_sell']})"
+                ),
+                "amount": float(register["total_sell"]),
+                "timestamp": timezone.localtime(register["date"]).strftime(
+                    "%Y-%m-%d %H:%M"
+                ),
+            }
+            for register in registers
+        ]
+
+    @staticmethod
+    def get_alerts_and_notifications():
+        return DashboardService.cached("alerts", ())
+
+    @staticmethod
+    @read_from_replica()
+    def build_alerts_and_notifications():
+        alerts = []
+        stock = models.Stock.objects.aggregate(
+            out_of_stock=Count("idstock", filter=Q(quantitystock=0)),
+            low_stock=Count(
+                "idstock",
+                filter=Q(quantitystock__gt=0) & StockThresholds.low_stock_q(),
+            ),
+        )
+
+        if stock["out_of_stock"]:
+            alerts.append(
+                {
+                    "type": "danger",
+                    "priority": "high",
+                    "title": "Sin stock",
+                    "message": f"{stock['out_of_stock']} productos sin stock",
+                    "action": "Registrar entrada de inventario",
+                }
+            )
+        if stock["low_stock"]:
+            alerts.append(
+                {
+                    "type": "warning",
+                    "priority": "medium",
+                    "title": "Stock bajo",
+                    "message": f"{stock['low_stock']} productos con stock bajo",
+                    "action": "Revisar pedidos a proveedores",
+                }
+            )
+
+        today_sales = models.DailySalesRollup.objects.filter(
+            date=timezone.localdate()
+        ).exists()
+        if not today_sales:
+            alerts.append(
+                {
+                    "type": "info",
+                    "priority": "low",
+                    "title": "Ventas",
+                    "message": "Aún no hay ventas registradas hoy",
+                    "action": "",
+                }
+            )
+        return alerts
+
+    @staticmethod
+    def summary_widgets(days=30, chart_days=7, limit=10):
+        """Argumentos de cada widget incluido en el resumen"""
+        return {
+            "kpis": (days,),
+            "sales_chart": (chart_days, "day"),
+            "products_performance": (limit,),
+            "payment_methods": (days,),
+            "recent_activities": (limit,),
+            "alerts": (),
+        }
+
+    @staticmethod
+    def build_widgets(widgets):
+        return {widget: WIDGET_BUILDERS[widget](*args) for widget, args in widgets.items()}
+
+    @staticmethod
+    def values_by_timeout(keys, built):
+        """Widgets recién calculados agrupados por tiempo de vida (un set_many cada uno)"""
+        values = {}
+        for widget, data in built.items():
+            values.setdefault(WIDGET_TIMEOUTS[widget], {})[keys[widget]] = data
+        return values
+
+    @staticmethod
+    def get_dashboard_summary(days=30, chart_days=7, limit=10):
+        """Todos los widgets del dashboard con una sola lectura de cache"""
+        logger = get_logger("dashboard")
+        widgets = DashboardService.summary_widgets(days, chart_days, limit)
+
+        with LogOperation("Generando resumen del dashboard", logger, "dashboard.summary"):
+            keys = {
+                widget: DashboardService.cache_key(widget, *args)
+                for widget, args in widgets.items()
+            }
+            cached = cache.get_many(keys.values())
+            built = DashboardService.build_widgets(
+                {w: args for w, args in widgets.items() if keys[w] not in cached}
+            )
+            for timeout, values in DashboardService.values_by_timeout(keys, built).items():
+                cache.set_many(values, timeout)
+
+            summary = {w: cached[keys[w]] if w not in built else built[w] for w in widgets}
+            summary["generated_at"] = timezone.localtime().isoformat()
+            return summary
+
+    @staticmethod
+    async def aget_dashboard_summary(days=30, chart_days=7, limit=10):
+        """
+        Versión async de ``get_dashboard_summary`` para vistas ASGI
+
+        Lectura de cache y widgets que faltan en una sola llamada
+        ``sync_to_async``: la lógica del resumen vive en un solo lugar.
+        """
+        return await sync_to_async(DashboardService.get_dashboard_summary)(
+            days, chart_days, limit
+        )
+
+    @staticmethod
+    def get_widget(widget, *args):
+        """Un widget del dashboard desde cache"""
+        return DashboardService.cached(widget, args)
+
+    @staticmethod
+    async def aget_widget(widget, *args):
+        """Un widget del dashboard desde cache async"""
+        key = DashboardService.cache_key(widget, *args)
+        data = await cache.aget(key)
+        if data is None:
+            data = await sync_to_async(WIDGET_BUILDERS[widget])(*args)
+            await cache.aset(key, data, WIDGET_TIMEOUTS[widget])
+        return data
+
+    @staticmethod
+    def get_realtime_stats():
+        """Ventas del día desde el resumen diario incremental"""
+        summary = SalesAnalytics.get_daily_summary()
+        return {
+            "date": summary["date"],
+            "total_sales": summary["total_orders"],
+            "total_revenue": summary["total_sales"],
+            "average_sale": summary["average_order_value"],
+        }
+
+
+WIDGET_BUILDERS = {
+    "kpis": DashboardService.build_main_kpis,
+    "sales_chart": DashboardService.build_sales_chart_data,
+    "products_performance": DashboardService.build_products_performance,
+    "payment_methods": DashboardService.build_payment_methods_chart,
+    "recent_activities": DashboardService.build_recent_activities,
+    "alerts": DashboardService.build_alerts_and_notifications,
+}
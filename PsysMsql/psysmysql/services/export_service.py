@@ -0,0 +1,271 @@
+"""
+Exportación del historial de ventas a Parquet para análisis fuera de línea
+
+``SalesExport.export`` recorre ``register_sells_archive`` y ``register_sells``
+en orden de ``idsell`` por lotes (keyset, sin OFFSET) y escribe dos datasets
+particionados por fecha local al estilo Hive:
+
+    <destino>/sales/date=2025-01-31/part-0000012345.parquet
+    <destino>/sale_lines/date=2025-01-31/part-0000012345.parquet
+
+``sale_lines`` tiene una fila por producto de ``detail_sell``. La marca de
+agua (último ``idsell`` exportado) se guarda en ``<destino>/_export_state.json``
+después de cada lote: la siguiente ejecución solo exporta ventas nuevas y, si
+un lote se interrumpe, se vuelve a escribir con los mismos nombres de archivo.
+
+InnoDB asigna el ``idsell`` al insertar, no al confirmar: una venta con id
+menor puede confirmarse después de otra con id mayor. Por eso la exportación
+se detiene en la primera venta de los últimos ``SALES_EXPORT_SETTLE_MINUTES``
+y la marca de agua nunca pasa por encima de una venta que aún puede no ser
+visible.
+
+Los analistas leen los archivos con pandas o duckdb sin tocar la base de datos:
+
+    pandas.read_parquet("exports/sales/sales")
+    duckdb.sql("SELECT * FROM read_parquet('exports/sales/sales/*/*.parquet', hive_partitioning=1)")
+
+Usage:
+    SalesExport.export(settings.SALES_EXPORT_DIR)
+"""
+
+import json
+import os
+import shutil
+from datetime import timedelta
+from pathlib import Path
+
+from django.utils import timezone
+
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from .. import models
+from ..constants import SALES_EXPORT_CHUNK_SIZE, SALES_EXPORT_SETTLE_MINUTES
+from ..logging_config import get_sell_logger, LogOperation
+from ..services.rollup_service import parse_detail_sell
+
+STATE_FILE = "_export_state.json"
+
+SALE_FIELDS = (
+    "idsell",
+    "date",
+    "id_employed",
+    "total_sell",
+    "type_pay",
+    "state_sell",
+    "notes",
+    "quantity_pay",
+    "detail_sell",
+)
+
+MONEY = pa.decimal128(10, 2)
+SALES_SCHEMA = pa.schema(
+    [
+        ("idsell", pa.int64()),
+        ("sold_at", pa.timestamp("us", tz="UTC")),
+        ("id_employed", pa.string()),
+        ("total_sell", MONEY),
+        ("type_pay", pa.string()),
+        ("state_sell", pa.string()),
+        ("notes", pa.string()),
+        ("quantity_pay", MONEY),
+        ("items", pa.int32()),
+        ("units", pa.int32()),
+    ]
+)
+LINES_SCHEMA = pa.schema(
+    [
+        ("idsell", pa.int64()),
+        ("sold_at", pa.timestamp("us", tz="UTC")),
+        ("id_product", pa.int64()),
+        ("name", pa.string()),
+        ("price", pa.float64()),
+        ("quantity", pa.int32()),
+        ("pricexquantity", pa.float64()),
+    ]
+)
+
+
+def to_int(value):
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return 0
+
+
+def to_float(value):
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return 0.0
+
+
+def sale_rows(register, product_ids):
+    """
+    Fila de ``sales`` y filas de ``sale_lines`` de una venta
+
+    Las ventas antiguas no guardan ``id_product`` en el detalle: se resuelve
+    por nombre con ``product_ids`` ({nombre: id}), o queda vacío.
+    """
+    lines = parse_detail_sell(register["detail_sell"])
+    sale = {
+        "idsell": register["idsell"],
+        "sold_at": register["date"],
+        "id_employed": register["id_employed"],
+        "total_sell": register["total_sell"],
+        "type_pay": register["type_pay"],
+        "state_sell": register["state_sell"],
+        "notes": register["notes"],
+        "quantity_pay": register["quantity_pay"],
+        "items": len(lines),
+        "units": sum(to_int(line.get("quantity")) for line in lines),
+    }
+    line_rows = [
+        {
+            "idsell": register["idsell"],
+            "sold_at": register["date"],
+            "id_product": to_int(line.get("id_product")) or product_ids.get(line["name"]),
+            "name": line["name"],
+            "price": to_float(line.get("price")),
+            "quantity": to_int(line.get("quantity")),
+            "pricexquantity": to_float(line.get("pricexquantity")),
+        }
+        for line in lines
+    ]
+    return sale, line_rows
+
+
+def by_local_date(rows):
+    """Agrupa filas ordenadas por ``idsell`` en {fecha local: filas}"""
+    groups = {}
+    for row in rows:
+        groups.setdefault(timezone.localtime(row["sold_at"]).date(), []).append(row)
+    return groups
+
+
+class SalesExport:
+
+    @staticmethod
+    def read_state(destination):
+        """Marca de agua de ``destination`` (``{"last_idsell": 0}`` la primera vez)"""
+        path = Path(destination) / STATE_FILE
+        if not path.exists():
+            return {"last_idsell": 0}
+        return json.loads(path.read_text())
+
+    @staticmethod
+    def write_state(destination, state):
+        path = Path(destination) / STATE_FILE
+        temporary = path.with_suffix(".tmp")
+        temporary.write_text(json.dumps(state, indent=2))
+        os.replace(temporary, path)
+
+    @staticmethod
+    def batches(since, chunk_size, before=None):
+        """
+        Lotes de ventas con ``idsell > since`` en orden de id
+
+        El archivo va primero: sus ids son anteriores a los de la tabla viva.
+        Cada lote es una consulta por rango de clave primaria; el backend de
+        MySQL carga el resultado completo de un ``iterator()`` en memoria, así
+        que es el tamaño del lote lo que acota el consumo. Con ``before`` se
+        detiene en la primera venta con fecha igual o posterior.
+        """
+        for model in (models.RegistersellArchive, models.RegistersellDetail):
+            last = since
+            while True:
+                batch = list(
+                    model.objects.filter(idsell__gt=last)
+                    .order_by("idsell")
+                    .values(*SALE_FIELDS)[:chunk_size]
+                )
+                if not batch:
+                    break
+                if before is not None:
+                    settled = 0
+                    while settled < len(batch) and batch[settled]["date"] < before:
+                        settled += 1
+                    if settled < len(batch):
+                        if settled:
+                            yield batch[:settled]
+                        return
+                yield batch
+                last = batch[-1]["idsell"]
+
+    @staticmethod
+    def write_partition(root, day, rows, schema):
+        """Escribe ``rows`` en ``root/date=<day>/part-<primer idsell>.parquet``"""
+        directory = Path(root) / f"date={day:%Y-%m-%d}"
+        directory.mkdir(parents=True, exist_ok=True)
+        path = directory / f"part-{rows[0]['idsell']:010d}.parquet"
+        temporary = path.with_suffix(".tmp")
+        table = pa.Table.from_pylist(rows, schema=schema)
+        pq.write_table(table, temporary, compression="zstd")
+        os.replace(temporary, path)
+        return path
+
+    @staticmethod
+    def export(
+        destination,
+        chunk_size=SALES_EXPORT_CHUNK_SIZE,
+        full=False,
+        settle_minutes=SALES_EXPORT_SETTLE_MINUTES,
+    ):
+        """
+        Exporta las ventas posteriores a la marca de agua de ``destination``
+
+        Con ``full=True`` borra los datasets y vuelve a exportar todo. Las
+        ventas de los últimos ``settle_minutes`` quedan para la siguiente
+        ejecución.
+
+        Returns:
+            dict: ventas, líneas y archivos escritos y la nueva marca de agua
+        """
+        logger = get_sell_logger()
+        destination = Path(destination)
+        destination.mkdir(parents=True, exist_ok=True)
+        if full:
+            for dataset in ("sales", "sale_lines"):
+                shutil.rmtree(destination / dataset, ignore_errors=True)
+        state = {"last_idsell": 0} if full else SalesExport.read_state(destination)
+        result = {"sales": 0, "lines": 0, "files": 0, "last_idsell": state["last_idsell"]}
+
+        with LogOperation(
+            f"Exportando ventas a Parquet desde idsell>{state['last_idsell']}",
+            logger,
+            "sells.export_parquet",
+        ):
+            product_ids = dict(models.Products.objects.values_list("name", "idproducts"))
+            before = timezone.now() - timedelta(minutes=settle_minutes)
+
+            for batch in SalesExport.batches(state["last_idsell"], chunk_size, before):
+                sales, lines = [], []
+                for register in batch:
+                    sale, line_rows = sale_rows(register, product_ids)
+                    sales.append(sale)
+                    lines.extend(line_rows)
+
+                for root, rows, schema in (
+                    (destination / "sales", sales, SALES_SCHEMA),
+                    (destination / "sale_lines", lines, LINES_SCHEMA),
+                ):
+                    for day, day_rows in by_local_date(rows).items():
+                        SalesExport.write_partition(root, day, day_rows, schema)
+                        result["files"] += 1
+
+                result["sales"] += len(sales)
+                result["lines"] += len(lines)
+                result["last_idsell"] = batch[-1]["idsell"]
+                SalesExport.write_state(
+                    destination,
+                    {
+                        "last_idsell": result["last_idsell"],
+                        "exported_at": timezone.now().isoformat(),
+                    },
+                )
+
+            logger.info(
+                f"Exportación Parquet: {result['sales']} ventas, {result['lines']} "
+                f"líneas, {result['files']} archivos (idsell<={result['last_idsell']})"
+            )
+            return result
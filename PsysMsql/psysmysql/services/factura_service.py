@@ -4,8 +4,7 @@ from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph,
 from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
 from reportlab.lib.units import cm
 from datetime import date
-from psysmysql.models import Clients
-from ..services.search_orm import Search
+from ..services.clients_service import ClientLookup
 from ..constants import IVA_RATE
 from io import BytesIO
 import datetime
@@ -17,8 +16,9 @@ class GetDataClientForBill:
         date_now = datetime.datetime.now()
         number_bill = date_now.strftime("%Y-%m-%d %H:%M:%S")
         client_list: list = []
-        client = Search.filter(Clients, "email", email)
-        for client_info in client:
+        # Correo único: una fila por índice, solo las columnas de la factura
+        client_info = ClientLookup.by_email(email, fields=("name", "direction"))
+        if client_info is not None:
             client_list.append(
                 {
                     "name": client_info.name,
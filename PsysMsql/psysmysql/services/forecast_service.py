@@ -0,0 +1,166 @@
+"""
+Pronóstico de demanda y puntos de reorden por producto
+
+El lote nocturno ``update_stock_forecasts`` arma una matriz productos × días
+con las unidades de ``DailyProductSalesRollup`` (``FORECAST_HISTORY_DAYS``
+hasta ayer) y calcula para todos los productos a la vez:
+
+    demanda diaria  = suavizado exponencial (EWMA, ``FORECAST_ALPHA``)
+    stock seguridad = z · desviación diaria · √(tiempo de entrega)
+    punto reorden   = demanda · tiempo de entrega + stock de seguridad (mínimo 1)
+    días cobertura  = stock actual / demanda
+
+El resultado se guarda en ``StockForecast`` y ``reorder_point`` pasa a ser el
+umbral de stock bajo de cada producto (``StockThresholds``).
+
+Usage:
+    StockForecasting.update()
+"""
+
+from datetime import timedelta
+
+import numpy as np
+from django.db import connection, transaction
+from django.utils import timezone
+
+from .. import models
+from .. import constants as const
+from ..logging_config import get_logger, LogOperation
+
+
+def ewma(matrix, alpha):
+    """
+    Último nivel del suavizado exponencial de cada fila
+
+    Forma cerrada de ``nivel = alpha * x + (1 - alpha) * nivel`` empezando en
+    la primera columna: un producto matriz-vector para todas las filas.
+    """
+    days = matrix.shape[1]
+    weights = alpha * (1 - alpha) ** np.arange(days - 1, -1, -1, dtype=np.float64)
+    weights[0] = (1 - alpha) ** (days - 1)
+    return matrix @ weights
+
+
+def reorder_points(demand, deviation, lead_time, z):
+    """Stock de seguridad y punto de reorden (enteros, reorden mínimo 1)"""
+    # Redondeo previo: el error de punto flotante no debe sumar una unidad
+    safety = np.ceil(np.round(z * deviation * np.sqrt(lead_time), 6))
+    reorder = np.maximum(np.ceil(np.round(demand * lead_time + safety, 6)), 1)
+    return safety.astype(np.int64), reorder.astype(np.int64)
+
+
+class StockForecasting:
+
+    @staticmethod
+    def demand_matrix(product_ids, start_date, days):
+        """Unidades vendidas por producto (filas, en orden de ``product_ids``) y día"""
+        matrix = np.zeros((product_ids.size, days), dtype=np.float64)
+        rows = list(
+            models.DailyProductSalesRollup.objects.filter(
+                date__gte=start_date, date__lt=start_date + timedelta(days=days)
+            )
+            .order_by()
+            .values_list("id_product", "date", "units")
+        )
+        if rows:
+            products, dates, units = zip(*rows)
+            products = np.asarray(products, dtype=np.int64)
+            positions = np.searchsorted(product_ids, products)
+            # Un producto que no está en ``product_ids`` (borrado después de
+            # leerlos) caería en la fila del siguiente id: se descarta
+            found = positions < product_ids.size
+            found[found] = product_ids[positions[found]] == products[found]
+            np.add.at(
+                matrix,
+                (
+                    positions[found],
+                    np.array([(date - start_date).days for date in dates])[found],
+                ),
+                np.asarray(units)[found],
+            )
+        return matrix
+
+    @staticmethod
+    def update(as_of=None, history_days=const.FORECAST_HISTORY_DAYS):
+        """
+        Recalcula ``StockForecast`` para todos los productos
+
+        ``as_of`` es el último día de historial (por defecto ayer).
+
+        Returns:
+            int: productos pronosticados
+        """
+        logger = get_logger("stock")
+        as_of = as_of or timezone.localdate() - timedelta(days=1)
+        start_date = as_of - timedelta(days=history_days - 1)
+
+        with LogOperation(
+            f"Pronosticando demanda {start_date} - {as_of}",
+            logger,
+            "stock.forecast",
+        ):
+            # Productos, stock y rollups de una misma foto (REPEATABLE READ)
+            with transaction.atomic():
+                product_ids = np.fromiter(
+                    models.Products.objects.order_by("idproducts").values_list(
+                        "idproducts", flat=True
+                    ),
+                    dtype=np.int64,
+                )
+                if not product_ids.size:
+                    return 0
+                stock = dict(
+                    models.Stock.objects.values_list("id_products", "quantitystock")
+                )
+                matrix = StockForecasting.demand_matrix(
+                    product_ids, start_date, history_days
+                )
+            quantities = np.array(
+                [stock.get(product_id, 0) for product_id in product_ids.tolist()],
+                dtype=np.float64,
+            )
+
+            demand = ewma(matrix, const.FORECAST_ALPHA)
+            deviation = matrix.std(axis=1)
+            safety, reorder = reorder_points(
+                demand, deviation, const.FORECAST_LEAD_TIME_DAYS, const.FORECAST_SERVICE_Z
+            )
+            with np.errstate(divide="ignore", invalid="ignore"):
+                cover = np.where(demand > 0, quantities / demand, np.nan)
+
+            models.StockForecast.objects.bulk_create(
+                (
+                    models.StockForecast(
+                        id_product_id=product_id,
+                        daily_demand=round(float(demand[i]), 4),
+                        demand_std=round(float(deviation[i]), 4),
+                        safety_stock=int(safety[i]),
+                        reorder_point=int(reorder[i]),
+                        days_of_cover=None if np.isnan(cover[i]) else round(float(cover[i]), 1),
+                        computed_on=as_of,
+                    )
+                    for i, product_id in enumerate(product_ids.tolist())
+                ),
+                batch_size=2000,
+                update_conflicts=True,
+                # MySQL resuelve el conflicto con ON DUPLICATE KEY, sin columnas
+                unique_fields=(
+                    ["id_product"]
+                    if connection.features.supports_update_conflicts_with_target
+                    else None
+                ),
+                update_fields=[
+                    "daily_demand",
+                    "demand_std",
+                    "safety_stock",
+                    "reorder_point",
+                    "days_of_cover",
+                    "computed_on",
+                ],
+            )
+
+            logger.info(
+                f"Pronóstico de stock: {product_ids.size} productos, "
+                f"{int((quantities < reorder).sum())} por debajo del punto de reorden"
+            )
+            return int(product_ids.size)
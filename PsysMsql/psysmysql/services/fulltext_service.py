@@ -0,0 +1,107 @@
+"""
+Búsqueda de texto completo sobre los índices FULLTEXT de MySQL
+
+Cada palabra de la búsqueda con al menos ``FULLTEXT_MIN_TERM_LENGTH``
+caracteres se convierte en un término obligatorio con prefijo
+(``+cafe*``) de ``MATCH ... AGAINST`` en modo booleano y los resultados se
+ordenan por relevancia. Las palabras más cortas (que InnoDB no indexa) y
+las bases sin FULLTEXT (SQLite en desarrollo y tests) usan ``icontains``.
+
+Usage:
+    FullTextSearch.filter(Products.objects.all(), "cafe con leche")
+"""
+
+import re
+from functools import reduce
+from operator import or_
+
+from django.db import connections
+from django.db.models import FloatField, Q
+from django.db.models.expressions import RawSQL
+
+from ..constants import FULLTEXT_MIN_TERM_LENGTH
+
+WORD = re.compile(r"\w+")
+
+# Columnas de los índices FULLTEXT (migración 0004_fulltext_indexes)
+FULLTEXT_INDEXES = {
+    "Products": ("name", "description"),
+    "clients": (
+        "name",
+        "email",
+        "direction",
+        "telephone",
+        "nit",
+        "country",
+        "departament",
+        "city",
+    ),
+}
+
+
+class FullTextSearch:
+
+    @staticmethod
+    def split_terms(query):
+        """(palabras para MATCH, palabras cortas para icontains)"""
+        words = WORD.findall(query or "")
+        long_words = [word for word in words if len(word) >= FULLTEXT_MIN_TERM_LENGTH]
+        short_words = [word for word in words if len(word) < FULLTEXT_MIN_TERM_LENGTH]
+        return long_words, short_words
+
+    @staticmethod
+    def boolean_query(words):
+        # WORD ya descarta los operadores del modo booleano (+ - * " ~ < > @)
+        return " ".join(f"+{word}*" for word in words)
+
+    @staticmethod
+    def supported(queryset):
+        """``MATCH ... AGAINST`` solo existe en MySQL"""
+        return connections[queryset.db].vendor == "mysql"
+
+    @staticmethod
+    def match(queryset, fields, words):
+        """Expresión ``MATCH (cols) AGAINST (%s IN BOOLEAN MODE)``"""
+        model = queryset.model
+        connection = connections[queryset.db]
+        table = connection.ops.quote_name(model._meta.db_table)
+        columns = ", ".join(
+            f"{table}.{connection.ops.quote_name(model._meta.get_field(field).column)}"
+            for field in fields
+        )
+        return RawSQL(
+            f"MATCH ({columns}) AGAINST (%s IN BOOLEAN MODE)",
+            [FullTextSearch.boolean_query(words)],
+            output_field=FloatField(),
+        )
+
+    @staticmethod
+    def filter(queryset, query, like_fields=None, order_by_relevance=True):
+        """
+        Filtra ``queryset`` por ``query``
+
+        ``like_fields`` son los campos de la búsqueda ``icontains`` (por
+        defecto las columnas del índice FULLTEXT del modelo).
+        """
+        table = queryset.model._meta.db_table
+        fields = FULLTEXT_INDEXES.get(table)
+        like_fields = like_fields or fields
+        if not like_fields:
+            raise ValueError(f"{table} no tiene índice FULLTEXT: indique like_fields")
+        long_words, short_words = FullTextSearch.split_terms(query)
+        if not fields or not FullTextSearch.supported(queryset):
+            long_words, short_words = [], long_words + short_words
+
+        for word in short_words:
+            queryset = queryset.filter(
+                reduce(or_, (Q(**{f"{field}__icontains": word}) for field in like_fields))
+            )
+
+        if long_words:
+            queryset = queryset.annotate(
+                relevance=FullTextSearch.match(queryset, fields, long_words)
+            ).filter(relevance__gt=0)
+            if order_by_relevance:
+                queryset = queryset.order_by("-relevance", *queryset.query.order_by)
+
+        return queryset
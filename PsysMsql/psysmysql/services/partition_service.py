@@ -0,0 +1,166 @@
+"""
+Particiones mensuales de ``register_sells`` (solo MySQL)
+
+La tabla está particionada por ``RANGE (TO_DAYS(date))`` con una partición
+por mes (``p202501`` guarda las ventas anteriores al 2025-02-01) y una
+partición final ``p_future`` (``MAXVALUE``). Las consultas con rango de
+fechas solo leen las particiones del rango (partition pruning) y el
+archivado elimina meses completos con ``DROP PARTITION`` en vez de borrar
+fila por fila.
+
+``manage.py manage_sell_partitions`` mantiene creadas las particiones de los
+próximos meses; si una venta cae en ``p_future`` no se pierde, pero ese mes
+deja de beneficiarse del pruning.
+
+Usage:
+    SellPartitions.ensure_future(months_ahead=3)
+    SellPartitions.drop_before(SalesArchive.cutoff())
+"""
+
+from datetime import date, datetime, timezone as dt_timezone
+
+from django.db import connection
+from django.utils import timezone
+
+from .. import models
+from ..constants import PARTITION_MONTHS_AHEAD
+from ..logging_config import get_sell_logger, LogOperation
+
+FUTURE_PARTITION = "p_future"
+
+
+def month_start(day):
+    return date(day.year, day.month, 1)
+
+
+def add_months(month, months):
+    index = month.year * 12 + month.month - 1 + months
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def partition_name(month):
+    """Partición de las ventas del mes ``month``"""
+    return f"p{month:%Y%m}"
+
+
+def upper_bound(month):
+    """Primer instante (UTC) fuera de la partición del mes"""
+    upper = add_months(month, 1)
+    return datetime(upper.year, upper.month, 1, tzinfo=dt_timezone.utc)
+
+
+def partition_clause(month):
+    upper = add_months(month, 1)
+    return (
+        f"PARTITION {partition_name(month)} "
+        f"VALUES LESS THAN (TO_DAYS('{upper:%Y-%m-%d}'))"
+    )
+
+
+class SellPartitions:
+    table = models.RegistersellDetail._meta.db_table
+
+    @staticmethod
+    def supported():
+        return connection.vendor == "mysql"
+
+    @staticmethod
+    def existing():
+        """Meses con partición propia, en orden"""
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "SELECT PARTITION_NAME FROM information_schema.PARTITIONS "
+                "WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = %s "
+                "AND PARTITION_NAME IS NOT NULL ORDER BY PARTITION_ORDINAL_POSITION",
+                [SellPartitions.table],
+            )
+            names = [row[0] for row in cursor.fetchall()]
+        return [
+            date(int(name[1:5]), int(name[5:7]), 1)
+            for name in names
+            if name != FUTURE_PARTITION
+        ]
+
+    @staticmethod
+    def ensure_future(months_ahead=PARTITION_MONTHS_AHEAD, today=None):
+        """
+        Crea las particiones mensuales que falten hasta ``months_ahead``
+        meses después del actual, dividiendo ``p_future``
+
+        Returns:
+            list: nombres de las particiones creadas
+        """
+        if not SellPartitions.supported():
+            return []
+        logger = get_sell_logger()
+
+        with LogOperation(
+            "Creando particiones futuras de register_sells",
+            logger,
+            "sells.partitions_ensure",
+        ):
+            existing = SellPartitions.existing()
+            if not existing:
+                logger.warning("register_sells no está particionada (migración 0008)")
+                return []
+
+            last_month = add_months(month_start(today or timezone.localdate()), months_ahead)
+            month = add_months(existing[-1], 1)
+            missing = []
+            while month <= last_month:
+                missing.append(month)
+                month = add_months(month, 1)
+            if not missing:
+                return []
+
+            clauses = ", ".join(partition_clause(month) for month in missing)
+            with connection.cursor() as cursor:
+                cursor.execute(
+                    f"ALTER TABLE {connection.ops.quote_name(SellPartitions.table)} "
+                    f"REORGANIZE PARTITION {FUTURE_PARTITION} INTO ({clauses}, "
+                    f"PARTITION {FUTURE_PARTITION} VALUES LESS THAN MAXVALUE)"
+                )
+            names = [partition_name(month) for month in missing]
+            logger.info(f"Particiones creadas: {', '.join(names)}")
+            return names
+
+    @staticmethod
+    def drop_before(cutoff):
+        """
+        Elimina las particiones cuyo mes completo es anterior a ``cutoff``
+
+        Los límites de las particiones están en UTC (``date`` se guarda en
+        UTC); solo se eliminan las que terminan antes de ``cutoff`` y
+        únicamente si ya no les quedan ventas (se archivaron antes).
+
+        Returns:
+            list: nombres de las particiones eliminadas
+        """
+        if not SellPartitions.supported():
+            return []
+        months = [
+            month
+            for month in SellPartitions.existing()
+            if upper_bound(month) <= cutoff
+        ]
+        if not months:
+            return []
+
+        logger = get_sell_logger()
+        pending = models.RegistersellDetail.objects.filter(
+            date__lt=upper_bound(months[-1])
+        )
+        if pending.exists():
+            logger.warning(
+                f"Particiones anteriores a {months[-1]:%Y-%m} con ventas sin archivar"
+            )
+            return []
+
+        names = [partition_name(month) for month in months]
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"ALTER TABLE {connection.ops.quote_name(SellPartitions.table)} "
+                f"DROP PARTITION {', '.join(names)}"
+            )
+        logger.info(f"Particiones eliminadas: {', '.join(names)}")
+        return names
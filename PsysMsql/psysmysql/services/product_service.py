@@ -4,11 +4,14 @@ from django.db.models import Q, ObjectDoesNotExist
 from ..constants import (
     CACHE_KEY_ALL_PRODUCTS,
     CACHE_TIMEOUT_FLASH,
+    TYPEAHEAD_LIMIT,
+    TYPEAHEAD_MIN_QUERY,
 )
 from ..utils import clear_model_cache
 from ..logging_config import get_product_logger, log_execution_time, LogOperation
 
 from ..services.search_orm import Search
+from ..services.typeahead_service import ProductTypeahead
 
 
 class CreateProduct:
@@ -18,7 +21,7 @@ class CreateProduct:
     def create_product(name, price, description):
         logger = get_product_logger()
 
-        with LogOperation(f"Creando producto: {name}", logger):
+        with LogOperation(f"Creando producto: {name}", logger, "products.create"):
             # Verificar si existe
             if Search.filter(Products, "name", name).exists():
                 logger.warning(f"No es posible crear el producto: {name}")
@@ -44,45 +47,88 @@ class GetAllProducts:
 
     @staticmethod
     def get_all_products():
-
         cache_key = f"{CACHE_KEY_ALL_PRODUCTS}"
         all_products = cache.get(cache_key)
-        total_products_save = None
 
         if all_products is None:
-
-            all_products = (
-                Search.search_default(Products).select_related().order_by("name")
+            products = list(
+                Search.search_default(Products)
+                .only("idproducts", "name", "price", "description")
+                .order_by("name")
             )
-            total_products_save = all_products.count()
+            all_products = {"products": products, "total": len(products)}
             cache.set(cache_key, all_products, CACHE_TIMEOUT_FLASH)
 
-        return {
-            "products": all_products,
-            "total": total_products_save,
-        }
+        return all_products
+
+    @staticmethod
+    async def aget_all_products():
+        """Versión async de ``get_all_products`` (cache y ORM async)"""
+        cache_key = f"{CACHE_KEY_ALL_PRODUCTS}"
+        all_products = await cache.aget(cache_key)
+
+        if all_products is None:
+            products = [
+                product
+                async for product in Search.search_default(Products)
+                .only("idproducts", "name", "price", "description")
+                .order_by("name")
+            ]
+            all_products = {"products": products, "total": len(products)}
+            await cache.aset(cache_key, all_products, CACHE_TIMEOUT_FLASH)
+
+        return all_products
 
 
 class SearchByAjax:
+    """
+    Búsqueda de productos mientras se escribe
 
-    @staticmethod
-    def search_products_ajax(query, limit=10):
-        if not query or len(query) < 2:
-            return []
+    Responde desde el índice de prefijos en memoria (``ProductTypeahead``);
+    solo si no hay coincidencias por prefijo se consulta la base con
+    ``icontains`` para encontrar coincidencias en medio de una palabra.
+    """
 
+    @staticmethod
+    def search_queryset(query, limit):
         # Optimizar: usar only() para traer solo campos necesarios
-        products = Products.objects.filter(Q(name__icontains=query)).only(
+        return Products.objects.filter(Q(name__icontains=query)).only(
             "idproducts", "name", "price", "description"
         )[:limit]
 
+    @staticmethod
+    def serialize(product):
+        return {
+            "id": product.idproducts,
+            "name": product.name,
+            "price": float(product.price),
+            "description": product.description,
+        }
+
+    @staticmethod
+    def search_products_ajax(query, limit=TYPEAHEAD_LIMIT):
+        if not query or len(query) < TYPEAHEAD_MIN_QUERY:
+            return []
+
+        results = ProductTypeahead.search(query, limit)
+        if results:
+            return results
+        return [
+            SearchByAjax.serialize(product)
+            for product in SearchByAjax.search_queryset(query, limit)
+        ]
+
+    @staticmethod
+    async def asearch_products_ajax(query, limit=TYPEAHEAD_LIMIT):
+        if not query or len(query) < TYPEAHEAD_MIN_QUERY:
+            return []
+
+        results = await ProductTypeahead.asearch(query, limit)
+        if results:
+            return results
         return [
-            {
-                "id": product.idproducts,
-                "name": product.name,
-                "price": float(product.price),
-                "description": product.description,
-            }
-            for product in products
+            SearchByAjax.serialize(product)
+            async for product in SearchByAjax.search_queryset(query, limit)
         ]
 
 
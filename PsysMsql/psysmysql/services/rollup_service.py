@@ -0,0 +1,277 @@
+import ast
+from collections import defaultdict
+from itertools import chain
+from datetime import datetime, time, timedelta
+from decimal import Decimal
+
+from django.db import connections, router, transaction
+from django.utils import timezone
+
+from .. import models
+from ..logging_config import get_sell_logger, LogOperation
+from ..services.archive_service import SalesArchive
+
+
+def parse_detail_sell(detail_sell):
+    """
+    Líneas de producto guardadas en ``RegistersellDetail.detail_sell``
+
+    El detalle se guarda como la representación de la lista de items del
+    carrito (ver ``SellProductView._handle_add_form``); el último elemento
+    contiene los totales y se descarta. Acepta también la lista original,
+    que es lo que tiene la instancia recién guardada.
+    """
+    if isinstance(detail_sell, list):
+        items = detail_sell
+    else:
+        try:
+            items = ast.literal_eval(detail_sell or "[]")
+        except (ValueError, SyntaxError):
+            return []
+    if not isinstance(items, list):
+        return []
+    return [item for item in items if isinstance(item, dict) and "name" in item]
+
+
+def increment_rows(model, key_fields, increment_fields, rows):
+    """
+    Inserta ``rows`` o suma sus incrementos a las filas existentes
+
+    Una sola sentencia por llamada (``INSERT ... ON DUPLICATE KEY UPDATE`` en
+    MySQL, ``ON CONFLICT DO UPDATE`` en SQLite/PostgreSQL) sobre la clave única
+    ``key_fields``: dos ventas concurrentes que crean la misma fila del día no
+    chocan con ``IntegrityError`` ni con los gap locks de ``get_or_create``.
+
+    Args:
+        rows: tuplas con los valores de ``key_fields`` y luego los incrementos
+    """
+    if not rows:
+        return
+    connection = connections[router.db_for_write(model)]
+    quote = connection.ops.quote_name
+    table = quote(model._meta.db_table)
+    fields = [model._meta.get_field(name) for name in (*key_fields, *increment_fields)]
+    row_placeholder = f"({', '.join(['%s'] * len(fields))})"
+    increments = [quote(field.column) for field in fields[len(key_fields) :]]
+
+    if connection.vendor == "mysql":
+        conflict = "ON DUPLICATE KEY UPDATE " + ", ".join(
+            f"{column} = {table}.{column} + VALUES({column})" for column in increments
+        )
+    else:
+        keys = ", ".join(quote(field.column) for field in fields[: len(key_fields)])
+        conflict = f"ON CONFLICT ({keys}) DO UPDATE SET " + ", ".join(
+            f"{column} = {table}.{column} + excluded.{column}" for column in increments
+        )
+
+    sql = (
+        f"INSERT INTO {table} ({', '.join(quote(field.column) for field in fields)}) "
+        f"VALUES {', '.join([row_placeholder] * len(rows))} {conflict}"
+    )
+    params = [
+        field.get_db_prep_value(value, connection)
+        for row in rows
+        for field, value in zip(fields, row)
+    ]
+    with connection.cursor() as cursor:
+        cursor.execute(sql, params)
+
+
+def date_window(start_date, end_date):
+    """Rango [inicio, fin) en la zona horaria actual, usable con índices"""
+    start = timezone.make_aware(datetime.combine(start_date, time.min))
+    end = timezone.make_aware(datetime.combine(end_date + timedelta(days=1), time.min))
+    return start, end
+
+
+def to_decimal(value):
+    return Decimal(str(round(float(value or 0), 2)))
+
+
+def aggregate_sales(rows, product_ids):
+    """
+    Rollups diarios de ``rows`` (fecha, tipo de pago, empleado, total, detalle)
+
+    Devuelve ``{(día, tipo de pago, empleado): [ventas, ingresos, unidades]}`` y
+    ``{(día, producto): [unidades, ingresos]}``. Los productos que ya no están
+    en ``product_ids`` ({nombre: id}) se omiten.
+    """
+    existing_ids = set(product_ids.values())
+    sales = defaultdict(lambda: [0, Decimal("0"), 0])
+    products = defaultdict(lambda: [0, Decimal("0")])
+    for sold_at, type_pay, id_employed, total_sell, detail_sell in rows:
+        day = timezone.localtime(sold_at).date()
+        lines = parse_detail_sell(detail_sell)
+
+        sale = sales[(day, type_pay, id_employed)]
+        sale[0] += 1
+        sale[1] += total_sell or 0
+        sale[2] += sum(int(line.get("quantity", 0)) for line in lines)
+
+        for product_id, (units, revenue) in SalesRollup.product_lines(
+            lines, product_ids
+        ).items():
+            # Productos eliminados desde la venta
+            if product_id not in existing_ids:
+                continue
+            product = products[(day, product_id)]
+            product[0] += units
+            product[1] += revenue
+    return sales, products
+
+
+class SalesRollup:
+    """
+    Tablas de ventas pre-agregadas por día
+
+    ``DailySalesRollup`` agrupa por (fecha, tipo de pago, empleado) y
+    ``DailyProductSalesRollup`` por (fecha, producto). Se actualizan dentro
+    de la transacción que registra la venta y se pueden reconstruir desde
+    ``register_sells`` con ``manage.py rebuild_sales_rollups``.
+    """
+
+    @staticmethod
+    def product_lines(lines, product_ids=None):
+        """
+        Unidades e ingresos por id de producto
+
+        Las ventas antiguas no guardan ``id_product`` en el detalle: en ese
+        caso se resuelve por nombre con ``product_ids`` ({nombre: id}).
+        """
+        if product_ids is None:
+            names = {line["name"] for line in lines if not line.get("id_product")}
+            product_ids = (
+                dict(
+                    models.Products.objects.filter(name__in=names).values_list(
+                        "name", "idproducts"
+                    )
+                )
+                if names
+                else {}
+            )
+
+        products = defaultdict(lambda: [0, Decimal("0")])
+        for line in lines:
+            product_id = line.get("id_product") or product_ids.get(line["name"])
+            if product_id is None:
+                continue
+            product = products[product_id]
+            product[0] += int(line.get("quantity", 0))
+            product[1] += to_decimal(line.get("pricexquantity", 0))
+        return products
+
+    @staticmethod
+    def record_sale(register):
+        """Suma una venta a los rollups del día (upsert atómico por tabla)"""
+        day = timezone.localtime(register.date).date()
+        lines = parse_detail_sell(register.detail_sell)
+        products = SalesRollup.product_lines(lines)
+
+        with transaction.atomic():
+            increment_rows(
+                models.DailySalesRollup,
+                ("date", "type_pay", "id_employed"),
+                ("sells_count", "revenue", "units"),
+                [
+                    (
+                        day,
+                        register.type_pay,
+                        register.id_employed,
+                        1,
+                        to_decimal(register.total_sell),
+                        sum(int(line.get("quantity", 0)) for line in lines),
+                    )
+                ],
+            )
+            # En orden de producto: ventas concurrentes bloquean en el mismo orden
+            increment_rows(
+                models.DailyProductSalesRollup,
+                ("date", "id_product"),
+                ("units", "revenue"),
+                [
+                    (day, product_id, units, revenue)
+                    for product_id, (units, revenue) in sorted(
+                        products.items(), key=lambda item: int(item[0])
+                    )
+                ],
+            )
+
+    @staticmethod
+    def rebuild(start_date=None, end_date=None, chunk_size=2000):
+        """
+        Recalcula los rollups desde ``register_sells`` y su archivo (todo el
+        historial o el rango de fechas indicado). Devuelve (filas de ventas,
+        filas de productos) creadas.
+        """
+        logger = get_sell_logger()
+
+        with LogOperation(
+            f"Reconstruyendo rollups de ventas {start_date or '-'} - {end_date or '-'}",
+            logger,
+            "sells.rebuild_rollups",
+        ):
+            sales_rollups = models.DailySalesRollup.objects.all()
+            product_rollups = models.DailyProductSalesRollup.objects.all()
+            start = end = None
+            if start_date:
+                start = date_window(start_date, start_date)[0]
+                sales_rollups = sales_rollups.filter(date__gte=start_date)
+                product_rollups = product_rollups.filter(date__gte=start_date)
+            if end_date:
+                end = date_window(end_date, end_date)[1]
+                sales_rollups = sales_rollups.filter(date__lte=end_date)
+                product_rollups = product_rollups.filter(date__lte=end_date)
+            # Ventas vivas y, si el rango lo requiere, las archivadas
+            registers = SalesArchive.querysets(start, end)
+
+            # La lectura y el reemplazo van en una transacción que primero
+            # bloquea el rango de rollups: una venta que confirma durante la
+            # reconstrucción espera en su incremento y se suma a las filas
+            # nuevas en lugar de perderse (las ventas del rango esperan a que
+            # termine: en historiales grandes, reconstruir por rangos)
+            with transaction.atomic():
+                list(sales_rollups.select_for_update().values_list("pk", flat=True))
+                list(product_rollups.select_for_update().values_list("pk", flat=True))
+
+                product_ids = dict(
+                    models.Products.objects.values_list("name", "idproducts")
+                )
+                rows = chain.from_iterable(
+                    queryset.values_list(
+                        "date", "type_pay", "id_employed", "total_sell", "detail_sell"
+                    ).iterator(chunk_size=chunk_size)
+                    for queryset in registers
+                )
+                sales, products = aggregate_sales(rows, product_ids)
+
+                sales_rollups.delete()
+                product_rollups.delete()
+                models.DailySalesRollup.objects.bulk_create(
+                    (
+                        models.DailySalesRollup(
+                            date=day,
+                            type_pay=type_pay,
+                            id_employed=id_employed,
+                            sells_count=count,
+                            revenue=revenue,
+                            units=units,
+                        )
+                        for (day, type_pay, id_employed), (count, revenue, units) in sales.items()
+                    ),
+                    batch_size=chunk_size,
+                )
+                models.DailyProductSalesRollup.objects.bulk_create(
+                    (
+                        models.DailyProductSalesRollup(
+                            date=day, id_product_id=product_id, units=units, revenue=revenue
+                        )
+                        for (day, product_id), (units, revenue) in products.items()
+                    ),
+                    batch_size=chunk_size,
+                )
+
+            logger.info(
+                f"Rollups reconstruidos: {len(sales)} filas de ventas, "
+                f"{len(products)} filas de productos"
+            )
+            return len(sales), len(products)
@@ -1,10 +1,15 @@
-from datetime import datetime
+from datetime import datetime, timedelta
 import json
-from django.db.models import Count, Sum
+import time
+from django.db.models import Count, F, Min, Sum
+from django.db import transaction
+from django.db.models.functions import Coalesce, ExtractHour, TruncMonth
+from django.utils import timezone
 from django.core.exceptions import ValidationError, ObjectDoesNotExist
 from django.shortcuts import get_object_or_404
 from psysmysql import  models
 from django.core.cache import cache
+from ..db_router import read_from_replica
 from ..logging_config import (
     get_sell_logger,
     log_execution_time,
@@ -13,6 +18,10 @@ from ..logging_config import (
 import psysmysql.constants as const
 
 from ..services.search_orm import Search
+from ..services.archive_service import SalesArchive
+from ..services.rollup_service import SalesRollup, date_window, parse_detail_sell
+from ..services.stock_service import StockThresholds
+from ..live_feed import publish_sale
 
 
 class RegisterSell:
@@ -24,7 +33,9 @@ class RegisterSell:
 
         try:
             with LogOperation(
-                f"Agregando producto {id_product} con cantidad {total_sell}", logger
+                f"Agregando producto {id_product} con cantidad {total_sell}",
+                logger,
+                "sells.add_to_cart",
             ):
                 product = get_object_or_404(models.Products, pk=id_product.idproducts)
 
@@ -61,7 +72,9 @@ class RegisterSellDetails:
         logger = get_sell_logger()
         try:
             with LogOperation(
-                f"Creando registro de venta: total=${total_sell}", logger
+                f"Creando registro de venta: total=${total_sell}",
+                logger,
+                "sells.register_detail",
             ):
 
                 register_sell_detail = models.RegistersellDetail(
@@ -73,7 +86,19 @@ class RegisterSellDetails:
                     detail_sell=detail_sell,
                     quantity_pay=quantity_pay,
                 )
-                register_sell_detail.save()
+                # El registro y sus rollups diarios se guardan juntos
+                with transaction.atomic():
+                    register_sell_detail.save()
+                    SalesRollup.record_sale(register_sell_detail)
+                transaction.on_commit(
+                    lambda: SalesAnalytics.record_sale(register_sell_detail)
+                )
+                transaction.on_commit(
+                    lambda: publish_sale(
+                        register_sell_detail,
+                        parse_detail_sell(register_sell_detail.detail_sell),
+                    )
+                )
             logger.info(
                 f"Venta registrada exitosamente: ID={detail_sell}, empleado={id_employed}, total=${total_sell}, tipo_pago={type_pay}"
             )
@@ -89,30 +114,40 @@ class GetStatistic:
     @staticmethod
     def get_register_sell_statistic():
         all_register_sells = Search.search_default(models.RegistersellDetail)
-        registers: list = []
-        for register in all_register_sells:
-            registers.append(
-                {
-                    "id_register": int(register.idsell),
-                    "date": str(
-                        datetime.astimezone(register.date).strftime("%Y-%m-%d %H:%M:%S")
-                    ),
-                    "id_employed": str(register.id_employed),
-                    "total_sell": float(register.total_sell),
-                    "type_pay": str(register.type_pay),
-                    "state_sell": str(register.state_sell),
-                    "notes": str(register.notes),
-                    "detail_sell": str(register.detail_sell),
-                }
-            )
-        return json.dumps(registers)
+        return json.dumps(GetStatistic.register_rows(all_register_sells))
+
+    @staticmethod
+    def register_rows(registers, with_detail=True):
+        """Filas del registro de ventas para las plantillas y reportes"""
+        rows = [
+            {
+                "id_register": int(register.idsell),
+                "date": str(
+                    datetime.astimezone(register.date).strftime("%Y-%m-%d %H:%M:%S")
+                ),
+                "id_employed": str(register.id_employed),
+                "total_sell": float(register.total_sell),
+                "type_pay": str(register.type_pay),
+                "state_sell": str(register.state_sell),
+                "notes": str(register.notes),
+            }
+            for register in registers
+        ]
+        if with_detail:
+            for row, register in zip(rows, registers):
+                row["detail_sell"] = str(register.detail_sell)
+        return rows
+
+    @staticmethod
+    def register_page_queryset():
+        """Registro de ventas para paginar por (fecha, id) sin el detalle"""
+        return models.RegistersellDetail.objects.defer("detail_sell")
 
     @staticmethod
     def get_change_statistics(quantity_pay: float):
 
         total_sell = GetStatistic.get_register_sell_statistic()
         total_sell_dict = json.loads(total_sell)
-        print(total_sell_dict[0]["total_sell"])
         change_dict: dict = {}
         try:
             if not quantity_pay:
@@ -128,14 +163,20 @@ class GetStatistic:
             raise ValidationError(f"Error calculando cambio: {str(e)}")
 
     @staticmethod
+    @read_from_replica()
     def quantity_total_sells():
-        all_register_sells_count = Search.search_default(models.RegistersellDetail).count()
+        all_register_sells_count = models.DailySalesRollup.objects.aggregate(
+            count=Coalesce(Sum("sells_count"), 0)
+        )["count"]
         return json.dumps(all_register_sells_count)
 
     @staticmethod
+    @read_from_replica()
     def quantity_and_types_payment():
-        all_type_payment = Search.values(models.RegistersellDetail, "type_pay").annotate(
-            count=Count("type_pay")
+        all_type_payment = (
+            Search.values(models.DailySalesRollup, "type_pay")
+            .annotate(count=Sum("sells_count"))
+            .order_by("type_pay")
         )
         type_payments: list = []
 
@@ -149,12 +190,13 @@ class GetStatistic:
         return json.dumps(type_payments)
 
     @staticmethod
+    @read_from_replica()
     def total_money_sell():
         total_money: dict = {}
-        total_money_sells = models.RegistersellDetail.objects.aggregate(
-            total_sum=Sum("total_sell")
+        total_money_sells = models.DailySalesRollup.objects.aggregate(
+            total_sum=Sum("revenue")
         )
-        if not total_money_sells:
+        if total_money_sells.get("total_sum") is None:
             total_money = {}
         else:
             total_money = {"total": float(total_money_sells.get("total_sum"))}
@@ -164,7 +206,7 @@ class GetStatistic:
 class GetIndividualtatistic:
     @staticmethod
     def get_individual_statistics(pk):
-        return Search.filter(models.RegistersellDetail, "idsell", pk)
+        return SalesArchive.get_register(pk)
 
 
 class GetSellProductQueryset:
@@ -200,14 +242,13 @@ class CalculatedTotals:
 
     @staticmethod
     def calculated_totals():
-        total_quantity = 0
-        subtotal = 0.0
-
-        sell_products = Search.search_default(models.SellProducts)
-
-        for product in sell_products:
-            total_quantity += product.quantity
-            subtotal += product.quantity * float(product.priceunitaty)
+        # Una sola consulta agregada en vez de recorrer las líneas del carrito
+        cart = models.SellProducts.objects.aggregate(
+            total_quantity=Coalesce(Sum("quantity"), 0),
+            cart_subtotal=Sum(F("quantity") * F("priceunitaty")),
+        )
+        total_quantity = cart["total_quantity"]
+        subtotal = float(cart["cart_subtotal"] or 0)
 
         iva_amount = subtotal * CalculatedTotals.iva_rate
         total_sell = subtotal
@@ -219,3 +260,271 @@ class CalculatedTotals:
             "total_sell": total_sell,
         }
         return totals
+
+
+def month_starts(start_date, end_date):
+    """Primer día de cada mes entre ``start_date`` y ``end_date``"""
+    current = start_date.replace(day=1)
+    while current <= end_date:
+        yield current
+        if current.month == 12:
+            current = current.replace(year=current.year + 1, month=1)
+        else:
+            current = current.replace(month=current.month + 1)
+
+
+class SalesAnalytics:
+    """
+    Analítica de ventas sobre los rollups diarios
+
+    Cada familia de métricas se resuelve con una sola consulta agrupada sobre
+    ``DailySalesRollup``/``DailyProductSalesRollup`` (por día, ``TruncMonth``,
+    tipo de pago, productos), así el número de consultas no depende del rango
+    de fechas ni del tamaño del historial. El resultado se guarda en cache por
+    ventana (inicio, fin).
+    """
+
+    @staticmethod
+    def get_sales_analytics(start_date, end_date):
+        # Cada ventana distinta ocupa una entrada de cache propia
+        if (end_date - start_date).days >= const.ANALYTICS_MAX_DAYS:
+            raise ValueError(
+                f"El rango no puede superar {const.ANALYTICS_MAX_DAYS} días"
+            )
+        cache_key = const.CACHE_KEY_SALES_ANALYTICS.format(
+            start_date.isoformat(), end_date.isoformat()
+        )
+        analytics = cache.get(cache_key)
+        if analytics is None:
+            analytics = SalesAnalytics.build_sales_analytics(start_date, end_date)
+            # Las ventanas cerradas ya no cambian
+            if end_date < timezone.localdate():
+                timeout = const.CACHE_TIMEOUT_LONG
+            else:
+                timeout = const.CACHE_TIMEOUT_SHORT
+            cache.set(cache_key, analytics, timeout)
+
+        return {
+            **analytics,
+            "low_stock_products": SalesAnalytics.get_low_stock_products(),
+        }
+
+    @staticmethod
+    @read_from_replica()
+    def build_sales_analytics(start_date, end_date):
+        logger = get_sell_logger()
+
+        with LogOperation(
+            f"Generando analítica de ventas {start_date} - {end_date}",
+            logger,
+            "sells.analytics",
+        ):
+            sales = models.DailySalesRollup.objects.filter(
+                date__gte=start_date, date__lte=end_date
+            ).order_by()
+
+            daily = {
+                row["date"]: row
+                for row in sales.values("date").annotate(
+                    total=Sum("revenue"), orders=Sum("sells_count")
+                )
+            }
+
+            monthly = {
+                row["month"].strftime("%Y-%m"): row["total"]
+                for row in sales.annotate(month=TruncMonth("date"))
+                .values("month")
+                .annotate(total=Sum("revenue"))
+            }
+
+            payment_methods = (
+                sales.values("type_pay")
+                .annotate(total=Sum("revenue"))
+                .order_by("type_pay")
+            )
+
+            top_products = [
+                {
+                    "idproducts": row["id_product"],
+                    "name": row["id_product__name"],
+                    "quantity": row["quantity"],
+                    "revenue": float(row["revenue"]),
+                }
+                for row in models.DailyProductSalesRollup.objects.filter(
+                    date__gte=start_date, date__lte=end_date
+                )
+                .values("id_product", "id_product__name")
+                .annotate(quantity=Sum("units"), revenue=Sum("revenue"))
+                .order_by("-quantity", "id_product")[: const.TOP_PRODUCTS_LIMIT]
+            ]
+
+            total_sales = sum(float(row["total"] or 0) for row in daily.values())
+            total_orders = sum(row["orders"] for row in daily.values())
+
+            daily_sales = []
+            day = start_date
+            while day <= end_date:
+                row = daily.get(day)
+                daily_sales.append(
+                    {
+                        "day": day.isoformat(),
+                        "total": float(row["total"] or 0) if row else 0.0,
+                        "orders": row["orders"] if row else 0,
+                    }
+                )
+                day += timedelta(days=1)
+
+            return {
+                "start_date": start_date.isoformat(),
+                "end_date": end_date.isoformat(),
+                "total_sales": total_sales,
+                "total_orders": total_orders,
+                "average_order_value": total_sales / total_orders if total_orders else 0,
+                "top_products": top_products,
+                "sales_by_payment_method": {
+                    item["type_pay"]: float(item["total"] or 0)
+                    for item in payment_methods
+                },
+                "monthly_sales": [
+                    {
+                        "month": month.strftime("%Y-%m"),
+                        "total": float(monthly.get(month.strftime("%Y-%m")) or 0),
+                    }
+                    for month in month_starts(start_date, end_date)
+                ],
+                "daily_sales": daily_sales,
+            }
+
+    @staticmethod
+    def daily_summary_keys(day, generation):
+        """Claves de cache por hora del día: (número de ventas, total en centavos)"""
+        prefix = const.CACHE_KEY_DAILY_SUMMARY.format(day.isoformat(), generation)
+        return {
+            hour: (f"{prefix}_{hour}_orders", f"{prefix}_{hour}_cents")
+            for hour in range(24)
+        }
+
+    @staticmethod
+    @read_from_replica()
+    def build_hourly_sales(day):
+        """Ventas por hora de un día con una sola consulta ``ExtractHour``"""
+        start, end = date_window(day, day)
+        hourly = {hour: (0, 0) for hour in range(24)}
+        # Un día archivado se lee del archivo (una consulta por tabla)
+        for registers in SalesArchive.querysets(start, end):
+            rows = (
+                registers.annotate(hour=ExtractHour("date"))
+                .values("hour")
+                .annotate(total=Sum("total_sell"), orders=Count("idsell"))
+            )
+            for row in rows:
+                orders, cents = hourly[row["hour"]]
+                hourly[row["hour"]] = (
+                    orders + row["orders"],
+                    cents + int(round((row["total"] or 0) * 100)),
+                )
+        return hourly
+
+    @staticmethod
+    def get_daily_summary(day=None):
+        """
+        Resumen de ventas del día por hora
+
+        Cada hora se guarda en cache como dos contadores que ``record_sale``
+        incrementa al completar una venta, así el dashboard puede consultar
+        el resumen sin tocar la base de datos. Los contadores llevan la
+        generación del día en la clave: si falta alguno el día se reconstruye
+        desde la base de datos y se guarda con ``cache.add``, que no pisa los
+        contadores que otra reconstrucción ya dejó e incrementó. Una venta que
+        no encuentra sus contadores avanza la generación, así una
+        reconstrucción que empezó antes que la venta queda descartada.
+        """
+        day = day or timezone.localdate()
+        generation = cache.get_or_set(
+            const.CACHE_KEY_DAILY_SUMMARY_GENERATION.format(day.isoformat()),
+            # Nunca repite una generación anterior si la clave expira: la
+            # siguiente lectura reconstruye el día con una generación nueva
+            time.time_ns,
+            const.CACHE_TIMEOUT_LONG,
+        )
+        keys = SalesAnalytics.daily_summary_keys(day, generation)
+        cached = cache.get_many([key for pair in keys.values() for key in pair])
+
+        if len(cached) == len(keys) * 2:
+            hourly = {
+                hour: (cached[orders_key], cached[cents_key])
+                for hour, (orders_key, cents_key) in keys.items()
+            }
+        else:
+            hourly = SalesAnalytics.build_hourly_sales(day)
+            if day < timezone.localdate():
+                timeout = const.CACHE_TIMEOUT_LONG
+            else:
+                timeout = const.CACHE_TIMEOUT_SHORT
+            for hour, (orders_key, cents_key) in keys.items():
+                orders, cents = hourly[hour]
+                cache.add(orders_key, orders, timeout)
+                cache.add(cents_key, cents, timeout)
+
+        total_orders = sum(orders for orders, _ in hourly.values())
+        total_sales = sum(cents for _, cents in hourly.values()) / 100
+        return {
+            "date": day.isoformat(),
+            "total_sales": total_sales,
+            "total_orders": total_orders,
+            "average_order_value": total_sales / total_orders if total_orders else 0,
+            "hourly_sales": [
+                {"hour": hour, "total": cents / 100, "orders": orders}
+                for hour, (orders, cents) in sorted(hourly.items())
+            ],
+        }
+
+    @staticmethod
+    def record_sale(register):
+        """Suma una venta completada al resumen diario en cache"""
+        sold_at = timezone.localtime(register.date)
+        generation_key = const.CACHE_KEY_DAILY_SUMMARY_GENERATION.format(
+            sold_at.date().isoformat()
+        )
+        generation = cache.get(generation_key)
+        if generation is None:
+            # Nadie ha leído el día: la primera lectura ya incluye esta venta
+            return
+        orders_key, cents_key = SalesAnalytics.daily_summary_keys(
+            sold_at.date(), generation
+        )[sold_at.hour]
+        try:
+            cache.incr(orders_key)
+            cache.incr(cents_key, int(round(float(register.total_sell) * 100)))
+        except ValueError:
+            # Contadores expirados o a medio reconstruir: nueva generación,
+            # que se reconstruye desde la base de datos con esta venta
+            try:
+                cache.incr(generation_key)
+            except ValueError:
+                pass
+
+    @staticmethod
+    @read_from_replica()
+    def get_low_stock_products(limit=const.TOP_PRODUCTS_LIMIT):
+        """Productos con stock bajo o sin registro de stock, en una consulta"""
+        products = (
+            models.Products.objects.annotate(
+                stock_quantity=Coalesce(Min("stock__quantitystock"), 0)
+            )
+            .filter(
+                StockThresholds.low_stock_q(quantity="stock_quantity", product_path="")
+            )
+            .order_by("stock_quantity", "name")
+            .values("idproducts", "name", "price", "stock_quantity")[:limit]
+        )
+        return [
+            {
+                **product,
+                "price": float(product["price"] or 0),
+                "stock_status": (
+                    "out_of_stock" if product["stock_quantity"] == 0 else "low_stock"
+                ),
+            }
+            for product in products
+        ]
@@ -1,10 +1,43 @@
-from django.db.models import Q, ObjectDoesNotExist, F, Sum
+from django.db.models import Count, Q, ObjectDoesNotExist, F, Sum, Value
+from django.db.models.functions import Coalesce
 from django.core.exceptions import ValidationError
+from ..constants import LOW_STOCK_THRESHOLD
+from ..db_router import read_from_replica
 from ..models import Stock, Products
 from ..logging_config import get_logger, log_execution_time, LogOperation
 from ..services.search_orm import Search
 
 
+class StockThresholds:
+    """
+    Umbral de stock bajo de cada producto
+
+    Es el punto de reorden del pronóstico nocturno (``StockForecast``); los
+    productos todavía sin pronóstico usan ``LOW_STOCK_THRESHOLD``. Un
+    producto tiene stock bajo cuando su cantidad es menor que el umbral.
+    """
+
+    @staticmethod
+    def threshold(product_path="id_products__"):
+        """Expresión con el umbral; ``product_path`` lleva del modelo a Products"""
+        return Coalesce(
+            F(f"{product_path}forecast__reorder_point"), Value(LOW_STOCK_THRESHOLD)
+        )
+
+    @staticmethod
+    def low_stock_q(quantity="quantitystock", product_path="id_products__"):
+        """
+        Condición de stock bajo (incluye los agotados)
+
+        Va como OR y no como ``quantity < COALESCE(...)``: así el ORM une
+        ``stock_forecast`` con LEFT JOIN y no pierde los productos sin pronóstico.
+        """
+        forecast = f"{product_path}forecast"
+        return Q(**{f"{forecast}__reorder_point__gt": F(quantity)}) | Q(
+            **{f"{forecast}__isnull": True, f"{quantity}__lt": LOW_STOCK_THRESHOLD}
+        )
+
+
 class SearchItemInStock:
     @staticmethod
     @log_execution_time()
@@ -12,7 +45,9 @@ class SearchItemInStock:
 
         logger = get_logger("stock")
 
-        with LogOperation(f"Buscando item en stock: {id_product}", logger):
+        with LogOperation(
+            f"Buscando item en stock: {id_product}", logger, "stock.search_item"
+        ):
             result_item_stock = Search.filter(Stock, "id_products", id_product)
         return result_item_stock
 
@@ -26,7 +61,9 @@ class CreateStock:
         logger = get_logger("stock")
 
         with LogOperation(
-            f"Actualizando stock producto {product_id}: {operation} {quantity}", logger
+            f"Actualizando stock producto {product_id}: {operation} {quantity}",
+            logger,
+            "stock.create_or_update",
         ):
             try:
                 product = Search.get(Products, "pk", product_id)
@@ -74,21 +111,22 @@ class CreateStock:
 class GetStcokSummaty:
     @staticmethod
     @log_execution_time()
+    @read_from_replica()
     def get_stock_summary():
         logger = get_logger("stock")
 
-        with LogOperation("Generando resumen de stock", logger):
+        with LogOperation("Generando resumen de stock", logger, "stock.summary"):
             # Query optimizada con agregaciones
             stock_data = Stock.objects.select_related("id_products").aggregate(
                 total_products=Sum("quantitystock"),
-                low_stock_count=Sum(1, filter=Q(quantitystock__lt=10)),
-                out_of_stock_count=Sum(1, filter=Q(quantitystock=0)),
+                low_stock_count=Count("idstock", filter=StockThresholds.low_stock_q()),
+                out_of_stock_count=Count("idstock", filter=Q(quantitystock=0)),
             )
 
-            # Productos con stock bajo
+            # Productos con stock bajo (por debajo de su punto de reorden)
             low_stock_products = (
                 Stock.objects.select_related("id_products")
-                .filter(quantitystock__lt=10, quantitystock__gt=0)
+                .filter(StockThresholds.low_stock_q(), quantitystock__gt=0)
                 .order_by("quantitystock")[:10]
             )
 
@@ -115,10 +153,11 @@ class GetStcokSummaty:
 
 class GetStockAlerts:
     @staticmethod
+    @read_from_replica()
     def get_stock_alerts():
         logger = get_logger("stock")
 
-        with LogOperation("Generando alertas de stock", logger):
+        with LogOperation("Generando alertas de stock", logger, "stock.alerts"):
             alerts = []
 
             # Productos sin stock
@@ -137,12 +176,10 @@ class GetStockAlerts:
                     }
                 )
 
-            # Productos con stock bajo (menos de 10)
-            low_stock = (
-                Stock.objects.select_related("id_products")
-                .filter(quantitystock__gt=0, quantitystock__lt=10)
-                .count()
-            )
+            # Productos con stock bajo (por debajo de su punto de reorden)
+            low_stock = Stock.objects.filter(
+                StockThresholds.low_stock_q(), quantitystock__gt=0
+            ).count()
 
             if low_stock > 0:
                 alerts.append(
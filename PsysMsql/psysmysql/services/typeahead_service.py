@@ -0,0 +1,200 @@
+"""
+Índice de autocompletado (typeahead) para la búsqueda de productos
+
+Cada proceso mantiene en memoria un arreglo ordenado de claves
+``(token, nombre normalizado, id)`` con un token por palabra del nombre,
+sin tildes y en minúsculas. Una búsqueda por prefijo es una búsqueda binaria
+más un recorrido de los resultados, sin consultas SQL.
+
+Las señales ``post_save``/``post_delete`` de ``Products`` (``signals.py``)
+aplican altas, cambios y bajas al índice local e incrementan un contador de
+versión compartido en cache; los demás procesos detectan el cambio de versión
+en su siguiente búsqueda y reconstruyen.
+
+Usage:
+    ProductTypeahead.search("cafe")        # encuentra "Café con leche"
+    ProductTypeahead.invalidate()          # tras bulk_create o QuerySet.update
+"""
+
+import re
+import threading
+import unicodedata
+from bisect import bisect_left, insort
+
+from asgiref.sync import sync_to_async
+from django.core.cache import cache
+
+from ..models import Products
+from ..constants import CACHE_KEY_TYPEAHEAD_VERSION, TYPEAHEAD_LIMIT
+from ..logging_config import get_product_logger, LogOperation
+
+WORD = re.compile(r"\w+")
+
+
+def normalize(text):
+    """Minúsculas y sin tildes: ``"Café Ñandú"`` -> ``"cafe nandu"``"""
+    decomposed = unicodedata.normalize("NFKD", text or "")
+    return "".join(c for c in decomposed if not unicodedata.combining(c)).casefold()
+
+
+def tokenize(text):
+    return WORD.findall(normalize(text))
+
+
+class TypeaheadIndex:
+    """
+    Índice de prefijos en memoria
+
+    Las modificaciones reemplazan las estructuras completas (copy-on-write)
+    para que las búsquedas concurrentes nunca vean un arreglo a medio
+    modificar.
+    """
+
+    def __init__(self):
+        self.keys = []
+        self.products = {}
+        self.version = None
+        self.lock = threading.Lock()
+
+    @staticmethod
+    def entry(product_id, name, price, description):
+        normalized = normalize(name)
+        tokens = tuple(WORD.findall(normalized))
+        keys = [(token, normalized, product_id) for token in set(tokens)]
+        price = float(price) if price is not None else None
+        return (name, price, description, tokens, keys)
+
+    def load(self, rows, version):
+        """Reemplaza el índice con ``rows`` (id, nombre, precio, descripción)"""
+        products = {row[0]: self.entry(*row) for row in rows}
+        keys = sorted(key for product in products.values() for key in product[4])
+        with self.lock:
+            self.keys, self.products, self.version = keys, products, version
+
+    def add(self, product_id, name, price, description):
+        with self.lock:
+            keys, products = self.without(product_id)
+            entry = self.entry(product_id, name, price, description)
+            for key in entry[4]:
+                insort(keys, key)
+            products[product_id] = entry
+            self.keys, self.products = keys, products
+
+    def remove(self, product_id):
+        with self.lock:
+            self.keys, self.products = self.without(product_id)
+
+    def without(self, product_id):
+        """Copias de las estructuras sin el producto indicado"""
+        keys, products = list(self.keys), dict(self.products)
+        entry = products.pop(product_id, None)
+        if entry is not None:
+            for key in entry[4]:
+                del keys[bisect_left(keys, key)]
+        return keys, products
+
+    def search(self, query, limit=TYPEAHEAD_LIMIT):
+        """
+        Productos cuyo nombre tiene una palabra que empieza por cada término
+
+        Se recorre el rango del término más largo (el más selectivo) y los
+        demás se comprueban sobre las palabras del producto.
+        """
+        terms = tokenize(query)
+        if not terms:
+            return []
+        prefix = max(terms, key=len)
+        others = list(terms)
+        others.remove(prefix)
+
+        keys, products = self.keys, self.products
+        results, seen = [], set()
+        position = bisect_left(keys, (prefix,))
+        while position < len(keys) and len(results) < limit:
+            token, _, product_id = keys[position]
+            position += 1
+            if not token.startswith(prefix):
+                break
+            if product_id in seen:
+                continue
+            seen.add(product_id)
+
+            name, price, description, tokens, _ = products[product_id]
+            if all(any(word.startswith(term) for word in tokens) for term in others):
+                results.append(
+                    {
+                        "id": product_id,
+                        "name": name,
+                        "price": price,
+                        "description": description,
+                    }
+                )
+        return results
+
+
+class ProductTypeahead:
+    # Un índice por proceso
+    index = TypeaheadIndex()
+
+    @staticmethod
+    def rebuild(version=None):
+        logger = get_product_logger()
+        with LogOperation(
+            "Reconstruyendo índice de autocompletado", logger, "products.typeahead_rebuild"
+        ):
+            if version is None:
+                version = cache.get_or_set(CACHE_KEY_TYPEAHEAD_VERSION, 0, None)
+            rows = Products.objects.values_list(
+                "idproducts", "name", "price", "description"
+            ).iterator(chunk_size=2000)
+            ProductTypeahead.index.load(rows, version)
+            logger.info(
+                f"Índice de autocompletado: {len(ProductTypeahead.index.products)} productos"
+            )
+
+    @staticmethod
+    def search(query, limit=TYPEAHEAD_LIMIT):
+        version = cache.get_or_set(CACHE_KEY_TYPEAHEAD_VERSION, 0, None)
+        if ProductTypeahead.index.version != version:
+            ProductTypeahead.rebuild(version)
+        return ProductTypeahead.index.search(query, limit)
+
+    @staticmethod
+    async def asearch(query, limit=TYPEAHEAD_LIMIT):
+        version = await cache.aget_or_set(CACHE_KEY_TYPEAHEAD_VERSION, 0, None)
+        if ProductTypeahead.index.version != version:
+            await sync_to_async(ProductTypeahead.rebuild)(version)
+        return ProductTypeahead.index.search(query, limit)
+
+    @staticmethod
+    def add(product):
+        """Alta o edición de un producto"""
+        ProductTypeahead.index.add(
+            product.idproducts, product.name, product.price, product.description
+        )
+        ProductTypeahead.bump_version(applied=True)
+
+    @staticmethod
+    def remove(product_id):
+        ProductTypeahead.index.remove(product_id)
+        ProductTypeahead.bump_version(applied=True)
+
+    @staticmethod
+    def invalidate():
+        """Fuerza la reconstrucción en todos los procesos (p. ej. tras bulk_create)"""
+        ProductTypeahead.bump_version(applied=False)
+
+    @staticmethod
+    def bump_version(applied):
+        index = ProductTypeahead.index
+        try:
+            version = cache.incr(CACHE_KEY_TYPEAHEAD_VERSION)
+        except ValueError:
+            cache.add(CACHE_KEY_TYPEAHEAD_VERSION, 0, None)
+            version = None
+
+        # Si otro proceso cambió el catálogo entre medio, este también reconstruye
+        if applied and index.version is not None and version == index.version + 1:
+            index.version = version
+        else:
+            index.version = None
@@ -0,0 +1,53 @@
+"""
+Señales de modelos
+
+Mantienen el índice de autocompletado y el total de clientes en cache al
+día sin importar el origen del cambio (servicios, API REST, admin, shell o
+tareas de Celery). Las operaciones masivas (``bulk_create``,
+``QuerySet.update``/``delete``) no emiten señales: quien las use debe llamar a
+``ProductTypeahead.invalidate()`` o borrar ``CACHE_KEY_CLIENTS_COUNT``.
+"""
+
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .constants import CACHE_KEY_CLIENTS_COUNT
+from .models import Clients, Products
+from .services.typeahead_service import ProductTypeahead
+
+# Campos de Products que forman parte del índice
+TYPEAHEAD_FIELDS = frozenset({"name", "price", "description"})
+
+
+@receiver(post_save, sender=Products, dispatch_uid="typeahead_product_saved")
+def product_saved(sender, instance, update_fields=None, **kwargs):
+    if update_fields is not None and TYPEAHEAD_FIELDS.isdisjoint(update_fields):
+        return
+    transaction.on_commit(
+        lambda: ProductTypeahead.add(instance), using=kwargs.get("using")
+    )
+
+
+@receiver(post_delete, sender=Products, dispatch_uid="typeahead_product_deleted")
+def product_deleted(sender, instance, **kwargs):
+    product_id = instance.idproducts
+    transaction.on_commit(
+        lambda: ProductTypeahead.remove(product_id), using=kwargs.get("using")
+    )
+
+
+@receiver(post_save, sender=Clients, dispatch_uid="clients_count_saved")
+def client_saved(sender, created=False, **kwargs):
+    if created:
+        transaction.on_commit(
+            lambda: cache.delete(CACHE_KEY_CLIENTS_COUNT), using=kwargs.get("using")
+        )
+
+
+@receiver(post_delete, sender=Clients, dispatch_uid="clients_count_deleted")
+def client_deleted(sender, **kwargs):
+    transaction.on_commit(
+        lambda: cache.delete(CACHE_KEY_CLIENTS_COUNT), using=kwargs.get("using")
+    )
@@ -1,8 +1,50 @@
 # myapp/tasks.py
 from celery import shared_task
+from celery.signals import (
+    before_task_publish,
+    task_postrun,
+    task_prerun,
+    worker_process_init,
+)
 from django.core.mail import EmailMessage
 from django.conf import settings
 
+from .connection_pool import dispose_pools
+from .logging_config import get_logger, request_id_var
+from .services.affinity_service import ProductAffinityJob
+from .services.forecast_service import StockForecasting
+
+logger = get_logger("tasks")
+
+
+# Propagar el id de correlación del request a las tareas Celery
+@before_task_publish.connect
+def add_request_id_header(headers=None, **kwargs):
+    request_id = request_id_var.get()
+    if request_id and headers is not None:
+        headers.setdefault("request_id", request_id)
+
+
+@task_prerun.connect
+def bind_request_id(task, **kwargs):
+    request_id = getattr(task.request, "request_id", None) or task.request.id
+    task.request.request_id_token = request_id_var.set(request_id)
+
+
+@task_postrun.connect
+def unbind_request_id(task, **kwargs):
+    token = getattr(task.request, "request_id_token", None)
+    if token is not None:
+        request_id_var.reset(token)
+
+
+@worker_process_init.connect
+def reset_db_pools(**kwargs):
+    # Cada proceso hijo del worker abre sus propias conexiones: los sockets
+    # heredados del padre por el fork no se comparten ni se cierran. El
+    # worker importa este módulo antes de crear los procesos hijos.
+    dispose_pools(close=False)
+
 
 @shared_task
 def send_sell_confirmation_email(recipient_email, subject, body, pdf_data):
@@ -31,9 +73,27 @@ def send_sell_confirmation_email(recipient_email, subject, body, pdf_data):
 
         # Envíar correo usando el método .send() de la clase EmailMessage
         email.send(fail_silently=False)
-        print(f"Correo de confirmación enviado exitosamente a {recipient_email}")
+        logger.info(f"Correo de confirmación enviado exitosamente a {recipient_email}")
         return "Email sent successfully"
 
     except Exception as e:
-        print(f"Error al enviar el correo a {recipient_email}: {e}")
+        logger.error(f"Error al enviar el correo a {recipient_email}: {e}")
         raise  # Vuelve a lanzar la excepción
+
+
+@shared_task
+def update_product_affinity():
+    """
+    Tarea nocturna (Celery beat): co-ocurrencias de los días pendientes de la
+    ventana y reglas de ``ProductAffinity``.
+    """
+    return ProductAffinityJob.update()
+
+
+@shared_task
+def update_stock_forecasts():
+    """
+    Tarea nocturna (Celery beat): demanda diaria, puntos de reorden y días de
+    cobertura de ``StockForecast``.
+    """
+    return StockForecasting.update()
@@ -1,10 +1,102 @@
-from django.test import TestCase, Client
+import asyncio
+from importlib import import_module
+import json
+import logging
+from io import StringIO
+import re
+import sqlite3
+import tempfile
+import threading
+import time
+from pathlib import Path
+from django.apps import apps as django_apps
+from django.core.management import call_command
+from django.core.exceptions import ValidationError
+from django.core.management.base import CommandError
+from django.db import IntegrityError, connection, connections, router
+from django.db.models import Case, FloatField, Value, When
+from django.db.models.functions import Length
+from django.test import (
+    Client,
+    RequestFactory,
+    SimpleTestCase,
+    TestCase,
+    TransactionTestCase,
+)
+from django.test.utils import CaptureQueriesContext
 from django.contrib.auth.models import User, Group
-from django.urls import reverse
+from django.core.cache import cache
+from django.urls import resolve, reverse, URLPattern
+from django.conf import settings
+from django.http import HttpResponse
+from unittest import mock, skipUnless
+from datetime import date, datetime
 from decimal import Decimal
-from .models import Products, SellProducts, Clients
-from .services.product_service import ProductService
-from .services.sell_service import SellService
+from django.utils import timezone
+from django.test import override_settings
+from . import constants, live_feed, logging_config, metrics
+from .db_router import read_from_replica, routing_scope
+from .middleware import ReplicaRoutingMiddleware
+from .connection_pool import PoolTimeout, QueuePool, dispose_pools, get_pool
+from .logging_config import (
+    JsonFormatter,
+    LogOperation,
+    QueueListenerHandler,
+    RequestIdFilter,
+    SamplingFilter,
+    log_execution_time,
+    request_id_var,
+)
+from .models import Products, Sell, SellProducts, Stock, Clients, RegistersellDetail
+from .models import DailyProductSalesRollup, DailySalesRollup, RegistersellArchive
+from .models import DailyBasketCount, DailyProductPair, ProductAffinity, StockForecast
+from .services.archive_service import SalesArchive
+from .services.affinity_service import (
+    ProductAffinityJob,
+    association_rules,
+    co_occurrences,
+)
+from .services.analytics_service import SalesInsights
+from .services.forecast_service import StockForecasting, ewma, reorder_points
+from .services.export_service import SalesExport
+from .services.partition_service import (
+    SellPartitions,
+    add_months,
+    partition_clause,
+    upper_bound,
+)
+from .services.rollup_service import SalesRollup, increment_rows
+from .services.sell_service import (
+    CalculatedTotals,
+    GetIndividualtatistic,
+    GetStatistic,
+    RegisterSellDetails,
+    SalesAnalytics,
+)
+from .services.product_service import (
+    CreateProduct,
+    DeleteProducts,
+    SearchByAjax,
+    UpdateProducts,
+)
+from .services.search_orm import Search
+from .services.fulltext_service import FullTextSearch
+from .services.stock_service import GetStockAlerts
+from .services.clients_service import (
+    CLIENT_LIST_FIELDS,
+    ClientLookup,
+    GertAllClients,
+    RegisterClients,
+)
+from .services.factura_service import GetDataClientForBill
+from .services.typeahead_service import ProductTypeahead, TypeaheadIndex
+from .urls import build_urlpatterns, urlpatterns as app_urlpatterns
+from .utils import estimate_count, keyset_paginate
+from .api.pagination import KeysetPagination
+from .api.urls import router as api_router
+from .api.viewsets import ClientViewSet, StockViewSet
+from rest_framework.exceptions import ValidationError as DRFValidationError
+from rest_framework.request import Request
 
 
 class ProductModelTestCase(TestCase):
@@ -34,7 +126,7 @@ class ProductModelTestCase(TestCase):
 
 
 class ProductServiceTestCase(TestCase):
-    """Tests para ProductService"""
+    """Tests para los servicios de productos"""
 
     def setUp(self):
         self.product = Products.objects.create(
@@ -45,19 +137,19 @@ class ProductServiceTestCase(TestCase):
 
     def test_search_products_ajax(self):
         """Test búsqueda AJAX de productos"""
-        results = ProductService.search_products_ajax("Service")
+        results = SearchByAjax.search_products_ajax("Service")
         self.assertEqual(len(results), 1)
         self.assertEqual(results[0]["name"], "Producto Service Test")
         self.assertEqual(results[0]["price"], 150.0)
 
     def test_search_products_ajax_empty_query(self):
         """Test búsqueda con query vacío"""
-        results = ProductService.search_products_ajax("")
+        results = SearchByAjax.search_products_ajax("")
         self.assertEqual(len(results), 0)
 
     def test_create_product_success(self):
         """Test creación exitosa de producto"""
-        product = ProductService.create_product(
+        product = CreateProduct.create_product(
             "Nuevo Producto", Decimal("200.00"), "Nueva descripción"
         )
         self.assertIsNotNone(product)
@@ -66,7 +158,7 @@ class ProductServiceTestCase(TestCase):
     def test_create_product_duplicate(self):
         """Test creación de producto duplicado"""
         with self.assertRaises(ValueError):
-            ProductService.create_product(
+            CreateProduct.create_product(
                 "Producto Service Test",  # Ya existe
                 Decimal("300.00"),
                 "Descripción duplicada",
@@ -74,7 +166,7 @@ class ProductServiceTestCase(TestCase):
 
 
 class SellServiceTestCase(TestCase):
-    """Tests para SellService"""
+    """Tests para los servicios de venta"""
 
     def setUp(self):
         self.product1 = Products.objects.create(
@@ -85,51 +177,55 @@ class SellServiceTestCase(TestCase):
         )
 
         # Crear items de venta
+        sell = Sell.objects.create(totalsell=400, id_product=self.product1)
         self.sell_item1 = SellProducts.objects.create(
-            idproduct=self.product1, quantity=2, priceunitaty=Decimal("100.00")
+            idsell=sell,
+            idproduct=self.product1,
+            quantity=2,
+            priceunitaty=Decimal("100.00"),
         )
         self.sell_item2 = SellProducts.objects.create(
-            idproduct=self.product2, quantity=1, priceunitaty=Decimal("200.00")
+            idsell=sell,
+            idproduct=self.product2,
+            quantity=1,
+            priceunitaty=Decimal("200.00"),
         )
 
     def test_calculate_sell_totals(self):
         """Test cálculo de totales de venta"""
-        queryset = SellProducts.objects.all()
-        totals = SellService.calculate_sell_totals(queryset)
+        totals = CalculatedTotals.calculated_totals()
 
-        # Total: (2 * 100) + (1 * 200) = 400
-        expected_subtotal = 400.0
-        expected_iva = 400.0 * 0.19  # 76.0
+        # Total: (2 * 100) + (1 * 200) = 400, IVA incluido
+        expected_iva = 400.0 * constants.IVA_RATE
 
         self.assertEqual(totals["quantity"], 3)
-        self.assertEqual(totals["subtotal"], expected_subtotal)
-        self.assertEqual(totals["iva_calculated"], expected_iva)
-        self.assertEqual(len(totals["list_items"]), 2)
+        self.assertEqual(totals["total_sell"], 400.0)
+        self.assertEqual(totals["iva"], expected_iva)
+        self.assertEqual(totals["subtotal"], 400.0 - expected_iva)
 
     def test_calculate_change(self):
         """Test cálculo de cambio"""
-        change = SellService.calculate_change(100.0, 150.0)
-        self.assertEqual(change, 50.0)
+        RegistersellDetail.objects.create(
+            id_employed="caja1",
+            total_sell=Decimal("100.00"),
+            type_pay="Efectivo",
+            state_sell="Pagado",
+            detail_sell="[]",
+        )
+        change = GetStatistic.get_change_statistics(150.0)
+        self.assertEqual(change["change"], 50.0)
 
     def test_calculate_change_insufficient_payment(self):
         """Test cambio con pago insuficiente"""
-        with self.assertRaises(ValueError):
-            SellService.calculate_change(100.0, 80.0)
-
-    def test_validate_sell_data_success(self):
-        """Test validación exitosa de datos de venta"""
-        errors = SellService.validate_sell_data(self.product1.pk, 5)
-        self.assertEqual(len(errors), 0)
-
-    def test_validate_sell_data_no_product(self):
-        """Test validación sin producto"""
-        errors = SellService.validate_sell_data(None, 5)
-        self.assertIn("Debe seleccionar un producto", errors)
-
-    def test_validate_sell_data_invalid_quantity(self):
-        """Test validación con cantidad inválida"""
-        errors = SellService.validate_sell_data(self.product1.pk, 0)
-        self.assertIn("La cantidad debe ser mayor a 0", errors)
+        RegistersellDetail.objects.create(
+            id_employed="caja1",
+            total_sell=Decimal("100.00"),
+            type_pay="Efectivo",
+            state_sell="Pagado",
+            detail_sell="[]",
+        )
+        with self.assertRaises(ValidationError):
+            GetStatistic.get_change_statistics(80.0)
 
 
 class ClientModelTestCase(TestCase):
@@ -196,7 +292,7 @@ class IntegrationTestCase(TestCase):
     def test_product_crud_flow(self):
         """Test flujo completo de CRUD de productos"""
         # Crear producto usando servicio
-        product = ProductService.create_product(
+        product = CreateProduct.create_product(
             "Producto Integración", Decimal("250.00"), "Test de integración"
         )
 
@@ -204,11 +300,11 @@ class IntegrationTestCase(TestCase):
         self.assertIsNotNone(product)
 
         # Buscar producto
-        found_product = ProductService.get_product_by_name("Producto Integración")
+        found_product = Search.get(Products, "name", "Producto Integración")
         self.assertIsNotNone(found_product)
 
         # Actualizar producto
-        updated = ProductService.update_product(
+        updated = UpdateProducts.update_product(
             "Producto Integración",
             "Producto Actualizado",
             Decimal("300.00"),
@@ -217,5 +313,2121 @@ class IntegrationTestCase(TestCase):
         self.assertEqual(updated.name, "Producto Actualizado")
 
         # Eliminar producto
-        deleted = ProductService.delete_product("Producto Actualizado")
+        deleted = DeleteProducts.delete_product("Producto Actualizado")
         self.assertTrue(deleted)
+
+
+# Presupuesto máximo de consultas SQL por endpoint (GET) con los datos de
+# QueryBudgetTestCase.setUp (5 productos). Un N+1 nuevo excede el presupuesto.
+# Toda ruta de psysmysql/urls.py y del router DRF debe tener una entrada.
+QUERY_BUDGETS = {
+    # psysmysql/urls.py
+    "app": 0,
+    "main": 4,
+    "register_product": 2,
+    "list-product": 2,
+    "delete-product": 2,
+    "update-product": 2,
+    "sell_product": 14,
+    "search_products_ajax": 2,
+    "delete_sell_item": 1,
+    "stock_products": 9,
+    "register_client": 0,
+    "all_clients": 2,
+    "list_all_sell_register": 6,
+    "list_detail_sell_register": 4,
+    "error": 0,
+    "assing_user": 6,
+    "metrics": 2,
+    "dashboard": 13,
+    "dashboard_api": 13,
+    "realtime_stats": 3,
+    "sales_stream": 2,
+    # Router DRF (/api/v1/)
+    "api-root": 2,
+    "user-list": 4,
+    "user-detail": 3,
+    "user-me": 2,
+    "user-update-profile": 2,
+    "product-list": 4,
+    "product-detail": 3,
+    "product-low-stock": 3,
+    "product-out-of-stock": 3,
+    "product-stock-history": 3,
+    "product-frequently-bought-with": 3,
+    "stock-list": 4,
+    "stock-detail": 3,
+    "stock-summary": 3,
+    "stock-adjust": 2,
+    "client-list": 3,
+    "client-detail": 3,
+    "client-purchase-history": 3,
+    "client-stats": 3,
+    "sell-list": 3,
+    "sell-detail": 3,
+    "sell-cancel": 2,
+    "sell-analytics": 7,
+    "sell-insights": 5,
+    "sell-daily-summary": 3,
+    "selldetails-list": 3,
+    "selldetails-detail": 3,
+}
+
+# Rutas cuyo GET no responde 2xx/3xx a propósito; el resto debe responder bien
+EXPECTED_STATUS = {
+    "sales_stream": 503,  # Requiere ASGI; el cliente de pruebas es WSGI
+    "user-update-profile": 405,  # Acciones solo POST/PATCH
+    "stock-adjust": 405,
+    "sell-cancel": 405,
+}
+
+
+class QueryBudgetTestCase(TestCase):
+    """Tests de presupuesto de consultas SQL por endpoint"""
+
+    SERVER_TIMING_QUERIES = re.compile(r'desc="(\d+) queries"')
+
+    def setUp(self):
+        self.user = User.objects.create_superuser(
+            username="budgetuser", password="testpass123", email="budget@test.com"
+        )
+        self.client = Client(raise_request_exception=False)
+        self.client.login(username="budgetuser", password="testpass123")
+
+        products = [
+            Products.objects.create(
+                name=f"Producto {i}", price=Decimal("100.00"), description="Test"
+            )
+            for i in range(5)
+        ]
+        for product in products:
+            Stock.objects.create(id_products=product, quantitystock=5)
+            sell = Sell.objects.create(totalsell=1, id_product=product)
+            SellProducts.objects.create(
+                idsell=sell,
+                idproduct=product,
+                quantity=1,
+                priceunitaty=product.price,
+            )
+        self.client_record = Clients.objects.create(
+            name="Cliente Budget",
+            email="cliente@test.com",
+            direction="Dirección test",
+            nit="123456789",
+            country="Colombia",
+            departament="Valle",
+            city="Cali",
+        )
+        self.register = RegistersellDetail.objects.create(
+            id_employed="budgetuser",
+            total_sell=Decimal("100.00"),
+            type_pay="Efectivo",
+            state_sell="Pagado",
+            detail_sell="[]",
+        )
+        self.product = products[0]
+        self.sell = Sell.objects.filter(id_product=self.product).first()
+
+    def get_route_kwargs(self, name):
+        """Argumentos de URL para las rutas de detalle"""
+        pks = {
+            "delete_sell_item": SellProducts.objects.first().pk,
+            "list_detail_sell_register": self.register.pk,
+            "user": self.user.pk,
+            "product": self.product.pk,
+            "stock": Stock.objects.first().pk,
+            "client": self.client_record.pk,
+            "sell": self.sell.pk,
+            "selldetails": self.register.pk,
+        }
+        return {"pk": pks.get(name, pks.get(name.split("-")[0]))}
+
+    @staticmethod
+    def get_routes():
+        """Rutas con nombre de psysmysql/urls.py y del router DRF"""
+        routes = {}
+        for pattern in app_urlpatterns:
+            if isinstance(pattern, URLPattern) and pattern.name:
+                routes[pattern.name] = pattern
+        for pattern in api_router.urls:
+            if pattern.name and "format" not in pattern.pattern.regex.groupindex:
+                routes[f"api:{pattern.name}"] = pattern
+        return routes
+
+    def query_count(self, response):
+        match = self.SERVER_TIMING_QUERIES.search(response["Server-Timing"])
+        return int(match.group(1))
+
+    def test_every_route_has_budget(self):
+        """Test que toda ruta tenga un presupuesto declarado"""
+        missing = [
+            name
+            for name in self.get_routes()
+            if name.removeprefix("api:") not in QUERY_BUDGETS
+        ]
+        self.assertEqual(missing, [], f"Rutas sin presupuesto de consultas: {missing}")
+
+    def test_routes_within_query_budget(self):
+        """Test que ninguna ruta exceda su presupuesto de consultas"""
+        for name, pattern in self.get_routes().items():
+            budget_name = name.removeprefix("api:")
+            kwargs = None
+            if pattern.pattern.regex.groupindex:
+                kwargs = self.get_route_kwargs(budget_name)
+            with self.subTest(route=name):
+                response = self.client.get(reverse(name, kwargs=kwargs))
+                queries = self.query_count(response)
+                expected = EXPECTED_STATUS.get(budget_name)
+                if expected is None:
+                    self.assertLess(response.status_code, 400, name)
+                else:
+                    self.assertEqual(response.status_code, expected, name)
+                self.assertLessEqual(
+                    queries,
+                    QUERY_BUDGETS[budget_name],
+                    f"{name}: {queries} consultas, presupuesto {QUERY_BUDGETS[budget_name]}",
+                )
+
+    def test_server_timing_header(self):
+        """Test que el middleware exponga la cabecera Server-Timing"""
+        response = self.client.get(reverse("app"))
+        self.assertIn("db;dur=", response["Server-Timing"])
+        self.assertIn("app;dur=", response["Server-Timing"])
+
+
+class BenchmarkHarnessTestCase(TestCase):
+    """Tests de las protecciones y la medición del harness de benchmarks"""
+
+    databases = "__all__"
+
+    def test_requires_dedicated_database(self):
+        """Test que los benchmarks que escriben rechacen una base no dedicada"""
+        from benchmarks.harness import require_bench_database
+
+        settings_dict = connections["default"].settings_dict
+        with mock.patch.dict(settings_dict, {"NAME": "psys_production"}):
+            with self.assertRaises(SystemExit):
+                require_bench_database("psys_production")
+        with mock.patch.dict(settings_dict, {"NAME": "psys_bench"}):
+            with self.assertRaises(SystemExit):
+                require_bench_database("otra_bench")
+            require_bench_database("psys_bench")
+
+    def test_seed_perf_requires_dedicated_database(self):
+        """Test que seed_perf no escriba ni borre en una base no dedicada"""
+        product = Products.objects.create(
+            name="Perf producto 000001", price=Decimal("1.00"), description="Test"
+        )
+        settings_dict = connections["default"].settings_dict
+        with mock.patch.dict(settings_dict, {"NAME": "psys_production"}):
+            with self.assertRaises(CommandError):
+                call_command("seed_perf", "--clear", "--database", "psys_production")
+        self.assertTrue(Products.objects.filter(pk=product.pk).exists())
+
+    def test_counts_queries_on_every_alias(self):
+        """Test que el conteo incluya las consultas de todos los alias"""
+        from benchmarks.harness import capture_all_queries
+
+        with capture_all_queries() as queries:
+            for alias in connections:
+                list(Products.objects.using(alias).all())
+        self.assertEqual(len(queries), len(list(connections)))
+
+
+class PerfCompareCommandTestCase(SimpleTestCase):
+    """Tests para el comando perfcompare"""
+
+    RESULT = {"p50_ms": 10.0, "p95_ms": 20.0, "queries": 5, "peak_memory_kb": 100.0}
+
+    def write_results(self, directory, name, **overrides):
+        path = Path(directory) / name
+        result = {**self.RESULT, **overrides}
+        path.write_text(json.dumps({"meta": {}, "results": {"api_products": result}}))
+        return str(path)
+
+    def test_no_regression(self):
+        """Test comparación sin regresiones"""
+        with tempfile.TemporaryDirectory() as directory:
+            baseline = self.write_results(directory, "base.json")
+            current = self.write_results(directory, "current.json", p50_ms=10.5)
+            call_command("perfcompare", baseline, current, stdout=StringIO())
+
+    def test_query_regression_fails(self):
+        """Test que una consulta adicional se marque como regresión"""
+        with tempfile.TemporaryDirectory() as directory:
+            baseline = self.write_results(directory, "base.json")
+            current = self.write_results(directory, "current.json", queries=6)
+            with self.assertRaises(CommandError):
+                call_command("perfcompare", baseline, current, stdout=StringIO())
+
+    def test_latency_threshold_is_configurable(self):
+        """Test umbral de latencia configurable"""
+        with tempfile.TemporaryDirectory() as directory:
+            baseline = self.write_results(directory, "base.json")
+            current = self.write_results(directory, "current.json", p95_ms=30.0)
+            with self.assertRaises(CommandError):
+                call_command("perfcompare", baseline, current, stdout=StringIO())
+            call_command(
+                "perfcompare",
+                baseline,
+                current,
+                p95_ms_threshold=60,
+                stdout=StringIO(),
+            )
+
+
+class MetricsTestCase(SimpleTestCase):
+    """Tests para el registro de métricas y sus shims de logging"""
+
+    def setUp(self):
+        metrics.registry.reset()
+
+    def test_log_operation_records_positive_duration(self):
+        """Test que LogOperation registre duraciones positivas"""
+        with LogOperation("Operación de prueba", metric_name="tests.operation"):
+            pass
+        data = metrics.registry.snapshot()["tests.operation"]
+        self.assertEqual(data["count"], 1)
+        self.assertGreater(data["sum_ns"], 0)
+
+    def test_log_execution_time_records_errors(self):
+        """Test que log_execution_time registre errores sin suprimirlos"""
+
+        @log_execution_time(metric_name="tests.failing")
+        def failing():
+            raise ValueError("fallo")
+
+        with self.assertLogs("psysmysql.performance", level="ERROR"):
+            with self.assertRaises(ValueError):
+                failing()
+        self.assertEqual(metrics.registry.snapshot()["tests.failing"]["errors"], 1)
+
+    def test_render_prometheus(self):
+        """Test formato de exposición Prometheus"""
+        metrics.registry.observe("tests.render", 2_000_000)
+        output = metrics.registry.render_prometheus()
+        self.assertIn(
+            'psysmysql_operation_duration_seconds_bucket{operation="tests.render",le="0.005"} 1',
+            output,
+        )
+        self.assertIn(
+            'psysmysql_operation_duration_seconds_count{operation="tests.render"} 1',
+            output,
+        )
+
+    def test_concurrent_observes_log_one_summary(self):
+        """Test que hilos concurrentes escriban un solo resumen por intervalo"""
+        registry = metrics.MetricsRegistry(summary_interval=60)
+        registry.last_summary -= 120
+        barrier = threading.Barrier(8)
+        monotonic = time.monotonic
+
+        def slow_monotonic():
+            # Ensancha la ventana entre la comprobación y el resumen
+            now = monotonic()
+            time.sleep(0.01)
+            return now
+
+        def worker():
+            barrier.wait()
+            registry.observe("tests.concurrent", 1_000_000)
+
+        with (
+            mock.patch.object(metrics.time, "monotonic", slow_monotonic),
+            self.assertLogs("psysmysql.performance", level="INFO") as logs,
+        ):
+            threads = [threading.Thread(target=worker) for _ in range(8)]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+        self.assertEqual(len(logs.records), 1)
+        self.assertEqual(registry.snapshot()["tests.concurrent"]["count"], 8)
+
+
+@override_settings(METRICS_TOKEN="scrape-token")
+class MetricsViewTestCase(TestCase):
+    """Tests de acceso a la vista /metrics/"""
+
+    def test_requires_token_or_staff(self):
+        """Test que la IP local del proxy no baste para leer las métricas"""
+        url = reverse("metrics")
+        self.assertEqual(url, "/metrics/")
+        self.assertEqual(self.client.get(url, REMOTE_ADDR="127.0.0.1").status_code, 403)
+        self.assertEqual(
+            self.client.get(url, HTTP_AUTHORIZATION="Bearer otro").status_code, 403
+        )
+        response = self.client.get(url, HTTP_AUTHORIZATION="Bearer scrape-token")
+        self.assertEqual(response.status_code, 200)
+
+        staff = User.objects.create_user(username="ops", password="x", is_staff=True)
+        self.client.force_login(staff)
+        self.assertEqual(self.client.get(url).status_code, 200)
+
+
+class QueueListenerHandlerTestCase(SimpleTestCase):
+    """Tests para el handler de logging no bloqueante"""
+
+    def test_records_written_by_listener(self):
+        """Test que los records encolados se escriban en el archivo rotado"""
+        with tempfile.TemporaryDirectory() as directory:
+            filename = Path(directory) / "logs" / "test.log"
+            handler = QueueListenerHandler(filename, rotation="size", console=False)
+            logger = logging.getLogger("psysmysql.tests.queue")
+            logger.addHandler(handler)
+            logger.propagate = False
+            try:
+                logger.warning("Registro %s", "encolado")
+                handler.flush()
+                self.assertIn("Registro encolado", filename.read_text())
+            finally:
+                logger.removeHandler(handler)
+                handler.stop_listener()
+
+    def test_fork_and_exit_hooks_shared(self):
+        """Test que crear handlers no registre hooks de fork ni de salida"""
+        with tempfile.TemporaryDirectory() as directory:
+            with (
+                mock.patch.object(logging_config.os, "register_at_fork") as at_fork,
+                mock.patch.object(logging_config.atexit, "register") as at_exit,
+            ):
+                handlers = [
+                    QueueListenerHandler(
+                        Path(directory) / f"test{index}.log", console=False
+                    )
+                    for index in range(3)
+                ]
+            at_fork.assert_not_called()
+            at_exit.assert_not_called()
+            listeners = [handler.listener for handler in handlers]
+            try:
+                logging_config.restart_listeners()
+                for handler, listener in zip(handlers, listeners):
+                    self.assertIsNot(handler.listener, listener)
+            finally:
+                # Sin fork real los listeners anteriores siguen vivos
+                for listener in listeners:
+                    if listener is not None:
+                        listener.stop()
+                for handler in handlers:
+                    handler.stop_listener()
+            self.assertFalse(set(handlers) & set(logging_config.listener_handlers))
+
+    def test_invalid_rotation(self):
+        """Test rotación inválida"""
+        with tempfile.TemporaryDirectory() as directory:
+            with self.assertRaises(ValueError):
+                QueueListenerHandler(Path(directory) / "test.log", rotation="weekly")
+
+
+class StructuredLoggingTestCase(TestCase):
+    """Tests para logs JSON, ids de correlación y muestreo"""
+
+    def make_record(self, name, level, msg="mensaje", **extra):
+        record = logging.LogRecord(name, level, __file__, 1, msg, (), None)
+        record.__dict__.update(extra)
+        return record
+
+    def test_sampling_filter(self):
+        """Test que el muestreo descarte INFO pero nunca WARNING o superiores"""
+        sampling = SamplingFilter(rates={"psysmysql": 1.0, "psysmysql.sells": 0.0})
+        self.assertFalse(sampling.filter(self.make_record("psysmysql.sells", logging.INFO)))
+        self.assertTrue(sampling.filter(self.make_record("psysmysql.sells", logging.ERROR)))
+        self.assertTrue(sampling.filter(self.make_record("psysmysql.stock", logging.INFO)))
+
+    def test_json_formatter(self):
+        """Test que el formato JSON incluya el id de correlación y los extras"""
+        token = request_id_var.set("abc123")
+        try:
+            record = self.make_record("psysmysql.sells", logging.INFO, sell_id=7)
+            RequestIdFilter().filter(record)
+            data = json.loads(JsonFormatter().format(record))
+        finally:
+            request_id_var.reset(token)
+        self.assertEqual(data["request_id"], "abc123")
+        self.assertEqual(data["sell_id"], 7)
+        self.assertEqual(data["level"], "INFO")
+
+    def test_request_id_header(self):
+        """Test que el middleware reutilice o genere el X-Request-ID"""
+        response = self.client.get(reverse("app"), HTTP_X_REQUEST_ID="req-42")
+        self.assertEqual(response["X-Request-ID"], "req-42")
+
+        response = self.client.get(reverse("app"), HTTP_X_REQUEST_ID="no válido!")
+        self.assertRegex(response["X-Request-ID"], r"^[0-9a-f]{32}$")
+
+
+class SalesAnalyticsTestCase(TestCase):
+    """Tests para la analítica de ventas agrupada"""
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username="analytics", password="testpass123")
+        self.client.login(username="analytics", password="testpass123")
+        Products.objects.create(name="Sin stock", price=Decimal("5.00"), description="Test")
+        self.products = {}
+        for name, price in (("Café", "50.00"), ("Pan", "10.00")):
+            product = Products.objects.create(
+                name=name, price=Decimal(price), description="Test"
+            )
+            Stock.objects.create(id_products=product, quantitystock=50)
+            self.products[name] = product
+
+        sales = [
+            (datetime(2025, 1, 15, 10), "100.00", "Efectivo", [("Café", 2, 50.0)]),
+            (datetime(2025, 1, 20, 18), "30.00", "tarjeta credito", [("Pan", 3, 10.0)]),
+            (datetime(2025, 3, 2, 9), "70.00", "Efectivo", [("Café", 1, 50.0), ("Pan", 2, 10.0)]),
+        ]
+        for sold_at, total, type_pay, lines in sales:
+            items = [
+                {
+                    "id": i,
+                    "name": name,
+                    "price": price,
+                    "quantity": quantity,
+                    "pricexquantity": quantity * price,
+                }
+                for i, (name, quantity, price) in enumerate(lines)
+            ]
+            items.append({"totals": {"total_sell": float(total)}})
+            register = RegistersellDetail.objects.create(
+                id_employed="analytics",
+                total_sell=Decimal(total),
+                type_pay=type_pay,
+                state_sell="Pagado",
+                detail_sell=str(items),
+            )
+            RegistersellDetail.objects.filter(pk=register.pk).update(
+                date=timezone.make_aware(sold_at)
+            )
+        # Las fechas históricas se asignan con update(): recalcular rollups
+        SalesRollup.rebuild()
+
+    def get_analytics(self, start, end):
+        return self.client.get(
+            reverse("api:sell-analytics"), {"start_date": start, "end_date": end}
+        )
+
+    def test_grouped_metrics(self):
+        """Test totales, series mensuales y productos más vendidos"""
+        data = self.get_analytics("2025-01-01", "2025-03-31").json()
+        self.assertEqual(data["total_orders"], 3)
+        self.assertEqual(data["total_sales"], 200.0)
+        self.assertEqual(
+            data["sales_by_payment_method"], {"Efectivo": 170.0, "tarjeta credito": 30.0}
+        )
+        self.assertEqual(
+            data["monthly_sales"],
+            [
+                {"month": "2025-01", "total": 130.0},
+                {"month": "2025-02", "total": 0.0},
+                {"month": "2025-03", "total": 70.0},
+            ],
+        )
+        self.assertEqual(len(data["daily_sales"]), 90)
+        self.assertEqual(
+            data["top_products"][0],
+            {
+                "idproducts": self.products["Pan"].pk,
+                "name": "Pan",
+                "quantity": 5,
+                "revenue": 50.0,
+            },
+        )
+        self.assertEqual(data["low_stock_products"][0]["name"], "Sin stock")
+
+    def test_bounded_queries(self):
+        """Test que el número de consultas no dependa del rango"""
+        with CaptureQueriesContext(connection) as short_range:
+            self.get_analytics("2025-01-01", "2025-01-31")
+        with CaptureQueriesContext(connection) as long_range:
+            self.get_analytics("2025-01-01", "2025-12-31")
+        self.assertEqual(len(short_range), len(long_range))
+
+        # Segunda llamada con la misma ventana: desde cache
+        with CaptureQueriesContext(connection) as cached:
+            self.get_analytics("2025-01-01", "2025-12-31")
+        self.assertLess(len(cached), len(long_range))
+
+    def test_invalid_range(self):
+        """Test rango con inicio posterior al fin"""
+        response = self.get_analytics("2025-03-01", "2025-01-01")
+        self.assertEqual(response.status_code, 400)
+
+    def test_range_limit(self):
+        """Test que los rangos de más de ANALYTICS_MAX_DAYS se rechacen"""
+        self.assertEqual(self.get_analytics("2024-01-01", "2024-12-31").status_code, 200)
+        response = self.get_analytics("2020-01-01", "2025-12-31")
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json(), {"error": "Date range cannot exceed 366 days"})
+        with self.assertRaises(ValueError):
+            SalesAnalytics.get_sales_analytics(date(2020, 1, 1), date(2025, 12, 31))
+
+
+class DailySummaryTestCase(TestCase):
+    """Tests para el resumen diario por hora"""
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username="daily", password="testpass123")
+        self.client.login(username="daily", password="testpass123")
+
+    def register_sale(self, total):
+        with self.captureOnCommitCallbacks(execute=True):
+            RegisterSellDetails.register_detail(
+                "daily", total, "Efectivo", "Pagado", "", "[]", total
+            )
+
+    def test_hourly_breakdown_single_query(self):
+        """Test desglose por hora con una consulta y relleno de horas vacías"""
+        self.register_sale(Decimal("40.50"))
+        self.register_sale(Decimal("9.50"))
+        with CaptureQueriesContext(connection) as queries:
+            data = self.client.get(reverse("api:sell-daily-summary")).json()
+        # Sesión + usuario + una consulta agrupada
+        self.assertEqual(len(queries), 3)
+        self.assertEqual(len(data["hourly_sales"]), 24)
+        self.assertEqual(data["total_orders"], 2)
+        self.assertEqual(data["total_sales"], 50.0)
+        hour = timezone.localtime().hour
+        self.assertEqual(data["hourly_sales"][hour]["orders"], 2)
+
+    def test_incremental_update(self):
+        """Test que una venta nueva actualice el resumen en cache sin consultas"""
+        self.client.get(reverse("api:sell-daily-summary"))
+        self.register_sale(Decimal("25.00"))
+        with CaptureQueriesContext(connection) as queries:
+            data = self.client.get(reverse("api:sell-daily-summary")).json()
+        self.assertEqual(len(queries), 2)
+        self.assertEqual(data["total_orders"], 1)
+        self.assertEqual(data["total_sales"], 25.0)
+
+    def test_sale_during_rebuild_not_lost(self):
+        """Test que una venta registrada durante la reconstrucción no se pierda"""
+        build = SalesAnalytics.build_hourly_sales
+
+        def build_then_sell(day):
+            hourly = build(day)
+            self.register_sale(Decimal("10.00"))
+            return hourly
+
+        with mock.patch.object(
+            SalesAnalytics, "build_hourly_sales", side_effect=build_then_sell
+        ):
+            self.assertEqual(SalesAnalytics.get_daily_summary()["total_orders"], 0)
+        summary = SalesAnalytics.get_daily_summary()
+        self.assertEqual(summary["total_orders"], 1)
+        self.assertEqual(summary["total_sales"], 10.0)
+
+    def test_expired_generation_rebuilds(self):
+        """Test que al expirar la generación del día el resumen se reconstruya"""
+        SalesAnalytics.get_daily_summary()
+        with mock.patch.object(cache, "get_or_set", wraps=cache.get_or_set) as get_or_set:
+            SalesAnalytics.get_daily_summary()
+        self.assertEqual(get_or_set.call_args.args[2], constants.CACHE_TIMEOUT_LONG)
+
+        cache.delete(
+            constants.CACHE_KEY_DAILY_SUMMARY_GENERATION.format(timezone.localdate().isoformat())
+        )
+        self.register_sale(Decimal("10.00"))
+        self.assertEqual(SalesAnalytics.get_daily_summary()["total_orders"], 1)
+
+
+class SalesRollupTestCase(TestCase):
+    """Tests para los rollups diarios de ventas"""
+
+    def setUp(self):
+        self.product = Products.objects.create(
+            name="Arepa", price=Decimal("4.00"), description="Test"
+        )
+
+    def register_sale(self, employee, type_pay, quantity):
+        detail = [
+            {
+                "id": 1,
+                "id_product": self.product.pk,
+                "name": self.product.name,
+                "price": 4.0,
+                "quantity": quantity,
+                "pricexquantity": quantity * 4.0,
+            },
+            {"totals": {"total_sell": quantity * 4.0}},
+        ]
+        RegisterSellDetails.register_detail(
+            employee, quantity * 4.0, type_pay, "Pagado", "", detail, quantity * 4.0
+        )
+
+    def test_checkout_upserts_rollups(self):
+        """Test que cada venta actualice los rollups del día"""
+        self.register_sale("ana", "Efectivo", 2)
+        self.register_sale("ana", "Efectivo", 3)
+        self.register_sale("luis", "tarjeta credito", 1)
+
+        rollup = DailySalesRollup.objects.get(id_employed="ana", type_pay="Efectivo")
+        self.assertEqual(rollup.date, timezone.localdate())
+        self.assertEqual(rollup.sells_count, 2)
+        self.assertEqual(rollup.revenue, Decimal("20.00"))
+        self.assertEqual(rollup.units, 5)
+
+        product_rollup = DailyProductSalesRollup.objects.get(id_product=self.product)
+        self.assertEqual(product_rollup.units, 6)
+        self.assertEqual(product_rollup.revenue, Decimal("24.00"))
+
+        self.assertEqual(json.loads(GetStatistic.quantity_total_sells()), 3)
+        self.assertEqual(json.loads(GetStatistic.total_money_sell()), {"total": 24.0})
+        self.assertEqual(
+            json.loads(GetStatistic.quantity_and_types_payment()),
+            [
+                {"type_pay": "Efectivo", "count": 2},
+                {"type_pay": "tarjeta credito", "count": 1},
+            ],
+        )
+
+    def test_increment_rows_single_statement(self):
+        """Test upsert con incrementos: inserta y suma en una sola sentencia"""
+        other = Products.objects.create(
+            name="Pandebono", price=Decimal("2.00"), description="Test"
+        )
+        day = timezone.localdate()
+        rows = [
+            (day, self.product.pk, 2, Decimal("8.00")),
+            (day, other.pk, 1, Decimal("2.00")),
+        ]
+        with CaptureQueriesContext(connection) as queries:
+            increment_rows(
+                DailyProductSalesRollup, ("date", "id_product"), ("units", "revenue"), rows
+            )
+        self.assertEqual(len(queries), 1)
+        increment_rows(
+            DailyProductSalesRollup, ("date", "id_product"), ("units", "revenue"), rows[:1]
+        )
+        self.assertEqual(
+            dict(DailyProductSalesRollup.objects.values_list("id_product", "units")),
+            {self.product.pk: 4, other.pk: 1},
+        )
+        self.assertEqual(
+            DailyProductSalesRollup.objects.get(id_product=self.product).revenue,
+            Decimal("16.00"),
+        )
+
+    def test_rebuild_command_matches_incremental(self):
+        """Test que el comando reconstruya los mismos rollups"""
+        self.register_sale("ana", "Efectivo", 2)
+        self.register_sale("luis", "Efectivo", 1)
+        fields = ("date", "type_pay", "id_employed", "sells_count", "revenue", "units")
+        incremental = list(DailySalesRollup.objects.order_by("id_employed").values(*fields))
+        incremental_products = list(
+            DailyProductSalesRollup.objects.values("date", "id_product", "units", "revenue")
+        )
+
+        DailySalesRollup.objects.all().delete()
+        call_command("rebuild_sales_rollups", stdout=StringIO())
+
+        self.assertEqual(
+            list(DailySalesRollup.objects.order_by("id_employed").values(*fields)),
+            incremental,
+        )
+        self.assertEqual(
+            list(DailyProductSalesRollup.objects.values("date", "id_product", "units", "revenue")),
+            incremental_products,
+        )
+
+    def test_migration_backfills_history(self):
+        """Test que la migración de los rollups llene las ventas ya registradas"""
+        self.register_sale("ana", "Efectivo", 2)
+        self.register_sale("ana", "Efectivo", 1)
+        DailySalesRollup.objects.all().delete()
+        DailyProductSalesRollup.objects.all().delete()
+
+        migration = import_module("psysmysql.migrations.0003_daily_sales_rollups")
+        migration.backfill_rollups(django_apps, mock.Mock(connection=connection))
+
+        rollup = DailySalesRollup.objects.get()
+        self.assertEqual((rollup.sells_count, rollup.units), (2, 3))
+        self.assertEqual(
+            DailyProductSalesRollup.objects.get(id_product=self.product).revenue,
+            Decimal("12.00"),
+        )
+
+
+class DashboardTestCase(TestCase):
+    """Tests para el dashboard principal y su API"""
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username="dashboard", password="testpass123")
+        self.client.login(username="dashboard", password="testpass123")
+        product = Products.objects.create(
+            name="Empanada", price=Decimal("3.00"), description="Test"
+        )
+        Stock.objects.create(id_products=product, quantitystock=2)
+        detail = [
+            {
+                "id": 1,
+                "id_product": product.pk,
+                "name": product.name,
+                "price": 3.0,
+                "quantity": 4,
+                "pricexquantity": 12.0,
+            }
+        ]
+        RegisterSellDetails.register_detail(
+            "dashboard", 12.0, "Efectivo", "Pagado", "", detail, 12.0
+        )
+
+    def test_summary_endpoint(self):
+        """Test que el resumen devuelva todos los widgets en una llamada"""
+        response = self.client.get(reverse("dashboard_api"), {"endpoint": "summary"})
+        result = response.json()
+        self.assertTrue(result["success"])
+        data = result["data"]
+        self.assertEqual(data["kpis"]["total_sales"], 1)
+        self.assertEqual(data["kpis"]["total_revenue"], 12.0)
+        self.assertEqual(data["kpis"]["low_stock_products"], 1)
+        self.assertEqual(
+            data["products_performance"]["top_products"][0]["quantity_sold"], 4
+        )
+        self.assertEqual(data["payment_methods"]["labels"], ["Efectivo"])
+        self.assertEqual(len(data["recent_activities"]), 1)
+        self.assertEqual(data["alerts"][0]["title"], "Stock bajo")
+
+    def test_summary_served_from_cache(self):
+        """Test que el segundo resumen no consulte la base de datos"""
+        self.client.get(reverse("dashboard_api"), {"endpoint": "summary"})
+        with CaptureQueriesContext(connection) as queries:
+            self.client.get(reverse("dashboard_api"), {"endpoint": "summary"})
+        # Solo sesión y usuario
+        self.assertEqual(len(queries), 2)
+
+    def test_sales_chart_endpoint(self):
+        """Test gráfico de ventas con días sin ventas en cero"""
+        response = self.client.get(
+            reverse("dashboard_api"), {"endpoint": "sales_chart", "days": 7}
+        )
+        data = response.json()["data"]
+        self.assertEqual(len(data["labels"]), 7)
+        self.assertEqual(data["datasets"][0]["data"], [0, 0, 0, 0, 0, 0, 1])
+
+    def test_unknown_endpoint(self):
+        """Test endpoint desconocido"""
+        response = self.client.get(reverse("dashboard_api"), {"endpoint": "nada"})
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(response.json()["success"])
+
+    def test_dashboard_page(self):
+        """Test que la página del dashboard se renderice"""
+        response = self.client.get(reverse("dashboard"))
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, "Empanada")
+
+
+@override_settings(LIVE_FEED_REDIS_URL="redis://127.0.0.1:1/0")
+class LiveFeedTestCase(TestCase):
+    """Tests para el feed en vivo (SSE) del dashboard"""
+
+    def setUp(self):
+        live_feed._publisher = None
+        self.user = User.objects.create_user(username="live", password="testpass123")
+
+    def tearDown(self):
+        live_feed._publisher = None
+
+    def test_format_event(self):
+        """Test formato text/event-stream"""
+        self.assertEqual(
+            live_feed.format_event('{"a": 1}', "sale"), 'event: sale\ndata: {"a": 1}\n\n'
+        )
+
+    def test_publish_without_redis(self):
+        """Test que un Redis caído no rompa ni demore el registro de la venta"""
+        with self.assertLogs("psysmysql.live_feed", level="WARNING"):
+            with self.captureOnCommitCallbacks(execute=True):
+                RegisterSellDetails.register_detail(
+                    "live", 10.0, "Efectivo", "Pagado", "", "[]", 10.0
+                )
+            # La publicación corre en el hilo del feed: esperar a que termine
+            live_feed._publish_executor.submit(lambda: None).result()
+        self.assertEqual(RegistersellDetail.objects.count(), 1)
+
+    async def test_listen_backs_off(self):
+        """Test espera creciente cuando Redis cierra la suscripción"""
+        broadcaster = live_feed.SalesBroadcaster()
+        broadcaster.queues.add(asyncio.Queue())
+        delays = []
+
+        async def sleep(delay):
+            delays.append(delay)
+            if len(delays) == 6:
+                broadcaster.queues.clear()
+
+        async def listen():
+            return
+            yield
+
+        pubsub = mock.Mock(subscribe=mock.AsyncMock(), aclose=mock.AsyncMock(), listen=listen)
+        client = mock.Mock(pubsub=mock.Mock(return_value=pubsub), aclose=mock.AsyncMock())
+        with (
+            self.assertLogs("psysmysql.live_feed", level="WARNING"),
+            mock.patch.object(live_feed.aioredis, "from_url", return_value=client),
+            mock.patch.object(live_feed.asyncio, "sleep", sleep),
+        ):
+            await broadcaster.listen()
+        self.assertEqual(delays, [1, 2, 4, 8, 16, 30])
+
+    async def test_events_fan_out(self):
+        """Test que cada cliente reciba el snapshot y los deltas publicados"""
+        first = live_feed.sales_events({"total_sales": 0}, heartbeat=5)
+        second = live_feed.sales_events(heartbeat=5)
+        self.assertEqual(await anext(first), "retry: 5000\n\n")
+        self.assertIn("event: snapshot", await anext(first))
+        self.assertEqual(await anext(second), "retry: 5000\n\n")
+
+        next_first = asyncio.ensure_future(anext(first))
+        next_second = asyncio.ensure_future(anext(second))
+        await asyncio.sleep(0)
+        live_feed.broadcaster.dispatch('{"id": 1}')
+        self.assertEqual(await next_first, 'event: sale\ndata: {"id": 1}\n\n')
+        self.assertEqual(await next_second, 'event: sale\ndata: {"id": 1}\n\n')
+
+        await first.aclose()
+        await second.aclose()
+        self.assertEqual(live_feed.broadcaster.queues, set())
+
+    async def test_stream_releases_db_connection(self):
+        """Test que el stream libere la conexión a la base antes de empezar"""
+        await self.async_client.aforce_login(self.user)
+        with mock.patch("psysmysql.views.connections.close_all") as close_all:
+            response = await self.async_client.get(reverse("sales_stream"))
+        close_all.assert_called_once()
+        self.assertEqual(response["Content-Type"], "text/event-stream")
+        stream = aiter(response.streaming_content)
+        self.assertEqual(await anext(stream), b"retry: 5000\n\n")
+        await stream.aclose()
+
+    def test_stream_requires_asgi(self):
+        """Test que bajo WSGI el stream responda 503 para usar el polling"""
+        self.client.login(username="live", password="testpass123")
+        response = self.client.get(reverse("sales_stream"))
+        self.assertEqual(response.status_code, 503)
+
+
+class AsgiUrlconf:
+    """URLconf de un proceso ASGI: vistas de lectura async"""
+
+    urlpatterns = build_urlpatterns(serve_async=True)
+
+
+@override_settings(ROOT_URLCONF=AsgiUrlconf)
+class AsyncViewsTestCase(TestCase):
+    """Tests para las vistas de lectura async servidas por ASGI"""
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username="async", password="testpass123")
+        Products.objects.create(name="Producto Async", price=Decimal("5.00"), description="A")
+        Products.objects.create(name="Otro", price=Decimal("2.00"), description="B")
+
+    async def test_search_products_ajax(self):
+        """Test búsqueda AJAX con el ORM async y conteo de consultas en ASGI"""
+        await self.async_client.aforce_login(self.user)
+        response = await self.async_client.get(
+            reverse("search_products_ajax"), {"q": "async"}
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            [product["name"] for product in response.json()["results"]],
+            ["Producto Async"],
+        )
+        # sesión, usuario y carga del índice, contadas por el middleware async
+        self.assertIn('desc="3 queries"', response["Server-Timing"])
+
+    async def test_view_product_cached(self):
+        """Test listado de productos con total y cache async"""
+        response = await self.async_client.get(reverse("list-product"))
+        self.assertContains(response, "Productos totales: 2")
+        cached = await cache.aget(constants.CACHE_KEY_ALL_PRODUCTS)
+        self.assertEqual(cached["total"], 2)
+
+        response = await self.async_client.get(reverse("list-product"))
+        self.assertIn('desc="0 queries"', response["Server-Timing"])
+
+    async def test_dashboard_api_invalid_grouping(self):
+        """Test agrupación no soportada en el widget async del gráfico"""
+        await self.async_client.aforce_login(self.user)
+        response = await self.async_client.get(
+            reverse("dashboard_api"), {"endpoint": "sales_chart", "grouping": "year"}
+        )
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(response.json()["success"])
+
+    @override_settings(ROOT_URLCONF="PsysMsql.urls")
+    def test_wsgi_routes_sync_views(self):
+        """Test que bajo WSGI las vistas de lectura sigan síncronas"""
+        for name in ("list-product", "all_clients", "search_products_ajax", "dashboard"):
+            view = resolve(reverse(name)).func
+            self.assertFalse(asyncio.iscoroutinefunction(view), name)
+        self.client.force_login(self.user)
+        response = self.client.get(reverse("search_products_ajax"), {"q": "async"})
+        self.assertEqual(response.json()["results"][0]["name"], "Producto Async")
+
+
+class ProductTypeaheadTestCase(TestCase):
+    """Tests para el índice de autocompletado de productos"""
+
+    def setUp(self):
+        cache.clear()
+        with self.captureOnCommitCallbacks(execute=True):
+            CreateProduct.create_product("Café con Leche", Decimal("4.50"), "Bebida")
+            CreateProduct.create_product("Empanada de Pollo", Decimal("3.00"), "Horneado")
+
+    def names(self, query):
+        return [result["name"] for result in SearchByAjax.search_products_ajax(query)]
+
+    def test_accent_and_case_insensitive(self):
+        """Test coincidencia por prefijo sin tildes ni mayúsculas"""
+        self.assertEqual(self.names("cafe"), ["Café con Leche"])
+        self.assertEqual(self.names("LECH"), ["Café con Leche"])
+        self.assertEqual(self.names("caf lec"), ["Café con Leche"])
+        self.assertEqual(self.names("pollo empa"), ["Empanada de Pollo"])
+
+    def test_search_without_queries(self):
+        """Test que el índice ya cargado responda sin consultas SQL"""
+        self.names("cafe")
+        with self.assertNumQueries(0):
+            self.assertEqual(self.names("empa"), ["Empanada de Pollo"])
+
+    def test_update_and_delete_sync_index(self):
+        """Test que editar y eliminar productos actualice el índice"""
+        self.names("cafe")
+        with self.captureOnCommitCallbacks(execute=True):
+            UpdateProducts.update_product(
+                "Café con Leche", "Té Verde", Decimal("3.00"), ""
+            )
+        with self.assertNumQueries(0):
+            self.assertEqual(self.names("te v"), ["Té Verde"])
+        self.assertEqual(ProductTypeahead.search("cafe"), [])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            DeleteProducts.delete_product("Té Verde")
+        self.assertEqual(ProductTypeahead.search("verde"), [])
+
+    def test_changes_outside_services_sync_index(self):
+        """Test que altas y bajas por el ORM (API, admin) actualicen el índice"""
+        self.names("cafe")
+        with self.captureOnCommitCallbacks(execute=True):
+            arepa = Products.objects.create(
+                name="Arepa", price=Decimal("2.00"), description=""
+            )
+        with self.assertNumQueries(0):
+            self.assertEqual(self.names("arep"), ["Arepa"])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            arepa.delete()
+        self.assertEqual(ProductTypeahead.search("arep"), [])
+
+    def test_product_without_price(self):
+        """Test que un producto sin precio se indexe con precio nulo"""
+        self.names("cafe")
+        with self.captureOnCommitCallbacks(execute=True):
+            Products.objects.create(name="Arepa", price=None, description="")
+        self.assertEqual(ProductTypeahead.search("arep")[0]["price"], None)
+
+        ProductTypeahead.invalidate()
+        self.assertEqual(self.names("arep"), ["Arepa"])
+
+    def test_other_process_change_triggers_rebuild(self):
+        """Test que un cambio de versión en cache fuerce la reconstrucción"""
+        self.names("cafe")
+        Products.objects.create(name="Arepa", price=Decimal("2.00"), description="")
+        ProductTypeahead.invalidate()
+        self.assertEqual(self.names("arep"), ["Arepa"])
+
+    def test_infix_fallback(self):
+        """Test búsqueda dentro de una palabra con icontains"""
+        self.assertEqual(self.names("panad"), ["Empanada de Pollo"])
+
+    def test_search_time_at_100k_products(self):
+        """Test que el índice responda en menos de 5 ms con 100k productos"""
+        index = TypeaheadIndex()
+        words = ["Café", "Leche", "Pan", "Queso", "Jugo", "Arroz", "Frijol", "Té"]
+        index.load(
+            (
+                (i, f"{words[i % 8]} {words[(i // 8) % 8]} {i:06d}", 1, "")
+                for i in range(100_000)
+            ),
+            version=0,
+        )
+        timings = []
+        for query in ["cafe", "leche queso", "00042", "ju"] * 5:
+            start = time.perf_counter()
+            index.search(query)
+            timings.append(time.perf_counter() - start)
+        self.assertLess(sorted(timings)[len(timings) // 2], 0.005)
+
+
+class FullTextSearchTestCase(TestCase):
+    """Tests para la búsqueda de texto completo de productos y clientes"""
+
+    def setUp(self):
+        self.user = User.objects.create_user(username="fulltext", password="testpass123")
+        self.client.force_login(self.user)
+        Products.objects.create(name="Café de olla", price=Decimal("4.00"), description="Canela")
+        Products.objects.create(name="Leche", price=Decimal("2.00"), description="Entera")
+        Clients.objects.create(name="Ana Pérez", email="ana@example.com", nit="123")
+        Clients.objects.create(name="Luis Gómez", email="luis@example.com", nit="456")
+
+    def test_split_terms(self):
+        """Test términos para MATCH y términos cortos para icontains"""
+        long_words, short_words = FullTextSearch.split_terms("café de-olla +x@y")
+        self.assertEqual(long_words, ["café", "olla"])
+        self.assertEqual(short_words, ["de", "x", "y"])
+        self.assertEqual(FullTextSearch.boolean_query(long_words), "+café* +olla*")
+
+    def test_match_expression(self):
+        """Test SQL de MATCH sobre las columnas del índice"""
+        sql, params = FullTextSearch.match(
+            Products.objects.all(), ("name", "description"), ["cafe"]
+        ).as_sql(None, connection)
+        quote = connection.ops.quote_name
+        self.assertIn(
+            f"MATCH ({quote('Products')}.{quote('name')}, "
+            f"{quote('Products')}.{quote('description')}) AGAINST (%s IN BOOLEAN MODE)",
+            sql,
+        )
+        self.assertEqual(params, ["+cafe*"])
+
+    def test_filter_without_index_needs_like_fields(self):
+        """Test que un modelo sin índice FULLTEXT pida los campos de icontains"""
+        with self.assertRaises(ValueError):
+            FullTextSearch.filter(Stock.objects.all(), "de")
+        queryset = FullTextSearch.filter(
+            Stock.objects.all(), "de", like_fields=("id_products__name",)
+        )
+        self.assertEqual(queryset.count(), 0)
+
+    def test_product_api_search(self):
+        """Test búsqueda de productos en la API por nombre y descripción"""
+        response = self.client.get(reverse("api:product-list"), {"search": "canela"})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            [product["name"] for product in response.json()["results"]], ["Café de olla"]
+        )
+
+    def test_client_api_search(self):
+        """Test búsqueda de clientes en la API con varias palabras"""
+        response = self.client.get(reverse("api:client-list"), {"search": "ana example"})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            [client["email"] for client in response.json()["results"]],
+            ["ana@example.com"],
+        )
+
+    def test_client_api_ranked_order(self):
+        """Test que la API de clientes conserve el orden por relevancia al paginar"""
+        Clients.objects.create(name="Aarón", email="ana.aaron@example.com", nit="789")
+        Clients.objects.create(name="Anabel", email="anabel@example.com", nit="012")
+
+        def match(queryset, fields, words):
+            # Relevancia de MySQL simulada: nombre pesa más que correo
+            return Case(
+                When(name__istartswith=words[0], then=Value(2.0)),
+                When(email__icontains=words[0], then=Value(1.0)),
+                default=Value(0.0),
+                output_field=FloatField(),
+            )
+
+        url = reverse("api:client-list")
+        with (
+            mock.patch.object(FullTextSearch, "supported", return_value=True),
+            mock.patch.object(FullTextSearch, "match", side_effect=match),
+        ):
+            data = self.client.get(url, {"search": "ana", "page_size": 2}).json()
+            self.assertEqual(data["count"], 3)
+            self.assertEqual(
+                [client["name"] for client in data["results"]], ["Ana Pérez", "Anabel"]
+            )
+            data = self.client.get(data["next"]).json()
+            self.assertEqual([client["name"] for client in data["results"]], ["Aarón"])
+
+            # Con ?ordering= manda el orden pedido (y la paginación por cursor)
+            data = self.client.get(url, {"search": "ana", "ordering": "name"}).json()
+            self.assertEqual(
+                [client["name"] for client in data["results"]],
+                ["Aarón", "Ana Pérez", "Anabel"],
+            )
+            self.assertNotIn("count", data)
+
+    def test_sell_page_client_search(self):
+        """Test búsqueda de clientes por nombre del formulario de venta"""
+        self.assertEqual(
+            [client.name for client in ClientLookup.lookup("gómez")], ["Luis Gómez"]
+        )
+
+
+class ClientLookupTestCase(TestCase):
+    """Tests para la búsqueda de clientes en caja"""
+
+    def setUp(self):
+        Clients.objects.create(
+            name="Ana", email="ana@example.com", nit="1234567-K", direction="Zona 1",
+            telephone="+576012345678",
+        )
+        Clients.objects.create(name="Andrés", email="andres@example.com", nit="1234999")
+        Clients.objects.create(name="Luis", email="luis@example.com", nit="765")
+
+    def emails(self, query, **kwargs):
+        return [client.email for client in ClientLookup.lookup(query, **kwargs)]
+
+    def test_exact_email_single_query(self):
+        """Test coincidencia exacta de correo sin distinguir mayúsculas"""
+        with self.assertNumQueries(1):
+            self.assertEqual(self.emails("ANA@example.com"), ["ana@example.com"])
+
+    def test_exact_nit_and_telephone(self):
+        """Test coincidencia exacta de NIT y teléfono"""
+        self.assertEqual(self.emails("765"), ["luis@example.com"])
+        self.assertEqual(self.emails("+57 601 234 5678"), ["ana@example.com"])
+
+    @override_settings(PHONENUMBER_DEFAULT_REGION="CO")
+    def test_local_telephone_without_country_code(self):
+        """Test teléfono local escrito sin el código de país"""
+        with self.assertNumQueries(2):
+            self.assertEqual(self.emails("601 234 5678"), ["ana@example.com"])
+        self.assertEqual(self.emails("6012"), ["ana@example.com"])
+        self.assertEqual(self.emails("+6012"), [])
+
+    def test_prefix_search(self):
+        """Test búsqueda por prefijo de correo, NIT y teléfono"""
+        self.assertEqual(self.emails("an"), ["ana@example.com", "andres@example.com"])
+        self.assertEqual(self.emails("1234"), ["ana@example.com", "andres@example.com"])
+        self.assertEqual(self.emails("576012"), ["ana@example.com"])
+        self.assertEqual(self.emails("an", limit=1), ["ana@example.com"])
+        self.assertEqual(self.emails("zz"), [])
+
+    def test_bill_client_data(self):
+        """Test datos del cliente para la factura"""
+        data = GetDataClientForBill.get_data_client("ana@example.com")
+        self.assertEqual(data[0]["name"], "Ana")
+        self.assertEqual(data[0]["direction"], "Zona 1")
+        self.assertEqual(GetDataClientForBill.get_data_client("nadie@example.com"), [])
+
+
+class ClientListingTestCase(TestCase):
+    """Tests para el listado paginado de clientes"""
+
+    def setUp(self):
+        cache.clear()
+        for name in ["Carla", "Ana", "Beto"]:
+            Clients.objects.create(name=name, email=f"{name.lower()}@example.com")
+
+    def test_pages_ordered_by_name(self):
+        """Test páginas ordenadas por nombre con las columnas de la tabla"""
+        page = GertAllClients.get_all_clients(1, per_page=2)
+        self.assertEqual([client["name"] for client in page], ["Ana", "Beto"])
+        self.assertEqual(page.paginator.num_pages, 2)
+        self.assertEqual(set(page[0]), set(CLIENT_LIST_FIELDS))
+
+        self.assertEqual(
+            [client["name"] for client in GertAllClients.get_all_clients(9, per_page=2)],
+            ["Carla"],
+        )
+        self.assertEqual(GertAllClients.get_all_clients("x", per_page=2).number, 1)
+
+    def test_cached_count(self):
+        """Test que el total se cuente una vez y se invalide en altas y bajas"""
+        GertAllClients.get_all_clients(1, per_page=2)
+        with self.assertNumQueries(1):
+            GertAllClients.get_all_clients(2, per_page=2)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            RegisterClients.register_client(
+                "Dora", "dora@example.com", "", None, "1", "Colombia", "Antioquia", "Medellín"
+            )
+        self.assertEqual(GertAllClients.get_all_clients(1).paginator.count, 4)
+
+        # Altas y bajas fuera del servicio (API, admin)
+        with self.captureOnCommitCallbacks(execute=True):
+            Clients.objects.create(name="Elena", email="elena@example.com")
+        self.assertEqual(GertAllClients.get_all_clients(1).paginator.count, 5)
+        with self.captureOnCommitCallbacks(execute=True):
+            Clients.objects.get(name="Ana").delete()
+        self.assertEqual(GertAllClients.get_all_clients(1).paginator.count, 4)
+
+    def test_view_renders_page(self):
+        """Test que la vista muestre la página pedida"""
+        response = self.client.get(reverse("all_clients"), {"page": 1})
+        self.assertContains(response, "ana@example.com")
+        self.assertEqual(response.context["page_obj"].paginator.count, 3)
+
+
+class KeysetPaginationTestCase(TestCase):
+    """Tests para la paginación por keyset (cursor)"""
+
+    def setUp(self):
+        self.user = User.objects.create_user(username="keyset", password="testpass123")
+        self.client.force_login(self.user)
+        # Ventas con fechas repetidas: el id desempata el orden
+        dates = [datetime(2025, 1, 1, 10), datetime(2025, 1, 1, 10), datetime(2025, 1, 2, 9)]
+        for day in range(7):
+            register = RegistersellDetail.objects.create(
+                id_employed="keyset",
+                total_sell=Decimal("10.00"),
+                type_pay="Efectivo",
+                state_sell="Pagado",
+                detail_sell="[]",
+            )
+            RegistersellDetail.objects.filter(pk=register.pk).update(
+                date=timezone.make_aware(dates[day % 3])
+            )
+        self.ordering = ("-date", "-idsell")
+        self.expected = list(
+            RegistersellDetail.objects.order_by(*self.ordering).values_list("idsell", flat=True)
+        )
+
+    def walk(self, page, attribute):
+        ids = []
+        while page is not None:
+            ids.append([register.idsell for register in page])
+            cursor = getattr(page, attribute)
+            page = (
+                keyset_paginate(RegistersellDetail.objects.all(), self.ordering, cursor, 3)
+                if cursor
+                else None
+            )
+        return ids
+
+    def test_forward_and_backward_with_tied_dates(self):
+        """Test recorrer las páginas en ambos sentidos sin repetir ni saltar filas"""
+        first = keyset_paginate(RegistersellDetail.objects.all(), self.ordering, None, 3)
+        self.assertFalse(first.has_previous())
+        forward = self.walk(first, "next_cursor")
+        self.assertEqual([len(ids) for ids in forward], [3, 3, 1])
+        self.assertEqual(sum(forward, []), self.expected)
+
+        last_cursor = keyset_paginate(
+            RegistersellDetail.objects.all(), self.ordering, None, 6
+        ).next_cursor
+        last = keyset_paginate(RegistersellDetail.objects.all(), self.ordering, last_cursor, 3)
+        self.assertFalse(last.has_next())
+        backward = self.walk(last, "previous_cursor")
+        self.assertEqual(sum(reversed(backward), []), self.expected)
+
+    def test_invalid_cursor(self):
+        """Test que un cursor manipulado muestre la primera página en HTML y 404 en la API"""
+        with self.assertRaises(ValueError):
+            keyset_paginate(RegistersellDetail.objects.all(), self.ordering, "no-valido", 3)
+
+        response = self.client.get(reverse("list_all_sell_register"), {"cursor": "no-valido"})
+        self.assertEqual(response.status_code, 200)
+        self.assertFalse(response.context["page_obj"].has_previous())
+
+        response = self.client.get(reverse("api:selldetails-list"), {"cursor": "no-valido"})
+        self.assertEqual(response.status_code, 404)
+
+    def test_api_cursor_and_count(self):
+        """Test respuestas de la API con cursores y total exacto o aproximado"""
+        url = reverse("api:selldetails-list")
+        data = self.client.get(url, {"page_size": 4}).json()
+        self.assertNotIn("count", data)
+        self.assertIsNone(data["previous"])
+        self.assertEqual([row["idsell"] for row in data["results"]], self.expected[:4])
+
+        data = self.client.get(data["next"]).json()
+        self.assertIsNone(data["next"])
+        self.assertEqual([row["idsell"] for row in data["results"]], self.expected[4:])
+
+        for mode in ("exact", "approximate"):
+            data = self.client.get(url, {"count": mode}).json()
+            self.assertEqual(data["count"], 7)
+        self.assertEqual(estimate_count(RegistersellDetail.objects.all()), 7)
+
+        Clients.objects.create(name="Ana", email="ana@example.com")
+        data = self.client.get(reverse("api:client-list")).json()
+        self.assertIn("next", data)
+        self.assertEqual(len(data["results"]), 1)
+
+    def walk_api(self, data, link):
+        emails = []
+        while True:
+            emails.append([client["email"] for client in data["results"]])
+            if not data[link]:
+                return emails
+            response = self.client.get(data[link])
+            self.assertEqual(response.status_code, 200)
+            data = response.json()
+
+    def test_nullable_ordering_field(self):
+        """Test recorrer clientes ordenados por teléfono con valores NULL"""
+        telephones = ["+50223456789", None, "+50221111111", None, "+50229999999"]
+        for i, telephone in enumerate(telephones):
+            Clients.objects.create(
+                name=f"C{i}", email=f"c{i}@example.com", telephone=telephone
+            )
+        url = reverse("api:client-list")
+        # NULL es el menor valor; el id desempata
+        ascending = [f"c{i}@example.com" for i in (1, 3, 2, 0, 4)]
+        for ordering, expected in (
+            ("telephone", ascending),
+            ("-telephone", ascending[::-1]),
+        ):
+            first = self.client.get(url, {"ordering": ordering, "page_size": 2}).json()
+            forward = self.walk_api(first, "next")
+            self.assertEqual([len(emails) for emails in forward], [2, 2, 1])
+            self.assertEqual(sum(forward, []), expected)
+
+            last = first
+            while last["next"]:
+                last = self.client.get(last["next"]).json()
+            backward = self.walk_api(last, "previous")
+            self.assertEqual(sum(reversed(backward), []), expected)
+
+    def test_unusable_ordering(self):
+        """Test error 400 al paginar por un campo relacionado"""
+        request = Request(RequestFactory().get("/", {"ordering": "id_products__name"}))
+        with self.assertRaises(DRFValidationError) as error:
+            KeysetPagination().paginate_queryset(
+                Stock.objects.all(), request, StockViewSet()
+            )
+        self.assertIn("ordering", error.exception.detail)
+
+        response = self.client.get(reverse("api:sell-list"), {"ordering": "-totalsell"})
+        self.assertEqual(response.status_code, 200)
+
+    def test_ranked_queryset_uses_page_numbers(self):
+        """Test que un orden por anotación (relevancia) pagine por número de página"""
+        for name in ("Ana", "Beto", "Carla"):
+            Clients.objects.create(name=name, email=f"{name.lower()}@example.com")
+        request = Request(RequestFactory().get("/", {"page_size": 2, "page": 2}))
+        pagination = KeysetPagination()
+        rows = pagination.paginate_queryset(
+            Clients.objects.annotate(rank=Length("name")).order_by("-rank"),
+            request,
+            ClientViewSet(),
+        )
+        self.assertEqual([client.name for client in rows], ["Ana"])
+        data = pagination.get_paginated_response([]).data
+        self.assertEqual(data["count"], 3)
+        self.assertIsNone(data["next"])
+
+
+class ConnectionPoolTestCase(SimpleTestCase):
+    """Tests para el pool de conexiones por proceso"""
+
+    def make_pool(self, **options):
+        options.setdefault("ping", lambda connection: connection.execute("SELECT 1"))
+        return QueuePool(lambda: sqlite3.connect(":memory:"), **options)
+
+    def test_reuses_released_connection(self):
+        """Test que una conexión devuelta se reutilice sin abrir otra"""
+        pool = self.make_pool()
+        first = pool.connect()
+        pool.release(first)
+        self.assertIs(pool.connect(), first)
+        self.assertEqual(pool.stats["created"], 1)
+        self.assertEqual(pool.stats["reused"], 1)
+
+    def test_overflow_and_timeout(self):
+        """Test overflow en picos, espera acotada y cierre del sobrante"""
+        pool = self.make_pool(pool_size=1, max_overflow=1, timeout=0.01)
+        first, second = pool.connect(), pool.connect()
+        with self.assertRaises(PoolTimeout):
+            pool.connect()
+
+        pool.release(first)
+        pool.release(second)
+        self.assertEqual(pool.status()["size"], 1)
+        self.assertEqual(pool.status()["idle"], 1)
+
+    def test_discards_dead_and_old_connections(self):
+        """Test descartar conexiones que no responden o superan recycle"""
+        def dead(connection):
+            raise sqlite3.OperationalError("server has gone away")
+
+        pool = self.make_pool(ping=dead)
+        first = pool.connect()
+        pool.release(first)
+        self.assertIsNot(pool.connect(), first)
+
+        pool = self.make_pool(recycle=0)
+        first = pool.connect()
+        pool.release(first)
+        time.sleep(0.001)
+        self.assertIsNot(pool.connect(), first)
+        self.assertEqual(pool.stats["discarded"], 1)
+
+    def test_release_rolls_back(self):
+        """Test que devolver la conexión descarte la transacción abierta"""
+        pool = self.make_pool(pool_size=1)
+        db = pool.connect()
+        db.execute("CREATE TABLE t (x INTEGER)")
+        db.commit()
+        db.execute("INSERT INTO t VALUES (1)")
+        pool.release(db)
+        self.assertEqual(pool.connect().execute("SELECT COUNT(*) FROM t").fetchone(), (0,))
+
+    def test_new_pool_after_fork(self):
+        """Test que un proceso hijo no reutilice el pool del padre"""
+        self.addCleanup(dispose_pools)
+        pool = get_pool("pool-test", lambda: sqlite3.connect(":memory:"))
+        self.assertIs(get_pool("pool-test", None), pool)
+        pool.pid = -1
+        self.assertIsNot(get_pool("pool-test", lambda: sqlite3.connect(":memory:")), pool)
+
+
+@override_settings(DATABASE_REPLICA_ALIAS="replica")
+class ReplicaRouterTestCase(SimpleTestCase):
+    """Tests para el enrutamiento de lecturas a la réplica"""
+
+    def test_reporting_reads_from_replica(self):
+        """Test reportes en la réplica y la primaria fuera de ellos"""
+        self.assertEqual(router.db_for_read(Products), "default")
+        with read_from_replica():
+            self.assertEqual(router.db_for_read(Products), "replica")
+            self.assertEqual(router.db_for_write(Products), "default")
+
+        with override_settings(DATABASE_REPLICA_ALIAS=None), read_from_replica():
+            self.assertEqual(router.db_for_read(Products), "default")
+
+    def test_sticky_primary_after_write(self):
+        """Test que tras escribir las lecturas del mismo ámbito vayan a la primaria"""
+        with routing_scope():
+            with read_from_replica():
+                self.assertEqual(router.db_for_read(Sell), "replica")
+            router.db_for_write(Sell)
+            with read_from_replica():
+                self.assertEqual(router.db_for_read(Sell), "default")
+
+    def test_middleware_routes_safe_api_requests(self):
+        """Test GET de la API en la réplica, escrituras con cookie sticky"""
+        factory = RequestFactory()
+        seen = {}
+
+        def view(request):
+            seen[request.method, request.path] = router.db_for_read(Products)
+            if request.method == "POST":
+                router.db_for_write(Products)
+            return HttpResponse()
+
+        middleware = ReplicaRoutingMiddleware(view)
+        middleware(factory.get("/api/v1/products/"))
+        middleware(factory.get("/list-product/"))
+        response = middleware(factory.post("/api/v1/products/"))
+        self.assertEqual(seen["GET", "/api/v1/products/"], "replica")
+        self.assertEqual(seen["GET", "/list-product/"], "default")
+        self.assertEqual(seen["POST", "/api/v1/products/"], "default")
+
+        cookie = response.cookies[constants.REPLICA_STICKY_COOKIE]
+        self.assertEqual(cookie["max-age"], constants.REPLICA_STICKY_SECONDS)
+        request = factory.get("/api/v1/products/")
+        request.COOKIES[constants.REPLICA_STICKY_COOKIE] = cookie.value
+        middleware(request)
+        self.assertEqual(seen["GET", "/api/v1/products/"], "default")
+
+
+REPLICA_ALIAS = getattr(settings, "DATABASE_REPLICA_ALIAS", None)
+REPLICA_CONFIGURED = REPLICA_ALIAS in settings.DATABASES
+
+
+@skipUnless(REPLICA_CONFIGURED, "Sin base de datos réplica configurada")
+class ReplicaRoutingIntegrationTestCase(TransactionTestCase):
+    """
+    Tests de la réplica con una segunda base configurada (espejo en tests)
+
+    TransactionTestCase: la réplica es otra conexión y solo ve datos confirmados.
+    """
+
+    databases = {"default", REPLICA_ALIAS} if REPLICA_CONFIGURED else {"default"}
+
+    def setUp(self):
+        self.user = User.objects.create_user(username="replica", password="testpass123")
+        Products.objects.create(name="Café", price=Decimal("5.00"), description="Test")
+        self.client.force_login(self.user)
+
+    def test_api_reads_hit_replica(self):
+        """Test que un GET de la API consulte la réplica y un reporte también"""
+        replica = connections[REPLICA_ALIAS]
+        with CaptureQueriesContext(replica) as queries:
+            response = self.client.get(reverse("api:product-list"))
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(queries.captured_queries)
+
+        with CaptureQueriesContext(replica) as queries:
+            GetStatistic.total_money_sell()
+        self.assertEqual(len(queries), 1)
+
+
+class IndexUsageTestCase(TestCase):
+    """Tests EXPLAIN: cada consulta frecuente usa su índice (migración 0007)"""
+
+    def setUp(self):
+        product = Products.objects.create(name="Café", price=Decimal("5.00"), description="Test")
+        self.product = product
+        Stock.objects.create(id_products=product, quantitystock=3)
+        self.sell = Sell.objects.create(id_product=product, totalsell=5)
+        SellProducts.objects.create(
+            idsell=self.sell, idproduct=product, quantity=1, priceunitaty=Decimal("5.00")
+        )
+        for type_pay in ("Efectivo", "Tarjeta"):
+            RegistersellDetail.objects.create(
+                id_employed="caja1",
+                total_sell=Decimal("5.00"),
+                type_pay=type_pay,
+                state_sell="Pagado",
+                detail_sell="[]",
+            )
+
+    def assertUsesIndex(self, queryset, *index_names):
+        plan = queryset.explain()
+        self.assertTrue(
+            any(name in plan for name in index_names),
+            f"{index_names} no aparece en el plan:\n{plan}",
+        )
+
+    def test_register_sells_indexes(self):
+        """Test orden por fecha y filtros por pago, empleado y estado"""
+        since = timezone.now() - timezone.timedelta(days=30)
+        registers = RegistersellDetail.objects.all()
+        self.assertUsesIndex(
+            registers.order_by("-date", "-idsell")[:20], "register_sells_date_idx"
+        )
+        self.assertUsesIndex(
+            registers.filter(type_pay="Efectivo", date__gte=since),
+            "register_sells_pay_date_idx",
+        )
+        self.assertUsesIndex(
+            registers.filter(id_employed="caja1", date__gte=since),
+            "register_sells_emp_date_idx",
+        )
+        self.assertUsesIndex(
+            registers.filter(state_sell="Pagado").order_by("-date"),
+            "register_sells_state_date_idx",
+        )
+
+    def test_stock_and_cart_indexes(self):
+        """Test rangos de stock, stock por producto y líneas de una venta"""
+        self.assertUsesIndex(Stock.objects.filter(quantitystock__lt=10), "stock_quantity_idx")
+        # SQLite recrea la tabla con UNIQUE en línea: sqlite_autoindex_Stock_N
+        self.assertUsesIndex(
+            Stock.objects.filter(id_products=self.product),
+            "stock_unique_product",
+            "sqlite_autoindex_Stock",
+        )
+        self.assertUsesIndex(
+            SellProducts.objects.filter(idsell=self.sell, idproduct=self.product),
+            "sellproducts_sell_product_idx",
+        )
+
+    def test_stock_unique_per_product(self):
+        """Test que no se pueda crear un segundo stock para el mismo producto"""
+        with self.assertRaises(IntegrityError):
+            Stock.objects.create(id_products=self.product, quantitystock=1)
+
+
+
+class SalesArchiveTestCase(TestCase):
+    """Tests del archivado de ventas antiguas y las particiones mensuales"""
+
+    def setUp(self):
+        cache.clear()
+        self.old_day = timezone.localdate() - timezone.timedelta(days=500)
+        self.old = self.create_sale(Decimal("7.00"), self.old_day)
+        self.recent = self.create_sale(Decimal("3.00"), timezone.localdate())
+
+    def create_sale(self, total, day):
+        register = RegistersellDetail.objects.create(
+            id_employed="caja1",
+            total_sell=total,
+            type_pay="Efectivo",
+            state_sell="Pagado",
+            detail_sell="[]",
+        )
+        moment = timezone.make_aware(datetime(day.year, day.month, day.day, 10))
+        RegistersellDetail.objects.filter(pk=register.pk).update(date=moment)
+        return register
+
+    def test_archive_moves_old_sales(self):
+        """Test que solo las ventas antiguas pasen al archivo con su id"""
+        call_command("archive_sales", "--batch-size", "1", stdout=StringIO())
+
+        self.assertEqual(
+            list(RegistersellDetail.objects.values_list("idsell", flat=True)),
+            [self.recent.pk],
+        )
+        archived = RegistersellArchive.objects.get()
+        self.assertEqual(archived.idsell, self.old.pk)
+        self.assertEqual(archived.total_sell, Decimal("7.00"))
+        self.assertEqual(timezone.localdate(archived.date), self.old_day)
+        # Una segunda ejecución no encuentra nada que mover
+        self.assertEqual(SalesArchive.archive(), 0)
+
+    def test_querysets_include_archive_only_when_needed(self):
+        """Test que los rangos recientes no consulten el archivo"""
+        self.assertFalse(SalesArchive.needs_archive(None))
+        SalesArchive.archive()
+
+        today = timezone.make_aware(
+            datetime.combine(timezone.localdate(), datetime.min.time())
+        )
+        self.assertEqual(len(SalesArchive.querysets(today)), 1)
+        self.assertEqual(len(SalesArchive.querysets(None)), 2)
+        totals = [
+            sum(register.total_sell for register in queryset)
+            for queryset in SalesArchive.querysets(None)
+        ]
+        self.assertEqual(totals, [Decimal("3.00"), Decimal("7.00")])
+
+    def test_reports_read_archived_sales(self):
+        """Test detalle, ventas por hora y rollups con ventas archivadas"""
+        SalesArchive.archive()
+
+        detail = GetIndividualtatistic.get_individual_statistics(self.old.pk)
+        self.assertEqual(detail.get().total_sell, Decimal("7.00"))
+        self.assertEqual(SalesAnalytics.build_hourly_sales(self.old_day)[10], (1, 700))
+
+        SalesRollup.rebuild()
+        self.assertEqual(
+            DailySalesRollup.objects.get(date=self.old_day).revenue, Decimal("7.00")
+        )
+
+    def test_partition_helpers(self):
+        """Test límites mensuales y que fuera de MySQL no se toquen particiones"""
+        self.assertEqual(add_months(timezone.datetime(2025, 11, 1).date(), 3).isoformat(), "2026-02-01")
+        self.assertEqual(add_months(timezone.datetime(2025, 1, 1).date(), -1).isoformat(), "2024-12-01")
+        month = timezone.datetime(2025, 12, 1).date()
+        self.assertEqual(
+            partition_clause(month),
+            "PARTITION p202512 VALUES LESS THAN (TO_DAYS('2026-01-01'))",
+        )
+        self.assertEqual(upper_bound(month).isoformat(), "2026-01-01T00:00:00+00:00")
+        if connection.vendor != "mysql":
+            self.assertEqual(SellPartitions.ensure_future(), [])
+            self.assertEqual(SellPartitions.drop_before(timezone.now()), [])
+
+
+class SalesExportTestCase(TestCase):
+    """Tests de la exportación incremental a Parquet"""
+
+    def setUp(self):
+        self.product = Products.objects.create(
+            name="Arepa", price=Decimal("4.00"), description="Test"
+        )
+        self.output = Path(self.enterContext(tempfile.TemporaryDirectory()))
+
+    def create_sale(self, quantity, day=None, recent=False):
+        detail = [
+            {
+                "id": 1,
+                "id_product": self.product.pk,
+                "name": "Arepa",
+                "price": 4.0,
+                "quantity": quantity,
+                "pricexquantity": quantity * 4.0,
+            },
+            # Venta antigua sin id de producto en el detalle
+            {"id": 2, "name": "Arepa", "price": 4.0, "quantity": 1, "pricexquantity": 4.0},
+            {"totals": {"total_sell": quantity * 4.0 + 4.0}},
+        ]
+        register = RegistersellDetail.objects.create(
+            id_employed="caja1",
+            total_sell=Decimal(quantity * 4 + 4),
+            type_pay="Efectivo",
+            state_sell="Pagado",
+            detail_sell=str(detail),
+        )
+        if day is not None:
+            moment = timezone.make_aware(datetime(day.year, day.month, day.day, 12))
+            RegistersellDetail.objects.filter(pk=register.pk).update(date=moment)
+        elif not recent:
+            RegistersellDetail.objects.filter(pk=register.pk).update(
+                date=timezone.now() - timezone.timedelta(hours=1)
+            )
+        return register
+
+    def read(self, dataset):
+        import pyarrow.parquet as pq
+
+        return pq.read_table(self.output / dataset).to_pylist()
+
+    def test_export_writes_date_partitions(self):
+        """Test datasets sales y sale_lines particionados por fecha local"""
+        old_day = timezone.localdate() - timezone.timedelta(days=3)
+        first = self.create_sale(2, day=old_day)
+        second = self.create_sale(1)
+
+        out = StringIO()
+        call_command(
+            "export_sales_parquet", "--output", str(self.output), "--chunk-size", "1", stdout=out
+        )
+        self.assertIn("Exportadas 2 ventas y 4 líneas", out.getvalue())
+        self.assertTrue(
+            (self.output / "sales" / f"date={old_day:%Y-%m-%d}" / f"part-{first.pk:010d}.parquet").exists()
+        )
+
+        sales = sorted(self.read("sales"), key=lambda row: row["idsell"])
+        self.assertEqual([row["idsell"] for row in sales], [first.pk, second.pk])
+        self.assertEqual(sales[0]["total_sell"], Decimal("12.00"))
+        self.assertEqual((sales[0]["items"], sales[0]["units"]), (2, 3))
+        lines = self.read("sale_lines")
+        self.assertEqual(len(lines), 4)
+        self.assertEqual({line["id_product"] for line in lines}, {self.product.pk})
+
+    def test_export_is_incremental(self):
+        """Test que la segunda ejecución solo exporte ventas nuevas"""
+        self.create_sale(1)
+        SalesExport.export(self.output)
+        self.assertEqual(SalesExport.export(self.output)["sales"], 0)
+
+        newer = self.create_sale(5)
+        result = SalesExport.export(self.output)
+        self.assertEqual(result["sales"], 1)
+        self.assertEqual(SalesExport.read_state(self.output)["last_idsell"], newer.pk)
+        self.assertEqual(len(self.read("sales")), 2)
+
+        # --full reescribe todo sin duplicar
+        SalesExport.export(self.output, full=True)
+        self.assertEqual(len(self.read("sales")), 2)
+
+    def test_recent_sales_wait_for_next_export(self):
+        """Test que la marca de agua no pase por encima de ventas recientes"""
+        settled = self.create_sale(1)
+        recent = self.create_sale(2, recent=True)
+        # Id mayor confirmado antes que la venta reciente
+        later = self.create_sale(3)
+
+        result = SalesExport.export(self.output)
+        self.assertEqual(result["sales"], 1)
+        self.assertEqual(SalesExport.read_state(self.output)["last_idsell"], settled.pk)
+
+        result = SalesExport.export(self.output, settle_minutes=0)
+        self.assertEqual(result["sales"], 2)
+        self.assertEqual(
+            sorted(row["idsell"] for row in self.read("sales")),
+            [settled.pk, recent.pk, later.pk],
+        )
+
+
+class SalesInsightsTestCase(TestCase):
+    """Tests de las métricas vectorizadas de ventas"""
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username="insights", password="testpass123")
+        self.client.force_login(self.user)
+        self.products = {}
+        for name, price, quantity in (("Café", "50.00", 50), ("Pan", "10.00", 4)):
+            product = Products.objects.create(
+                name=name, price=Decimal(price), description="Test"
+            )
+            Stock.objects.create(id_products=product, quantitystock=quantity)
+            self.products[name] = product
+
+        # 15/01 miércoles, 20/01 lunes, 02/03 domingo (hora local)
+        sales = [
+            (datetime(2025, 1, 15, 10), "100.00", "ana", [("Café", 2, 50.0)]),
+            (datetime(2025, 1, 20, 18), "30.00", "luis", [("Pan", 3, 10.0)]),
+            (datetime(2025, 3, 2, 9), "70.00", "ana", [("Café", 1, 50.0), ("Pan", 2, 10.0)]),
+        ]
+        for sold_at, total, employee, lines in sales:
+            items = [
+                {
+                    "id": i,
+                    "id_product": self.products[name].pk,
+                    "name": name,
+                    "price": price,
+                    "quantity": quantity,
+                    "pricexquantity": quantity * price,
+                }
+                for i, (name, quantity, price) in enumerate(lines)
+            ]
+            items.append({"totals": {"total_sell": float(total)}})
+            register = RegistersellDetail.objects.create(
+                id_employed=employee,
+                total_sell=Decimal(total),
+                type_pay="Efectivo",
+                state_sell="Pagado",
+                detail_sell=str(items),
+            )
+            RegistersellDetail.objects.filter(pk=register.pk).update(
+                date=timezone.make_aware(sold_at)
+            )
+        SalesRollup.rebuild()
+
+    def get_insights(self, **params):
+        return self.client.get(
+            reverse("api:sell-insights"),
+            {"start_date": "2025-01-01", "end_date": "2025-03-31", **params},
+        )
+
+    def test_insights_metrics(self):
+        """Test canasta, percentiles, mapa de calor, empleados y velocidad"""
+        data = self.get_insights().json()
+
+        self.assertEqual(
+            data["basket_size"]["distribution"],
+            [{"units": "2", "orders": 1}, {"units": "3", "orders": 2}],
+        )
+        self.assertEqual(data["basket_size"]["median"], 3.0)
+        self.assertEqual(data["revenue"]["total"], 200.0)
+        self.assertEqual(data["revenue"]["percentiles"]["p50"], 70.0)
+
+        heatmap = data["hourly_heatmap"]
+        self.assertEqual(heatmap["orders"][2][10], 1)
+        self.assertEqual(heatmap["orders"][0][18], 1)
+        self.assertEqual(heatmap["revenue"][6][9], 70.0)
+        self.assertEqual(sum(map(sum, heatmap["orders"])), 3)
+
+        ana, luis = data["employee_performance"]
+        self.assertEqual(ana["id_employed"], "ana")
+        self.assertEqual((ana["orders"], ana["revenue"], ana["units"]), (2, 170.0, 5))
+        self.assertEqual(ana["average_ticket"], 85.0)
+        self.assertEqual(luis["revenue_share"], 0.15)
+
+        pan, cafe = data["product_velocity"]
+        self.assertEqual((pan["name"], pan["units"], pan["days_sold"]), ("Pan", 5, 2))
+        self.assertEqual(pan["units_per_day"], round(5 / 90, 3))
+        self.assertEqual(cafe["last_sold"], "2025-03-02")
+
+    def test_insights_cached_and_validated(self):
+        """Test cache por ventana y parámetros inválidos"""
+        with CaptureQueriesContext(connection) as first:
+            self.get_insights()
+        with CaptureQueriesContext(connection) as cached:
+            self.get_insights()
+        self.assertLess(len(cached), len(first))
+
+        self.assertEqual(self.get_insights(source="csv").status_code, 400)
+        self.assertEqual(
+            self.get_insights(start_date="2025-04-01").status_code, 400
+        )
+
+        empty = self.get_insights(start_date="2024-01-01", end_date="2024-01-31").json()
+        self.assertEqual(empty["revenue"]["orders"], 0)
+        self.assertEqual(empty["basket_size"]["distribution"], [])
+        self.assertEqual(empty["employee_performance"], [])
+
+    def test_parquet_source_matches_database(self):
+        """Test que las métricas desde Parquet coincidan con las de la base"""
+        output = Path(self.enterContext(tempfile.TemporaryDirectory()))
+        SalesExport.export(output)
+        with override_settings(SALES_EXPORT_DIR=output):
+            from_parquet = self.get_insights(source="parquet").json()
+        from_db = self.get_insights().json()
+        from_parquet.pop("source")
+        from_db.pop("source")
+        self.assertEqual(from_parquet, from_db)
+
+    def test_stock_summary_single_query(self):
+        """Test resumen de stock con una sola consulta agregada"""
+        with CaptureQueriesContext(connection) as queries:
+            data = self.client.get(reverse("api:stock-summary")).json()
+        self.assertEqual(data["total_products"], 2)
+        self.assertEqual(data["total_stock_value"], 2540.0)
+        self.assertEqual(data["low_stock_count"], 1)
+        stock_table = connection.ops.quote_name(Stock._meta.db_table)
+        stock_queries = [query for query in queries if stock_table in query["sql"]]
+        self.assertEqual(len(stock_queries), 1)
+
+
+class ProductAffinityTestCase(TestCase):
+    """Tests del análisis de canasta y frequently_bought_with"""
+
+    def setUp(self):
+        self.user = User.objects.create_user(username="basket", password="testpass123")
+        self.client.force_login(self.user)
+        self.products = {
+            name: Products.objects.create(name=name, price=Decimal("2.00"), description="Test")
+            for name in ("Café", "Pan", "Queso")
+        }
+        self.yesterday = timezone.localdate() - timezone.timedelta(days=1)
+
+    def create_sale(self, day, *names):
+        detail = [
+            {
+                "id": i,
+                "id_product": self.products[name].pk,
+                "name": name,
+                "price": 2.0,
+                "quantity": 1,
+                "pricexquantity": 2.0,
+            }
+            for i, name in enumerate(names)
+        ]
+        detail.append({"totals": {"total_sell": 2.0 * len(names)}})
+        register = RegistersellDetail.objects.create(
+            id_employed="caja1",
+            total_sell=Decimal(2 * len(names)),
+            type_pay="Efectivo",
+            state_sell="Pagado",
+            detail_sell=str(detail),
+        )
+        moment = timezone.make_aware(datetime(day.year, day.month, day.day, 12))
+        RegistersellDetail.objects.filter(pk=register.pk).update(date=moment)
+
+    def test_co_occurrences_and_rules(self):
+        """Test conteos XᵀX y soporte/confianza/lift en ambos sentidos"""
+        pairs = co_occurrences([[1, 2], [1, 2, 3], [2]])
+        self.assertEqual(
+            sorted(pairs),
+            [(1, 1, 2), (1, 2, 2), (1, 3, 1), (2, 2, 3), (2, 3, 1), (3, 3, 1)],
+        )
+
+        rules = {
+            (first, second): rest
+            for first, second, *rest in association_rules(pairs, 4, 2, 10)
+        }
+        self.assertEqual(set(rules), {(1, 2), (2, 1)})
+        baskets, support, confidence, lift = rules[(1, 2)]
+        self.assertEqual((baskets, support, confidence), (2, 0.5, 1.0))
+        self.assertAlmostEqual(lift, 4 / 3)
+        self.assertAlmostEqual(rules[(2, 1)][2], 2 / 3)
+
+    def test_nightly_job_is_incremental(self):
+        """Test que cada día se procese una vez y salga de la ventana"""
+        two_days_ago = self.yesterday - timezone.timedelta(days=1)
+        self.create_sale(two_days_ago, "Café", "Pan")
+        self.create_sale(self.yesterday, "Café", "Pan", "Queso")
+        self.create_sale(self.yesterday, "Pan")
+        SalesRollup.rebuild()
+
+        from .tasks import update_product_affinity
+
+        self.assertEqual(update_product_affinity(), {"days": 2, "rules": 2})
+        self.assertEqual(ProductAffinityJob.update()["days"], 0)
+        rule = ProductAffinity.objects.get(
+            id_product=self.products["Café"], id_related=self.products["Pan"]
+        )
+        self.assertEqual((rule.baskets, rule.confidence), (2, 1.0))
+
+        # Ventana de un día: el día más antiguo sale y sus pares se borran
+        ProductAffinityJob.update(window_days=1)
+        self.assertFalse(DailyProductPair.objects.filter(date=two_days_ago).exists())
+        self.assertFalse(DailyBasketCount.objects.filter(date=two_days_ago).exists())
+        self.assertFalse(ProductAffinity.objects.exists())
+
+    def test_total_counts_recorded_baskets(self):
+        """Test que las ventas sin productos existentes no cuenten como canastas"""
+        self.create_sale(self.yesterday, "Café", "Pan")
+        self.create_sale(self.yesterday, "Café", "Pan")
+        self.create_sale(self.yesterday, "Café", "Queso")
+        self.products["Borrado"] = Products.objects.create(
+            name="Borrado", price=Decimal("2.00"), description="Test"
+        )
+        self.create_sale(self.yesterday, "Borrado")
+        self.products.pop("Borrado").delete()
+        SalesRollup.rebuild()
+        ProductAffinityJob.update()
+
+        self.assertEqual(DailyBasketCount.objects.get(date=self.yesterday).baskets, 3)
+        rule = ProductAffinity.objects.get(
+            id_product=self.products["Café"], id_related=self.products["Pan"]
+        )
+        self.assertAlmostEqual(rule.support, 2 / 3)
+        self.assertAlmostEqual(rule.lift, 1.0)
+
+    def test_frequently_bought_with_single_query(self):
+        """Test que el endpoint responda con una consulta a product_affinity"""
+        for _ in range(2):
+            self.create_sale(self.yesterday, "Café", "Pan")
+        self.create_sale(self.yesterday, "Café", "Queso")
+        self.create_sale(self.yesterday, "Café", "Queso")
+        self.create_sale(self.yesterday, "Queso")
+        SalesRollup.rebuild()
+        ProductAffinityJob.update()
+
+        url = reverse("api:product-frequently-bought-with", args=[self.products["Café"].pk])
+        with CaptureQueriesContext(connection) as queries:
+            data = self.client.get(url).json()
+        self.assertEqual([row["name"] for row in data], ["Pan", "Queso"])
+        self.assertEqual(data[0]["confidence"], 0.5)
+        self.assertEqual(data[1]["lift"], round(0.5 / (3 / 5), 4))
+        affinity_table = connection.ops.quote_name(ProductAffinity._meta.db_table)
+        self.assertEqual(
+            len([query for query in queries if affinity_table in query["sql"]]), 1
+        )
+        self.assertEqual(self.client.get(url, {"limit": "1"}).json()[0]["name"], "Pan")
+
+        # Producto relacionado sin precio
+        Products.objects.filter(pk=self.products["Pan"].pk).update(price=None)
+        self.assertIsNone(self.client.get(url).json()[0]["price"])
+
+
+class StockForecastTestCase(TestCase):
+    """Tests del pronóstico de demanda y los umbrales de stock por producto"""
+
+    def setUp(self):
+        self.user = User.objects.create_user(username="forecast", password="testpass123")
+        self.client.force_login(self.user)
+        self.yesterday = timezone.localdate() - timezone.timedelta(days=1)
+        self.products = {}
+        for name, quantity in (("Rápido", 50), ("Quieto", 5)):
+            product = Products.objects.create(
+                name=name, price=Decimal("1.00"), description="Test"
+            )
+            Stock.objects.create(id_products=product, quantitystock=quantity)
+            self.products[name] = product
+        # "Rápido" vende 20 unidades diarias la última semana
+        for offset in range(7):
+            DailyProductSalesRollup.objects.create(
+                date=self.yesterday - timezone.timedelta(days=offset),
+                id_product=self.products["Rápido"],
+                units=20,
+                revenue=Decimal("20.00"),
+            )
+
+    def test_ewma_and_reorder_points(self):
+        """Test EWMA en forma cerrada y puntos de reorden con piso de 1"""
+        import numpy as np
+
+        demand = ewma(np.array([[1.0, 1.0, 1.0], [0.0, 0.0, 3.0]]), 0.5)
+        self.assertEqual(demand.tolist(), [1.0, 1.5])
+
+        safety, reorder = reorder_points(np.array([2.0, 0.0]), np.array([1.0, 0.0]), 4, 1.5)
+        self.assertEqual(safety.tolist(), [3, 0])
+        self.assertEqual(reorder.tolist(), [11, 1])
+
+    def test_demand_matrix_skips_unknown_products(self):
+        """Test que las ventas de un producto borrado no caigan en otra fila"""
+        import numpy as np
+
+        matrix = StockForecasting.demand_matrix(
+            np.array([self.products["Quieto"].pk]),
+            self.yesterday - timezone.timedelta(days=6),
+            7,
+        )
+        self.assertEqual(matrix.tolist(), [[0.0] * 7])
+
+    def test_nightly_batch_stores_forecasts(self):
+        """Test demanda, punto de reorden y días de cobertura guardados"""
+        from .tasks import update_stock_forecasts
+
+        self.assertEqual(update_stock_forecasts(), 2)
+        StockForecasting.update(history_days=7)
+        fast = StockForecast.objects.get(id_product=self.products["Rápido"])
+        self.assertAlmostEqual(fast.daily_demand, 20.0)
+        self.assertEqual(fast.reorder_point, 20 * constants.FORECAST_LEAD_TIME_DAYS)
+        self.assertEqual(fast.days_of_cover, 2.5)
+        idle = StockForecast.objects.get(id_product=self.products["Quieto"])
+        self.assertEqual((idle.reorder_point, idle.days_of_cover), (1, None))
+        # La segunda ejecución actualizó en lugar de duplicar
+        self.assertEqual(StockForecast.objects.count(), 2)
+
+    def test_low_stock_uses_per_product_thresholds(self):
+        """Test alertas y ?low_stock=true contra el punto de reorden de cada producto"""
+        StockForecasting.update(history_days=7)
+        # Sin pronóstico todavía: se usa LOW_STOCK_THRESHOLD
+        new = Products.objects.create(name="Nuevo", price=Decimal("1.00"), description="Test")
+        Stock.objects.create(id_products=new, quantitystock=5)
+
+        alerts = {alert["type"]: alert["count"] for alert in GetStockAlerts.get_stock_alerts()}
+        self.assertEqual(alerts.get("warning"), 2)
+
+        data = self.client.get("/api/v1/products/", {"low_stock": "true"}).json()
+        rows = data["results"] if isinstance(data, dict) else data
+        self.assertEqual(sorted(row["name"] for row in rows), ["Nuevo", "Rápido"])
+        self.assertEqual(
+            {row["name"]: row["stock_status"] for row in rows},
+            {"Nuevo": "low_stock", "Rápido": "low_stock"},
+        )
+
+        low = self.client.get(reverse("api:product-low-stock")).json()
+        self.assertEqual(sorted(row["name"] for row in low), ["Nuevo", "Rápido"])
@@ -1,35 +1,67 @@
+from django.conf import settings
 from django.urls import path
 from django.urls import include
 
 from . import views
 
-urlpatterns = [
-    path("", views.app, name="app"),
-    path("main/", views.dashboard, name="main"),
-    path("accounts/", include("django.contrib.auth.urls")),
-    path("register-product/", views.register_product, name="register_product"),
-    path("list-product/", views.view_product, name="list-product"),
-    path("delete-product/", views.delete_product, name="delete-product"),
-    path("update-product/", views.Update.as_view(), name="update-product"),
-    path("sell-product/", views.SellProductView.as_view(), name="sell_product"),
-    path(
-        "search-products-ajax/", views.search_products_ajax, name="search_products_ajax"
-    ),
-    path("delete-sell-item/<int:pk>/", views.delete_sell_item, name="delete_sell_item"),
-    path("stock-products/", views.register_stock, name="stock_products"),
-    path("register-clients/", views.register_clients, name="register_client"),
-    path("all_clients/", views.view_clients, name="all_clients"),
-    path(
-        "list-all-sell-register/",
-        views.listallsellregisterview,
-        name="list_all_sell_register",
-    ),
-    path(
-        "list-detail-sell-register/<int:pk>/",
-        views.detailregisterview,
-        name="list_detail_sell_register",
-    ),
-    path("error/", views.page_404, name="error"),
-    path("assing-user-group/", views.assign_user_to_group, name="assing_user"),
-    path("select2/", include("django_select2.urls")),
-]
+
+def build_urlpatterns(serve_async):
+    """
+    Rutas de la app
+
+    Con ``serve_async`` (solo bajo ASGI, ver ``PsysMsql/asgi.py``) las vistas
+    de lectura usan su variante async (``a<vista>``); bajo WSGI siguen
+    síncronas y no pasan por un event loop ni por ``sync_to_async``.
+    """
+
+    def read_view(view):
+        return getattr(views, f"a{view.__name__}") if serve_async else view
+
+    return [
+        path("", views.app, name="app"),
+        path("main/", views.dashboard, name="main"),
+        path("dashboard/", read_view(views.dashboard_main), name="dashboard"),
+        path("dashboard/api/", read_view(views.dashboard_api), name="dashboard_api"),
+        path(
+            "dashboard/realtime/",
+            read_view(views.realtime_stats),
+            name="realtime_stats",
+        ),
+        path("dashboard/stream/", views.sales_stream, name="sales_stream"),
+        path("accounts/", include("django.contrib.auth.urls")),
+        path("register-product/", views.register_product, name="register_product"),
+        path("list-product/", read_view(views.view_product), name="list-product"),
+        path("delete-product/", views.delete_product, name="delete-product"),
+        path("update-product/", views.Update.as_view(), name="update-product"),
+        path("sell-product/", views.SellProductView.as_view(), name="sell_product"),
+        path(
+            "search-products-ajax/",
+            read_view(views.search_products_ajax),
+            name="search_products_ajax",
+        ),
+        path(
+            "delete-sell-item/<int:pk>/",
+            views.delete_sell_item,
+            name="delete_sell_item",
+        ),
+        path("stock-products/", views.register_stock, name="stock_products"),
+        path("register-clients/", views.register_clients, name="register_client"),
+        path("all_clients/", read_view(views.view_clients), name="all_clients"),
+        path(
+            "list-all-sell-register/",
+            views.listallsellregisterview,
+            name="list_all_sell_register",
+        ),
+        path(
+            "list-detail-sell-register/<int:pk>/",
+            views.detailregisterview,
+            name="list_detail_sell_register",
+        ),
+        path("error/", views.page_404, name="error"),
+        path("assing-user-group/", views.assign_user_to_group, name="assing_user"),
+        path("metrics/", views.metrics, name="metrics"),
+        path("select2/", include("django_select2.urls")),
+    ]
+
+
+urlpatterns = build_urlpatterns(settings.SERVE_ASYNC_VIEWS)
@@ -1,7 +1,18 @@
 """
 Utilidades para cache, optimización de queries y funciones helper
 """
+import base64
+import binascii
+import datetime
+import json
+from functools import reduce
+from operator import or_
+
 from django.core.cache import cache
+from django.core.exceptions import ValidationError
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import connections
+from django.db.models import F, Q
 from django.core.paginator import Paginator, EmptyPage, PageNotAnInteger
 from django.contrib.auth.models import User
 from .constants import (
@@ -37,21 +48,23 @@ def invalidate_user_cache():
     """Invalida el cache de usuarios cuando hay cambios"""
     cache.delete("users_with_groups")
 
-def paginate_queryset(queryset, request, per_page=PRODUCTS_PER_PAGE):
+def paginate(queryset, page, per_page=PRODUCTS_PER_PAGE, count=None):
     """
-    Pagina un queryset con manejo de errores
-    
+    Devuelve la página ``page`` de un queryset con manejo de errores
+
     Args:
         queryset: QuerySet a paginar
-        request: Objeto request de Django
+        page: Número de página (texto o entero)
         per_page: Elementos por página
-    
+        count: Total ya conocido (p. ej. desde cache); evita el COUNT(*)
+
     Returns:
         tuple: (page_obj, paginator)
     """
     paginator = Paginator(queryset, per_page)
-    page = request.GET.get('page', 1)
-    
+    if count is not None:
+        paginator.count = count
+
     try:
         page_obj = paginator.page(page)
     except PageNotAnInteger:
@@ -60,9 +73,230 @@ def paginate_queryset(queryset, request, per_page=PRODUCTS_PER_PAGE):
     except EmptyPage:
         # Si la página está fuera de rango, mostrar la última página
         page_obj = paginator.page(paginator.num_pages)
-    
+
     return page_obj, paginator
 
+def paginate_queryset(queryset, request, per_page=PRODUCTS_PER_PAGE):
+    """
+    Pagina un queryset con manejo de errores
+    
+    Args:
+        queryset: QuerySet a paginar
+        request: Objeto request de Django
+        per_page: Elementos por página
+    
+    Returns:
+        tuple: (page_obj, paginator)
+    """
+    return paginate(queryset, request.GET.get('page', 1), per_page)
+
+class KeysetPage:
+    """
+    Página de una paginación por keyset (cursor)
+
+    ``next_cursor`` y ``previous_cursor`` son cadenas opacas para el
+    parámetro ``?cursor=``; ``None`` cuando no hay más páginas.
+    """
+
+    def __init__(self, object_list, next_cursor=None, previous_cursor=None):
+        self.object_list = object_list
+        self.next_cursor = next_cursor
+        self.previous_cursor = previous_cursor
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def has_next(self):
+        return self.next_cursor is not None
+
+    def has_previous(self):
+        return self.previous_cursor is not None
+
+class CursorEncoder(DjangoJSONEncoder):
+    """Conserva los microsegundos (DjangoJSONEncoder los trunca a milisegundos)"""
+
+    def default(self, o):
+        if isinstance(o, datetime.datetime):
+            return o.isoformat()
+        return super().default(o)
+
+def encode_cursor(values, reverse=False):
+    """Cursor opaco con los valores de ordenamiento de una fila"""
+    payload = json.dumps({"v": values, "r": reverse}, cls=CursorEncoder)
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+def decode_cursor(cursor, model, ordering):
+    """
+    Valores y dirección de un cursor; ``ValueError`` si es inválido
+
+    Los valores se convierten con el campo del modelo (fechas, decimales).
+    """
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        values = payload["v"]
+        if len(values) != len(ordering):
+            raise ValueError("cursor inválido")
+        values = [
+            model._meta.get_field(field.lstrip("-")).to_python(value)
+            for field, value in zip(ordering, values)
+        ]
+        return values, bool(payload.get("r"))
+    except (binascii.Error, UnicodeDecodeError, KeyError, TypeError, ValidationError) as e:
+        raise ValueError("cursor inválido") from e
+
+def keyset_after(name, value, descending, nullable=False):
+    """
+    Filas estrictamente posteriores a ``value`` en un campo del orden
+
+    NULL es el menor valor (ver ``keyset_order_by``): en orden ascendente lo
+    siguen todos los valores no nulos y en orden descendente va al final.
+    ``None`` si ninguna fila puede ir después (descendente desde NULL).
+    """
+    if value is None:
+        return None if descending else Q(**{f"{name}__isnull": False})
+    condition = Q(**{f"{name}__{'lt' if descending else 'gt'}": value})
+    if descending and nullable:
+        condition |= Q(**{f"{name}__isnull": True})
+    return condition
+
+def keyset_condition(ordering, values, reverse=False, nullable=()):
+    """
+    Filas posteriores (o anteriores con ``reverse``) a ``values``
+
+    Para ("-date", "-idsell") genera
+    ``date < d OR (date = d AND idsell < id)``, que MySQL resuelve como un
+    rango sobre el índice en vez de recorrer ``OFFSET`` filas. Los campos de
+    ``nullable`` comparan NULL con ``IS NULL`` en vez de ``=``/``<``.
+    """
+    conditions = []
+    for position, field in enumerate(ordering):
+        name = field.lstrip("-")
+        descending = field.startswith("-") != reverse
+        condition = keyset_after(name, values[position], descending, name in nullable)
+        if condition is None:
+            continue
+        for previous, value in zip(ordering[:position], values):
+            previous = previous.lstrip("-")
+            condition &= Q(
+                **{f"{previous}__isnull": True} if value is None else {previous: value}
+            )
+        conditions.append(condition)
+    return reduce(or_, conditions)
+
+def keyset_order_by(ordering, reverse=False, nullable=()):
+    """
+    ``ORDER BY`` de ``ordering`` (invertido con ``reverse``)
+
+    Los campos de ``nullable`` ponen NULL como el menor valor en cualquier
+    base (MySQL y SQLite ya lo hacen; PostgreSQL no), igual que asume
+    ``keyset_condition``.
+    """
+    order_by = []
+    for field in ordering:
+        name = field.lstrip("-")
+        descending = field.startswith("-") != reverse
+        if name not in nullable:
+            order_by.append(f"-{name}" if descending else name)
+        elif descending:
+            order_by.append(F(name).desc(nulls_last=True))
+        else:
+            order_by.append(F(name).asc(nulls_first=True))
+    return order_by
+
+def row_values(row, ordering, fields):
+    """Valores de orden de una fila, serializables (PhoneNumber -> "+502...")"""
+    names = [field.lstrip("-") for field in ordering]
+    if isinstance(row, dict):
+        values = [row[name] for name in names]
+    else:
+        values = [getattr(row, name) for name in names]
+    return [field.get_prep_value(value) for field, value in zip(fields, values)]
+
+def keyset_paginate(queryset, ordering, cursor=None, per_page=PRODUCTS_PER_PAGE):
+    """
+    Pagina por keyset sobre ``ordering`` (debe terminar en un campo único)
+
+    Args:
+        queryset: QuerySet a paginar
+        ordering: Campos de orden, p. ej. ("-date", "-idsell"); columnas del
+            modelo, pueden admitir NULL
+        cursor: Cursor recibido (``None`` para la primera página)
+        per_page: Elementos por página
+
+    Returns:
+        KeysetPage: una consulta ``LIMIT per_page + 1`` sin COUNT ni OFFSET
+
+    Raises:
+        ValueError: si el cursor es inválido
+    """
+    ordering = tuple(ordering)
+    fields = [queryset.model._meta.get_field(field.lstrip("-")) for field in ordering]
+    nullable = {
+        name.lstrip("-") for name, field in zip(ordering, fields) if field.null
+    }
+    values, reverse = (None, False)
+    if cursor:
+        values, reverse = decode_cursor(cursor, queryset.model, ordering)
+
+    queryset = queryset.order_by(*keyset_order_by(ordering, reverse, nullable))
+    if values is not None:
+        queryset = queryset.filter(keyset_condition(ordering, values, reverse, nullable))
+
+    rows = list(queryset[: per_page + 1])
+    has_more = len(rows) > per_page
+    rows = rows[:per_page]
+    if reverse:
+        rows.reverse()
+    if not rows:
+        return KeysetPage(rows)
+
+    first = row_values(rows[0], ordering, fields)
+    last = row_values(rows[-1], ordering, fields)
+    if reverse:
+        next_cursor = encode_cursor(last)
+        previous_cursor = encode_cursor(first, reverse=True) if has_more else None
+    else:
+        next_cursor = encode_cursor(last) if has_more else None
+        previous_cursor = encode_cursor(first, reverse=True) if values is not None else None
+    return KeysetPage(rows, next_cursor, previous_cursor)
+
+def paginate_keyset(queryset, request, ordering, per_page=PRODUCTS_PER_PAGE):
+    """
+    Paginación por keyset para vistas HTML (parámetro ``?cursor=``)
+
+    Un cursor inválido o manipulado muestra la primera página.
+    """
+    try:
+        return keyset_paginate(queryset, ordering, request.GET.get("cursor"), per_page)
+    except ValueError:
+        return keyset_paginate(queryset, ordering, None, per_page)
+
+def estimate_count(queryset):
+    """
+    Total aproximado de filas sin COUNT(*)
+
+    En MySQL usa la estimación de ``information_schema.TABLES`` (estadísticas
+    de InnoDB) y solo para querysets sin filtros; con filtros devuelve
+    ``None``. En otras bases hace un ``count()`` normal.
+    """
+    connection = connections[queryset.db]
+    if connection.vendor != "mysql":
+        return queryset.count()
+    if queryset.query.where:
+        return None
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT TABLE_ROWS FROM information_schema.TABLES "
+            "WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = %s",
+            [queryset.model._meta.db_table],
+        )
+        row = cursor.fetchone()
+    return int(row[0] or 0) if row else None
+
 def get_cache_key_for_model(model_name, user_id=None):
     """
     Genera cache keys consistentes para modelos
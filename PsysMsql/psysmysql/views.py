@@ -1,15 +1,25 @@
+import hmac
 import json
 from django.contrib import messages
 from django.contrib.auth.views import never_cache
-from django.db import DatabaseError
+from django.db import DatabaseError, connections
 from django.core.exceptions import ValidationError
 from django.db.models import ObjectDoesNotExist
 from django.shortcuts import render, redirect
 from django.contrib.auth.decorators import login_required, permission_required
 from django.views import View
 from django.utils.decorators import method_decorator
-from django.http import JsonResponse
+from django.http import (
+    JsonResponse,
+    HttpResponse,
+    HttpResponseForbidden,
+    StreamingHttpResponse,
+)
+from django.core.handlers.asgi import ASGIRequest
+from asgiref.sync import sync_to_async
 from django.contrib.auth.models import User
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
 
 from .tasks import send_sell_confirmation_email
 from .models import Products, Sell, SellProducts, Stock
@@ -36,7 +46,8 @@ from .services.stock_service import (
     GetStcokSummaty,
     GetStockAlerts,
 )
-from .services.clients_service import RegisterClients, GertAllClients
+from .services.clients_service import ClientLookup, RegisterClients, GertAllClients
+from .services.dashboard_service import DashboardService
 from .services.factura_service import (
     GetDataClientForBill,
     create_bill_in_memory,
@@ -56,11 +67,25 @@ from .forms import (
 from .utils import (
     is_admin,
     is_seller,
-    paginate_queryset,
+    paginate_keyset,
 )
+from .metrics import registry as metrics_registry
+from .live_feed import sales_events
 from psysmysql import constants
 
 
+async def arender(request, template_name, context=None):
+    """
+    ``render`` para vistas async protegidas con ``login_required``
+
+    Los context processors (auth, messages) leen la sesión de forma síncrona.
+    ``request.user`` y ``request.auser()`` tienen caches separadas: se reutiliza
+    el usuario que ya cargó ``login_required`` para no consultarlo dos veces.
+    """
+    request.user = await request.auser()
+    return await sync_to_async(render)(request, template_name, context)
+
+
 def app(request):
     return render(request, "app.html")
 
@@ -102,14 +127,23 @@ def register_product(request):
     return render(request, "registerproduct.html", {"formregister": formregister})
 
 
-def view_product(request):
-    all_products = GetAllProducts.get_all_products().get("products")
-    total_products = GetAllProducts.get_all_products().get("total")
+def products_context(all_products):
+    return {
+        "all_products": all_products["products"],
+        "total_products_save": all_products["total"],
+    }
+
 
-    context = {"all_products": all_products, "total_products_save": total_products}
+def view_product(request):
+    context = products_context(GetAllProducts.get_all_products())
     return render(request, "allproducts.html", context)
 
 
+async def aview_product(request):
+    context = products_context(await GetAllProducts.aget_all_products())
+    return await sync_to_async(render)(request, "allproducts.html", context)
+
+
 @login_required
 @permission_required("psysmysql.delete_products", login_url="error")
 def delete_product(request):
@@ -258,6 +292,19 @@ def search_products_ajax(request):
     return JsonResponse({"error": "Invalid request method"}, status=405)
 
 
+@login_required
+async def asearch_products_ajax(request):
+    if request.method == "GET":
+        query = request.GET.get("q", "").strip()
+        try:
+            results = await SearchByAjax.asearch_products_ajax(query, limit=10)
+            return JsonResponse({"results": results})
+        except Exception as e:
+            return JsonResponse({"error": str(e)}, status=500)
+
+    return JsonResponse({"error": "Invalid request method"}, status=405)
+
+
 @method_decorator(
     [
         login_required(login_url="login"),
@@ -283,7 +330,7 @@ class SellProductView(View):
         if formsearch.is_valid():
             search_query = formsearch.cleaned_data["query"]
             if search_query:
-                search_results = Search.search_clients_by_email(search_query)
+                search_results = ClientLookup.lookup(search_query)
         list_sell_products = Search.search_default(SellProducts)
         totals = CalculatedTotals.calculated_totals()
         change = request.session.pop("change", None)
@@ -372,6 +419,7 @@ class SellProductView(View):
                     detail_items.append(
                         {
                             "id": int(item.idsell_product),
+                            "id_product": int(item.idproduct_id),
                             "name": str(item.idproduct.name),
                             "price": float(item.priceunitaty),
                             "quantity": int(item.quantity),
@@ -548,13 +596,21 @@ class SellProductView(View):
 
 @login_required()
 def listallsellregisterview(request):
-    registers = GetStatistic.get_register_sell_statistic()
+    page_obj = paginate_keyset(
+        GetStatistic.register_page_queryset(),
+        request,
+        ("-date", "-idsell"),
+        constants.SELLS_PER_PAGE,
+    )
     statistics = GetStatistic.quantity_total_sells()
     type_payments = GetStatistic.quantity_and_types_payment()
     total_money_sell = GetStatistic.total_money_sell()
 
     context = {
-        "registers_sell_statistics": json.loads(registers),
+        "registers_sell_statistics": GetStatistic.register_rows(
+            page_obj, with_detail=False
+        ),
+        "page_obj": page_obj,
         "totals_sell": json.loads(statistics),
         "totals_type_payment": json.loads(type_payments),
         "total_money_sell": json.loads(total_money_sell),
@@ -568,15 +624,12 @@ def listallsellregisterview(request):
 def detailregisterview(request, pk):
     detail_individual_register = GetIndividualtatistic.get_individual_statistics(pk)
 
-    details_json = detail_individual_register.values("detail_sell").first()[
-        "detail_sell"
-    ]
-    idsell_json = detail_individual_register.values("idsell")
-    details = json.loads(details_json.replace("'", '"'))
+    register = detail_individual_register.values("idsell", "detail_sell").first()
+    details = json.loads(register["detail_sell"].replace("'", '"'))
 
     context = {
         "detail_individual_registers": details,
-        "idsell": idsell_json.values("idsell").first()["idsell"],
+        "idsell": register["idsell"],
     }
     return render(request, "listdetailsellregister.html", context)
 
@@ -591,18 +644,15 @@ def delete_sell_item(request, pk):
 
 
 def list_product_sell(request):
-    list_sell_products = SellProducts.objects.select_related(
-        "idproduct", "idsell"
-    ).all()
+    list_sell_products = SellProducts.objects.select_related("idproduct", "idsell")
 
-    # Paginar si hay muchos registros
-    page_obj, paginator = paginate_queryset(
-        list_sell_products, request, constants.SELLS_PER_PAGE
+    # Paginar por keyset: las páginas profundas cuestan lo mismo que la primera
+    page_obj = paginate_keyset(
+        list_sell_products, request, ("-idsell_product",), constants.SELLS_PER_PAGE
     )
 
     context = {
         "list_sell_products": page_obj,
-        "paginator": paginator,
         "page_obj": page_obj,
     }
     return render(request, "listsellproducts.html", context)
@@ -744,6 +794,175 @@ def register_clients(request):
 
 
 def view_clients(request):
-    all_client_registers = GertAllClients.get_all_clients()
-    context = {"all_clients": all_client_registers}
+    page_obj = GertAllClients.get_all_clients(request.GET.get("page", 1))
+    context = {"all_clients": page_obj, "page_obj": page_obj}
     return render(request, "allclients.html", context)
+
+
+async def aview_clients(request):
+    page_obj = await sync_to_async(GertAllClients.get_all_clients)(
+        request.GET.get("page", 1)
+    )
+    context = {"all_clients": page_obj, "page_obj": page_obj}
+    return await sync_to_async(render)(request, "allclients.html", context)
+
+
+def metrics_authorized(request):
+    """
+    Staff autenticado o ``Authorization: Bearer <METRICS_TOKEN>``
+
+    No se confía en ``REMOTE_ADDR``: detrás del proxy inverso todas las
+    peticiones llegan desde 127.0.0.1.
+    """
+    token = settings.METRICS_TOKEN
+    scheme, _, credentials = request.headers.get("Authorization", "").partition(" ")
+    if token and scheme.lower() == "bearer":
+        # El scraper no tiene sesión: se resuelve sin tocar la base de datos
+        return hmac.compare_digest(credentials.encode(), token.encode())
+    return request.user.is_staff
+
+
+def metrics(request):
+    """Histogramas de rendimiento en formato de texto Prometheus"""
+    if not metrics_authorized(request):
+        return HttpResponseForbidden()
+    return HttpResponse(
+        metrics_registry.render_prometheus(),
+        content_type="text/plain; version=0.0.4; charset=utf-8",
+    )
+
+
+def get_int_param(request, name, default, maximum):
+    """Entero positivo de la query string, acotado a ``maximum``"""
+    try:
+        value = int(request.GET.get(name, default))
+    except (TypeError, ValueError):
+        return default
+    return min(max(value, 1), maximum)
+
+
+def dashboard_context(summary):
+    dashboard_data = {
+        **summary,
+        # Chart.js recibe los datos de los gráficos como JSON en la plantilla
+        "sales_chart": json.dumps(summary["sales_chart"], cls=DjangoJSONEncoder),
+        "payment_methods": json.dumps(summary["payment_methods"], cls=DjangoJSONEncoder),
+    }
+    return {
+        "page_title": "Dashboard",
+        "dashboard_data": dashboard_data,
+        "alerts": summary["alerts"],
+    }
+
+
+@login_required
+def dashboard_main(request):
+    context = dashboard_context(DashboardService.get_dashboard_summary())
+    return render(request, "dashboard/main.html", context)
+
+
+@login_required
+async def adashboard_main(request):
+    context = dashboard_context(await DashboardService.aget_dashboard_summary())
+    return await arender(request, "dashboard/main.html", context)
+
+
+def dashboard_widget_request(request):
+    """
+    Widget pedido en ``?endpoint=`` y sus argumentos
+
+    Returns:
+        tuple: (widget, args); widget es ``"summary"`` o None si no existe
+    """
+    endpoint = request.GET.get("endpoint", "summary")
+    days = get_int_param(request, "days", 30, 365)
+    limit = get_int_param(request, "limit", 10, 50)
+    widgets = {
+        "summary": ("summary", {"days": days, "limit": limit}),
+        "kpis": ("kpis", (days,)),
+        "sales_chart": ("sales_chart", (days, request.GET.get("grouping", "day"))),
+        "products": ("products_performance", (limit,)),
+        "payment_methods": ("payment_methods", (days,)),
+        "activities": ("recent_activities", (limit,)),
+        "alerts": ("alerts", ()),
+    }
+    return widgets.get(endpoint, (None, endpoint))
+
+
+def unknown_dashboard_endpoint(endpoint):
+    return JsonResponse(
+        {"success": False, "error": f"Endpoint desconocido: {endpoint}"},
+        status=400,
+    )
+
+
+@login_required
+def dashboard_api(request):
+    """Widgets del dashboard en JSON; ``?endpoint=summary`` los devuelve todos"""
+    widget, args = dashboard_widget_request(request)
+    try:
+        if widget == "summary":
+            data = DashboardService.get_dashboard_summary(**args)
+        elif widget is not None:
+            data = DashboardService.get_widget(widget, *args)
+        else:
+            return unknown_dashboard_endpoint(args)
+    except ValueError as e:
+        return JsonResponse({"success": False, "error": str(e)}, status=400)
+
+    return JsonResponse({"success": True, "data": data})
+
+
+@login_required
+async def adashboard_api(request):
+    widget, args = dashboard_widget_request(request)
+    try:
+        if widget == "summary":
+            data = await DashboardService.aget_dashboard_summary(**args)
+        elif widget is not None:
+            data = await DashboardService.aget_widget(widget, *args)
+        else:
+            return unknown_dashboard_endpoint(args)
+    except ValueError as e:
+        return JsonResponse({"success": False, "error": str(e)}, status=400)
+
+    return JsonResponse({"success": True, "data": data})
+
+
+@login_required
+def realtime_stats(request):
+    return JsonResponse({"success": True, "data": DashboardService.get_realtime_stats()})
+
+
+@login_required
+async def arealtime_stats(request):
+    data = await sync_to_async(DashboardService.get_realtime_stats)()
+    return JsonResponse({"success": True, "data": data})
+
+
+@login_required
+async def sales_stream(request):
+    """
+    Server-Sent Events con los deltas de KPIs de cada venta completada
+
+    Requiere un servidor ASGI (``uvicorn PsysMsql.asgi:application``): bajo
+    WSGI una respuesta infinita bloquearía un worker, así que se responde
+    503 y el dashboard vuelve a consultar ``realtime_stats`` periódicamente.
+    """
+    if not isinstance(request, ASGIRequest):
+        return JsonResponse(
+            {"success": False, "error": "El feed en vivo requiere un servidor ASGI"},
+            status=503,
+        )
+
+    snapshot = await sync_to_async(DashboardService.get_realtime_stats)()
+    # El stream no vuelve a consultar la base y request_finished solo llega
+    # cuando se cierra: se libera ya la conexión del hilo de la petición
+    await sync_to_async(connections.close_all)()
+    response = StreamingHttpResponse(
+        sales_events(snapshot), content_type="text/event-stream"
+    )
+    response["Cache-Control"] = "no-cache"
+    # Evita que nginx acumule el stream en su buffer
+    response["X-Accel-Buffering"] = "no"
+    return response